@@ -0,0 +1,207 @@
+import collections
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.metrics import metrics
+
+class SourceHealth:
+    """Recent latencies and failure state of one provider behind a CompositeFeed."""
+    def __init__(self, name: str, feed, window: int = 200):
+        self.name = name
+        self.feed = feed
+        self.pause = getattr(feed, "batch_pause", 0.0) # provider rate limit between calls
+        self.latencies = collections.deque(maxlen=window)
+        self.error_rate = 0.0 # EWMA of failed calls
+        self.consecutive_failures = 0
+        self.down = False
+        self.backoff = 1
+        self.next_probe = 0.0
+        self.next_call = 0.0
+        self.lock = threading.Lock()
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self.lock:
+            if len(self.latencies) < 10: return None
+            ordered = sorted(self.latencies)
+        return ordered[int(q * (len(ordered) - 1))]
+
+    def score(self) -> float:
+        """Expected cost of the next call: median latency, penalized by errors, plus any pacing wait."""
+        p50 = self.quantile(0.5)
+        wait_s = max(0.0, self.next_call - time.monotonic())
+        return (p50 if p50 is not None else 0.0) * (1 + 4 * self.error_rate) + wait_s
+
+class CompositeFeed:
+    """
+    One data feed over several providers (e.g. Dhan, Kite, Yahoo), routed by
+    live health instead of a static choice:
+
+    - each chunk goes to the healthy source with the lowest expected latency
+      (median of its recent calls, penalized by its error rate);
+    - if the chunk is still pending after that source's p95 latency, the same
+      chunk is hedged to the next source and the first non-empty answer wins
+      (hedges are capped at hedge_budget of all chunks to respect rate limits);
+    - a call that fails outright falls over to the next source immediately;
+    - a source with failure_threshold failures in a row (or a tripped auth
+      breaker) is taken out and re-probed in the background with exponential
+      backoff, resetting its breaker first, until it answers again.
+    """
+    batch_pause = 0.0 # pacing is per source, inside the feed
+
+    def __init__(self, sources: Sequence[Tuple[str, object]], hedge_budget: float = 0.1,
+                 hedge_min_ms: float = 50.0, probe_sec: float = 30.0, timeout: float = 5.0,
+                 failure_threshold: int = 3):
+        if not sources: raise ValueError("CompositeFeed needs at least one source")
+        self.sources = [SourceHealth(name, feed) for name, feed in sources]
+        self.batch_size = min(getattr(feed, "batch_size", 50) for _, feed in sources)
+        self.hedge_budget = hedge_budget
+        self.hedge_min = hedge_min_ms / 1000
+        self.probe_sec = probe_sec
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.chunks = 0
+        self.hedged = 0
+        self.probe_symbols: List[str] = []
+        self.pool = ThreadPoolExecutor(max_workers=4 * len(self.sources), thread_name_prefix="feed")
+        threading.Thread(target=self._probe_loop, name="feed-probe", daemon=True).start()
+
+    @classmethod
+    def from_config(cls, sources: Sequence[Tuple[str, object]], config) -> "CompositeFeed":
+        return cls(sources, hedge_budget=config.FEED_HEDGE_BUDGET, hedge_min_ms=config.FEED_HEDGE_MIN_MS,
+                   probe_sec=config.FEED_PROBE_SEC, timeout=config.FEED_TIMEOUT_SEC,
+                   failure_threshold=config.FEED_FAILURE_THRESHOLD)
+
+    def authenticate(self):
+        return any(not s.down for s in self.sources)
+
+    def ranked(self) -> List[SourceHealth]:
+        healthy = [s for s in self.sources if not s.down]
+        if not healthy: return list(self.sources) # everything is down: keep trying in preference order
+        return sorted(healthy, key=lambda s: s.score()) # stable: ties keep preference order
+
+    def status(self) -> List[Dict]:
+        return [{
+            "source": s.name, "down": s.down, "p50_ms": _ms(s.quantile(0.5)), "p95_ms": _ms(s.quantile(0.95)),
+            "error_rate": round(s.error_rate, 3), "consecutive_failures": s.consecutive_failures
+        } for s in self.sources]
+
+    # --- Quotes ---
+
+    def get_market_data(self, symbol: str, interval: str) -> Optional[Dict]:
+        return self.get_market_data_batch([symbol]).get(symbol)
+
+    def get_market_data_batch(self, symbols: List[str]) -> Dict[str, Dict]:
+        if not symbols: return {}
+        self.probe_symbols = symbols[:5]
+        self.chunks += 1
+        backups = self.ranked()
+        primary = backups.pop(0)
+        pending = {self.pool.submit(self._call, primary, symbols): primary}
+        hedge_at = time.monotonic() + max(self.hedge_min, primary.quantile(0.95) or self.timeout / 4)
+        deadline = time.monotonic() + self.timeout
+
+        while pending:
+            can_hedge = bool(backups) and self.hedged < self.hedge_budget * self.chunks + 1
+            until = hedge_at if can_hedge and hedge_at < deadline else deadline
+            done, _ = wait(pending, timeout=max(0.0, until - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.pop(future)
+                result = future.result()
+                if result: return result
+                if backups: # failed outright: fall over now rather than waiting out the hedge delay
+                    source = backups.pop(0)
+                    metrics.counter("ag_feed_failovers_total", source=source.name).inc()
+                    pending[self.pool.submit(self._call, source, symbols)] = source
+            if done: continue
+            if time.monotonic() >= deadline: break
+            if can_hedge:
+                source = backups.pop(0)
+                self.hedged += 1
+                metrics.counter("ag_feed_hedges_total", primary=primary.name, source=source.name).inc()
+                pending[self.pool.submit(self._call, source, symbols)] = source
+                hedge_at = deadline
+        return {}
+
+    def _call(self, source: SourceHealth, symbols: List[str]) -> Optional[Dict[str, Dict]]:
+        """One request with the source's own pacing; records latency/failure. None on failure."""
+        if source.pause:
+            with source.lock:
+                now = time.monotonic()
+                wait_s = source.next_call - now
+                source.next_call = max(now, source.next_call) + source.pause
+            if wait_s > 0: time.sleep(wait_s)
+        start = time.monotonic()
+        try:
+            result = source.feed.get_market_data_batch(symbols)
+        except Exception as e:
+            print(f"[FEED] {source.name} error: {e}")
+            result = None
+        elapsed = time.monotonic() - start
+        metrics.histogram("ag_feed_request_seconds", source=source.name).record(elapsed)
+        if result:
+            self._succeeded(source, elapsed)
+            return result
+        self._failed(source)
+        return None
+
+    def _succeeded(self, source: SourceHealth, elapsed: float):
+        with source.lock:
+            source.latencies.append(elapsed)
+            source.error_rate *= 0.9
+            source.consecutive_failures = 0
+            recovered = source.down
+            source.down = False
+            source.backoff = 1
+        if recovered: print(f"[FEED] {source.name} is answering again; back in rotation.")
+
+    def _failed(self, source: SourceHealth):
+        with source.lock:
+            source.error_rate = source.error_rate * 0.9 + 0.1
+            source.consecutive_failures += 1
+            trip = not source.down and (source.consecutive_failures >= self.failure_threshold
+                                        or getattr(source.feed, "auth_failed", False))
+            if trip:
+                source.down = True
+                source.next_probe = time.monotonic() + self.probe_sec
+        if trip:
+            metrics.counter("ag_feed_source_down_total", source=source.name).inc()
+            print(f"[FEED] {source.name} taken out of rotation; re-probing every {self.probe_sec:.0f}s+.")
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(1.0)
+            for source in self.sources:
+                if not source.down or time.monotonic() < source.next_probe or not self.probe_symbols:
+                    continue
+                # A tripped auth breaker (Dhan 808) would otherwise keep the source dark until restart
+                if getattr(source.feed, "auth_failed", False) and hasattr(source.feed, "reset_auth"):
+                    source.feed.reset_auth()
+                if self._call(source, self.probe_symbols) is None:
+                    with source.lock:
+                        source.backoff = min(source.backoff * 2, 10)
+                        source.next_probe = time.monotonic() + self.probe_sec * source.backoff
+
+    # --- History ---
+
+    def get_history_batch(self, symbols: List[str], days: int = 60) -> Dict[str, Dict[str, List[float]]]:
+        """Daily history from the first source (healthy ones first) that has it."""
+        healthy = self.ranked()
+        for source in healthy + [s for s in self.sources if s not in healthy]:
+            if not hasattr(source.feed, "get_history_batch"): continue
+            try:
+                history = source.feed.get_history_batch(symbols, days=days)
+            except Exception as e:
+                print(f"[FEED] {source.name} history error: {e}")
+                continue
+            if history: return history
+        return {}
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+metrics.describe("ag_feed_request_seconds", "Quote chunk latency per source behind the composite feed.")
+metrics.describe("ag_feed_hedges_total", "Chunks re-sent to a second source after the primary's p95.")
+metrics.describe("ag_feed_failovers_total", "Chunks re-sent after a source failed outright.")
+metrics.describe("ag_feed_source_down_total", "Sources taken out of rotation.")
@@ -1,23 +1,44 @@
-from dhanhq import dhanhq
+import datetime
+import time
 from brokers.base import BaseBroker
-from typing import Dict, List, Optional
+from core.symbols import get_registry
+from core.metrics import metrics
+from typing import Dict, List, Optional, Tuple
+
+HISTORY_PAUSE = 0.25 # data APIs allow a few requests/sec
 
 class DhanBroker(BaseBroker):
-    def __init__(self, client_id: str, access_token: str):
+    def __init__(self, client_id: str, access_token: str, scrip_master_path: Optional[str] = None):
         self.client_id = client_id
         self.access_token = access_token
         self.dhan = None
         self.auth_failed = False # Circuit breaker
+        self.quotable = False # any symbol with a security id (quotes and history need one)
+        self.chunk_requests: Dict[Tuple[str, ...], Tuple[Dict, Dict]] = {} # chunk -> (mapping, securities)
         
         if client_id and "your_" not in client_id:
             try:
+                from dhanhq import dhanhq # heavy SDK: imported only when Dhan is configured
                 self.dhan = dhanhq(client_id, access_token)
             except Exception as e:
                 print(f"[DHAN] Initialization Error: {e}")
+        if self.dhan:
+            registry = get_registry()
+            # The engine loads the scrip master at startup; other processes (shard fetchers) load it here
+            if scrip_master_path and not any(registry.dhan_security_ids):
+                registry.load_dhan_scrip_master(scrip_master_path)
+            self.quotable = any(registry.dhan_security_ids)
+            if not self.quotable:
+                print("[DHAN] No security ids loaded (set DHAN_SCRIP_MASTER_PATH to api-scrip-master.csv). "
+                      "Dhan quotes and history are disabled.")
 
     def authenticate(self):
         return self.dhan is not None and not self.auth_failed
 
+    def reset_auth(self):
+        """Close the 808 circuit breaker so the next request retries (used by CompositeFeed probes)."""
+        self.auth_failed = False
+
     def get_market_data(self, symbol: str, interval: str) -> Optional[Dict]:
         """Fetch real-time data for a single symbol from Dhan."""
         if self.auth_failed: return None
@@ -26,20 +47,24 @@ class DhanBroker(BaseBroker):
 
     def get_market_data_batch(self, symbols: List[str]) -> Dict[str, Dict]:
         """Fetch real-time data for multiple symbols in one go."""
-        if not self.dhan or self.auth_failed:
+        if not self.dhan or self.auth_failed or not self.quotable:
             return {}
             
         try:
-            # Map symbols to Dhan format (SYMBOL-EQ)
-            mapping = {f"{s.split('.')[0] if '.' in s else s}-EQ": s for s in symbols}
-            dhan_securities = {ds: 'NSE_EQ' for ds in mapping.keys()}
+            mapping, dhan_securities = self.chunk_request(symbols)
+            if not mapping: return {}
             
             # Use batch quote_data call
-            response = self.dhan.quote_data(securities=dhan_securities)
+            with metrics.timer("ag_broker_request_seconds", broker="dhan", endpoint="quote_data"):
+                response = self.dhan.quote_data(securities=dhan_securities)
             
             # Check for Auth Failure (808)
             if response.get('status') == 'failure':
                 err_data = response.get('data', {}).get('data', {})
+                if isinstance(err_data, dict):
+                    # e.g. 805 (too many requests), 808 (auth failed)
+                    for code in err_data:
+                        metrics.counter("ag_broker_errors_total", broker="dhan", code=str(code)).inc()
                 if isinstance(err_data, dict) and '808' in err_data:
                     print(f"🚨 [CRITICAL] AUTH FAILED: {err_data['808']}")
                     print("🛑 Stopping all Dhan requests until restart.")
@@ -52,26 +77,85 @@ class DhanBroker(BaseBroker):
 
             results = {}
             if response and response.get('status') == 'success':
-                data_map = response.get('data', {})
+                # {"data": {"NSE_EQ": {"<security id>": quote}}, "status": ...} under the SDK's envelope
+                body = response.get('data') or {}
+                data_map = (body.get('data', body) if isinstance(body, dict) else {}).get('NSE_EQ') or {}
                 print(f"[DEBUG] Dhan Success! Received {len(data_map)} symbols.")
                 if not data_map:
                     print(f"[DEBUG] WARNING: Dhan returned SUCCESS but NO DATA (Empty Map). Plan likely inactive.")
                     
-                for ds, target_symbol in mapping.items():
-                    data = data_map.get(ds, {})
+                for security_id, target_symbol in mapping.items():
+                    data = data_map.get(security_id, {})
                     if data:
+                        ohlc = data.get('ohlc') or data
                         results[target_symbol] = {
-                            "open": data.get('open', 0),
-                            "high": data.get('high', 0),
-                            "low": data.get('low', 0),
+                            "open": ohlc.get('open', 0),
+                            "high": ohlc.get('high', 0),
+                            "low": ohlc.get('low', 0),
                             "close": data.get('last_price', data.get('lp', 0)),
                             "volume": data.get('volume', 0)
                         }
             return results
         except Exception as e:
+            metrics.counter("ag_broker_errors_total", broker="dhan", code=type(e).__name__).inc()
             print(f"[DHAN] Batch Data Fetch Error: {e}")
             return {}
 
+    def chunk_request(self, symbols: List[str]) -> Tuple[Dict, Dict]:
+        """
+        Dhan request payload for a chunk of symbols ({"NSE_EQ": [security id, ...]})
+        and the security id -> symbol map to read the response back. The engine
+        polls the same chunks every cycle, so payloads are built once from the
+        registry and reused. Symbols without a security id (DHAN_SCRIP_MASTER_PATH)
+        can't be quoted and are left out.
+        """
+        key = tuple(symbols)
+        cached = self.chunk_requests.get(key)
+        if cached is None:
+            registry = get_registry()
+            mapping = {}
+            for symbol in symbols:
+                sid = registry.id(symbol)
+                security_id = registry.dhan_security_ids[sid] if sid is not None else None
+                if security_id: mapping[str(security_id)] = symbol
+            cached = (mapping, {'NSE_EQ': [int(s) for s in mapping]})
+            if len(self.chunk_requests) > 1000: self.chunk_requests.clear()
+            self.chunk_requests[key] = cached
+        return cached
+
+    def get_history_batch(self, symbols: List[str], days: int = 60) -> Dict[str, Dict[str, List[float]]]:
+        """
+        Daily bars of completed sessions (oldest first). Needs numeric security ids
+        (DHAN_SCRIP_MASTER_PATH); symbols without one are skipped.
+        """
+        if not self.dhan or self.auth_failed or not self.quotable: return {}
+        registry = get_registry()
+        today = datetime.date.today()
+        start = today - datetime.timedelta(days=int(days * 1.6) + 7)
+        history = {}
+        for symbol in symbols:
+            sid = registry.id(symbol)
+            security_id = registry.dhan_security_ids[sid] if sid is not None else None
+            if not security_id: continue
+            try:
+                with metrics.timer("ag_broker_request_seconds", broker="dhan", endpoint="historical_daily"):
+                    response = self.dhan.historical_daily_data(security_id, "NSE_EQ", "EQUITY",
+                                                               start.isoformat(), today.isoformat())
+            except Exception as e:
+                metrics.counter("ag_broker_errors_total", broker="dhan", code=type(e).__name__).inc()
+                print(f"[DHAN] History error for {symbol}: {e}")
+                continue
+            finally:
+                time.sleep(HISTORY_PAUSE)
+            data = response.get('data') if response and response.get('status') == 'success' else None
+            if not data or not data.get('close'): continue
+            n = len(data['close'])
+            # Drop today's forming candle
+            if data.get('timestamp') and datetime.date.fromtimestamp(data['timestamp'][-1]) >= today: n -= 1
+            if n > 0:
+                history[symbol] = {f: list(data[f][max(0, n - days):n]) for f in ("open", "high", "low", "close", "volume")}
+        return history
+
     def place_order(self, symbol: str, side: str, order_type: str, quantity: int, price: Optional[float] = None) -> str:
         """Paper Trading Placeholder."""
         return "PAPER_ORDER"
@@ -1,41 +1,169 @@
+import datetime
+import json
+import os
+import threading
+import time
 from brokers.base import BaseBroker
+from core.metrics import metrics
 from typing import Dict, List, Optional
-try:
-    from kiteconnect import KiteConnect
-except ImportError:
-    KiteConnect = None
+
+QUOTE_BATCH_LIMIT = 500 # Kite /quote accepts up to 500 instruments per call
+INSTRUMENTS_CACHE_FILE = "kite_instruments.json"
+HISTORY_PAUSE = 0.35 # historical candles: ~3 requests/sec
 
 class KiteBroker(BaseBroker):
-    def __init__(self, api_key: str, access_token: str):
+    batch_size = QUOTE_BATCH_LIMIT
+    batch_pause = 1.0 # /quote is limited to ~1 request/sec
+    def __init__(self, api_key: str, access_token: str, pool_size: int = 10):
         self.api_key = api_key
         self.access_token = access_token
         self.kite = None
+        self.oco_groups: Dict[str, List[str]] = {} # entry order id -> [stop leg, target leg]
+        self.instrument_tokens: Dict[str, int] = {}
+        self.token_symbols: Dict[int, str] = {}
+        self.instruments_date: Optional[str] = None
+        self.instruments_lock = threading.Lock()
+        self.missing_symbols = set()
+        try:
+            # kiteconnect pulls in twisted; import it only when Kite is configured
+            from kiteconnect import KiteConnect
+        except ImportError:
+            KiteConnect = None
         if KiteConnect:
-            self.kite = KiteConnect(api_key=self.api_key)
+            # Pooled HTTP session so concurrent router workers reuse connections
+            self.kite = KiteConnect(api_key=self.api_key,
+                                    pool={"pool_connections": pool_size, "pool_maxsize": pool_size})
             self.kite.set_access_token(self.access_token)
 
     def authenticate(self):
         # In a real scenario, this would handle the login flow
         return self.kite is not None
 
+    def load_instruments(self, force: bool = False):
+        """
+        Load the NSE instrument master (symbol -> instrument token) once per day.
+        The dump is cached on disk so restarts during the day skip the download.
+        """
+        today = datetime.date.today().isoformat()
+        if not force and self.instruments_date == today: return
+        with self.instruments_lock:
+            if not force and self.instruments_date == today: return
+
+            tokens = None
+            if not force and os.path.exists(INSTRUMENTS_CACHE_FILE):
+                try:
+                    with open(INSTRUMENTS_CACHE_FILE, 'r') as f:
+                        cached = json.load(f)
+                    if cached.get("date") == today:
+                        tokens = cached.get("tokens", {})
+                except Exception as e:
+                    print(f"[KITE] Instrument cache read error: {e}")
+
+            if tokens is None:
+                if not self.kite: return
+                try:
+                    with metrics.timer("ag_broker_request_seconds", broker="kite", endpoint="instruments"):
+                        rows = self.kite.instruments("NSE")
+                except Exception as e:
+                    metrics.counter("ag_broker_errors_total", broker="kite", code=type(e).__name__).inc()
+                    print(f"[KITE] Instrument master fetch error: {e}")
+                    return
+                tokens = {r["tradingsymbol"]: int(r["instrument_token"]) for r in rows
+                          if r.get("instrument_type") == "EQ"}
+                try:
+                    with open(INSTRUMENTS_CACHE_FILE, 'w') as f:
+                        json.dump({"date": today, "tokens": tokens}, f)
+                except Exception as e:
+                    print(f"[KITE] Instrument cache write error: {e}")
+
+            self.instrument_tokens = tokens
+            self.token_symbols = {t: s for s, t in tokens.items()}
+            self.instruments_date = today
+            self.missing_symbols.clear()
+            print(f"[KITE] Instrument master loaded: {len(tokens)} NSE equities.")
+
+    def get_instrument_token(self, symbol: str) -> Optional[int]:
+        self.load_instruments()
+        return self.instrument_tokens.get(symbol.split('.')[0])
+
     def get_market_data(self, symbol: str, interval: str) -> Dict:
+        return self.get_market_data_batch([symbol]).get(symbol, {})
+
+    def get_market_data_batch(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Quote many symbols per call (up to QUOTE_BATCH_LIMIT) keyed by instrument token."""
         if not self.kite: return {}
-        # Simple wrapper for quote
-        quote = self.kite.quote(f"NSE:{symbol}")
-        ohlc = quote[f"NSE:{symbol}"]["ohlc"]
-        return {
-            "open": ohlc["open"],
-            "high": ohlc["high"],
-            "low": ohlc["low"],
-            "close": quote[f"NSE:{symbol}"]["last_price"],
-            "volume": quote[f"NSE:{symbol}"]["volume"]
-        }
-
-    def place_order(self, symbol: str, side: str, order_type: str, quantity: int, price: Optional[float] = None) -> str:
+        self.load_instruments()
+
+        requested = {}
+        for s in symbols:
+            token = self.instrument_tokens.get(s.split('.')[0])
+            if token is None:
+                # Unknown/delisted: skip it, warn once per day
+                if s not in self.missing_symbols:
+                    self.missing_symbols.add(s)
+                    print(f"[KITE] No instrument token for {s}. Skipping.")
+                continue
+            requested[token] = s
+
+        results = {}
+        tokens = list(requested.keys())
+        for i in range(0, len(tokens), QUOTE_BATCH_LIMIT):
+            chunk = tokens[i:i + QUOTE_BATCH_LIMIT]
+            try:
+                with metrics.timer("ag_broker_request_seconds", broker="kite", endpoint="quote"):
+                    quotes = self.kite.quote(chunk)
+            except Exception as e:
+                metrics.counter("ag_broker_errors_total", broker="kite", code=type(e).__name__).inc()
+                print(f"[KITE] Batch quote error ({len(chunk)} symbols): {e}")
+                continue
+            for token in chunk:
+                q = quotes.get(str(token))
+                if not q: continue
+                ohlc = q.get("ohlc", {})
+                results[requested[token]] = {
+                    "open": ohlc.get("open", 0),
+                    "high": ohlc.get("high", 0),
+                    "low": ohlc.get("low", 0),
+                    "close": q.get("last_price", 0),
+                    "volume": q.get("volume", 0)
+                }
+        return results
+
+    def get_history_batch(self, symbols: List[str], days: int = 60) -> Dict[str, Dict[str, List[float]]]:
+        """
+        Daily bars of completed sessions (oldest first). Kite's historical API is
+        one instrument per call (~3 req/sec), so this is paced and meant for pre-market.
+        """
+        if not self.kite: return {}
+        today = datetime.date.today()
+        start = today - datetime.timedelta(days=int(days * 1.6) + 7)
+        history = {}
+        for symbol in symbols:
+            token = self.get_instrument_token(symbol)
+            if token is None: continue
+            try:
+                with metrics.timer("ag_broker_request_seconds", broker="kite", endpoint="historical"):
+                    rows = self.kite.historical_data(token, start, today - datetime.timedelta(days=1), "day")
+            except Exception as e:
+                metrics.counter("ag_broker_errors_total", broker="kite", code=type(e).__name__).inc()
+                print(f"[KITE] History error for {symbol}: {e}")
+                continue
+            finally:
+                time.sleep(HISTORY_PAUSE)
+            rows = rows[-days:]
+            if rows:
+                history[symbol] = {f: [r[f] for r in rows] for f in ("open", "high", "low", "close", "volume")}
+        return history
+
+    def place_order(self, symbol: str, side: str, order_type: str, quantity: int, price: Optional[float] = None,
+                    trigger_price: Optional[float] = None) -> str:
         if not self.kite: return "error"
         # transaction_type = BUY or SELL
         tt = self.kite.TRANSACTION_TYPE_BUY if side == "LONG" else self.kite.TRANSACTION_TYPE_SELL
-        ot = self.kite.ORDER_TYPE_MARKET if order_type == "MARKET" else self.kite.ORDER_TYPE_LIMIT
+        ot = {
+            "MARKET": self.kite.ORDER_TYPE_MARKET,
+            "SL-M": self.kite.ORDER_TYPE_SLM,
+        }.get(order_type, self.kite.ORDER_TYPE_LIMIT)
         
         return self.kite.place_order(
             variety=self.kite.VARIETY_REGULAR,
@@ -45,16 +173,39 @@ class KiteBroker(BaseBroker):
             quantity=quantity,
             order_type=ot,
             price=price,
+            trigger_price=trigger_price,
             product=self.kite.PRODUCT_MIS
         )
 
     def place_oco_order(self, symbol: str, side: str, quantity: int, entry_price: float, target: float, stop_loss: float) -> str:
-        # Zerodha GTT or Bracket Order (if available) - simplifying to MIS with SL-M for now
-        # In a real system, this would be a multi-order leg or GTT
+        # MIS entry + SL-M stop leg + LIMIT target leg. The exit legs are linked in
+        # oco_groups and sync_oco_groups() cancels the survivor once one of them fills.
         entry_id = self.place_order(symbol, side, "MARKET", quantity)
-        # Place SL and Target as separate orders (simplified)
+        if not entry_id or entry_id == "error": return entry_id
+        exit_side = "SHORT" if side == "LONG" else "LONG"
+        try:
+            sl_id = self.place_order(symbol, exit_side, "SL-M", quantity, trigger_price=round(stop_loss, 2))
+            tgt_id = self.place_order(symbol, exit_side, "LIMIT", quantity, price=round(target, 2))
+            self.oco_groups[str(entry_id)] = [str(sl_id), str(tgt_id)]
+        except Exception as e:
+            print(f"[KITE] Exit legs failed for {symbol} ({entry_id}): {e}")
         return entry_id
 
+    def sync_oco_groups(self):
+        """Cancel the sibling leg of any OCO group whose stop or target has filled."""
+        if not self.kite or not self.oco_groups: return
+        statuses = self.get_order_statuses([leg for legs in self.oco_groups.values() for leg in legs])
+        for entry_id, legs in list(self.oco_groups.items()):
+            leg_status = [statuses.get(leg, "UNKNOWN") for leg in legs]
+            if "COMPLETE" in leg_status:
+                for leg, status in zip(legs, leg_status):
+                    if status not in ("COMPLETE", "CANCELLED", "REJECTED"):
+                        try: self.cancel_order(leg)
+                        except Exception as e: print(f"[KITE] OCO cancel failed for {leg}: {e}")
+                del self.oco_groups[entry_id]
+            elif all(s in ("CANCELLED", "REJECTED") for s in leg_status):
+                del self.oco_groups[entry_id]
+
     def cancel_order(self, order_id: str):
         if self.kite:
             self.kite.cancel_order(self.kite.VARIETY_REGULAR, order_id)
@@ -64,6 +215,12 @@ class KiteBroker(BaseBroker):
         history = self.kite.order_history(order_id)
         return history[-1]["status"] if history else "UNKNOWN"
 
+    def get_order_statuses(self, order_ids: List[str]) -> Dict[str, str]:
+        """One orderbook call for all pending orders instead of one history call each."""
+        if not self.kite: return {}
+        wanted = set(order_ids)
+        return {str(o["order_id"]): o["status"] for o in self.kite.orders() if str(o["order_id"]) in wanted}
+
     def get_positions(self) -> List[Dict]:
         return self.kite.positions()["net"] if self.kite else []
 
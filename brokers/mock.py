@@ -1,22 +1,31 @@
 import random
 import uuid
 import datetime
-import time
 from typing import Dict, List, Optional
 from brokers.base import BaseBroker
+from core.symbols import get_registry
+from core.metrics import metrics
+from core.memory import TTLCache
 
-try:
-    import yfinance as yf
-except ImportError:
-    yf = None
+TERMINAL = {"COMPLETE", "CANCELLED", "REJECTED"}
 
 class MockBroker(BaseBroker):
-    def __init__(self):
+    def __init__(self, cache_ttl: float = 60.0, cache_size: int = 5000, max_orders: int = 10_000):
+        """
+        cache_ttl/cache_size: Yahoo quotes are reused for cache_ttl seconds, at most cache_size tickers.
+        max_orders: past this many orders the oldest finished ones are forgotten. OCO entries fill at
+        once and their exit legs are not simulated, so an OCO is finished (COMPLETE) like any market order.
+        """
         self.orders = {}
+        self.max_orders = max_orders
         self.positions = []
         self.balance = 100000.0
-        self.cache = {}
-        self.cache_expiry = {}
+        self.cache = TTLCache("mock_quotes", ttl=cache_ttl, max_items=cache_size)
+
+    @classmethod
+    def from_config(cls, config) -> "MockBroker":
+        return cls(cache_ttl=config.MOCK_QUOTE_CACHE_SEC, cache_size=config.MOCK_QUOTE_CACHE_SIZE,
+                   max_orders=config.MOCK_MAX_ORDERS)
 
     def authenticate(self):
         return True
@@ -24,16 +33,17 @@ class MockBroker(BaseBroker):
     def get_market_data(self, symbol: str, interval: str) -> Optional[Dict]:
         """Fetch data from Yahoo Finance (Free Fallback)."""
         try:
-            if not yf: return None
-            ticker_symbol = symbol if "." in symbol else f"{symbol}.NS"
+            # yfinance (and pandas under it) is imported on the first Yahoo request
+            try: import yfinance as yf
+            except ImportError: return None
+            ticker_symbol = get_registry().yahoo_ticker(symbol)
             
-            now = time.time()
-            # Cache duration: 60s
-            if ticker_symbol in self.cache and now < self.cache_expiry.get(ticker_symbol, 0):
-                return self.cache[ticker_symbol]
+            cached = self.cache.get(ticker_symbol)
+            if cached is not None: return cached
 
             ticker = yf.Ticker(ticker_symbol)
-            data = ticker.history(period="1d", interval="1m")
+            with metrics.timer("ag_broker_request_seconds", broker="yahoo", endpoint="history"):
+                data = ticker.history(period="1d", interval="1m")
             if data.empty: return None
             
             row = data.iloc[-1]
@@ -47,10 +57,10 @@ class MockBroker(BaseBroker):
             }
             
             self.cache[ticker_symbol] = market_data
-            self.cache_expiry[ticker_symbol] = now + 60
             return market_data
         except Exception as e:
             # print(f"[MOCK] Data Error: {e}")
+            metrics.counter("ag_broker_errors_total", broker="yahoo", code=type(e).__name__).inc()
             return None
 
     def get_market_data_batch(self, symbols: List[str]) -> Dict[str, Dict]:
@@ -71,23 +81,66 @@ class MockBroker(BaseBroker):
                 except: pass
         return results
 
+    def get_history_batch(self, symbols: List[str], days: int = 60) -> Dict[str, Dict[str, List[float]]]:
+        """Daily bars of completed sessions (oldest first) from Yahoo, one download per chunk."""
+        try: import yfinance as yf
+        except ImportError: return {}
+        registry = get_registry()
+        tickers = {registry.yahoo_ticker(s): s for s in symbols}
+        today = datetime.date.today()
+        start = today - datetime.timedelta(days=int(days * 1.6) + 7) # weekends + holidays
+        try:
+            with metrics.timer("ag_broker_request_seconds", broker="yahoo", endpoint="download"):
+                frame = yf.download(list(tickers), start=start.isoformat(), interval="1d", group_by="ticker",
+                                    auto_adjust=False, threads=True, progress=False)
+        except Exception as e:
+            metrics.counter("ag_broker_errors_total", broker="yahoo", code=type(e).__name__).inc()
+            print(f"[MOCK] History download error: {e}")
+            return {}
+
+        history = {}
+        for ticker, symbol in tickers.items():
+            try:
+                df = frame[ticker] if frame.columns.nlevels > 1 else frame
+                df = df.dropna(subset=["Close"])
+                df = df[df.index.date < today].tail(days) # today's bar is still forming
+            except Exception:
+                continue
+            if df.empty: continue
+            history[symbol] = {
+                "open": df["Open"].tolist(), "high": df["High"].tolist(), "low": df["Low"].tolist(),
+                "close": df["Close"].tolist(), "volume": df["Volume"].tolist()
+            }
+        return history
+
     def place_order(self, symbol: str, side: str, order_type: str, quantity: int, price: Optional[float] = None) -> str:
         order_id = str(uuid.uuid4())
         self.orders[order_id] = {"status": "COMPLETE", "symbol": symbol, "side": side}
+        self._trim_orders()
         return order_id
 
     def place_oco_order(self, symbol: str, side: str, quantity: int, entry_price: float, target: float, stop_loss: float) -> str:
+        # The id is the entry's, which fills at market like a live OCO entry; the exit legs ride along
         order_id = str(uuid.uuid4())
         self.orders[order_id] = {
-            "status": "OPEN", 
+            "status": "COMPLETE", 
             "symbol": symbol, 
             "side": side, 
             "entry": entry_price, 
             "target": target, 
             "sl": stop_loss
         }
+        self._trim_orders()
         return order_id
 
+    def _trim_orders(self):
+        """Past max_orders, forget the oldest finished orders down to half the cap."""
+        if len(self.orders) <= self.max_orders: return
+        drop = len(self.orders) - self.max_orders // 2
+        stale = [oid for oid, o in list(self.orders.items()) if o.get("status") in TERMINAL][:drop]
+        for oid in stale: self.orders.pop(oid, None)
+        if stale: metrics.counter("ag_cache_evictions_total", cache="mock_orders").inc(len(stale))
+
     def cancel_order(self, order_id: str):
         if order_id in self.orders:
             self.orders[order_id]["status"] = "CANCELLED"
@@ -95,6 +148,9 @@ class MockBroker(BaseBroker):
     def get_order_status(self, order_id: str) -> str:
         return self.orders.get(order_id, {}).get("status", "NOT_FOUND")
 
+    def get_order_statuses(self, order_ids: List[str]) -> Dict[str, str]:
+        return {oid: self.get_order_status(oid) for oid in order_ids}
+
     def get_positions(self) -> List[Dict]:
         return self.positions
 
@@ -0,0 +1,221 @@
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from brokers.mock import MockBroker
+from core.metrics import metrics
+from core.symbols import get_registry
+
+# Volatility multiplier per regime; the simulator hops between them as a Markov chain
+VOL_REGIMES = {"CALM": 0.5, "NORMAL": 1.0, "VOLATILE": 2.5}
+SECONDS_PER_YEAR = 252 * 6.25 * 3600 # NSE trading seconds
+
+class SyntheticBroker(MockBroker):
+    """
+    Offline market simulator. Prices follow a seeded one-factor-plus-sector model
+    (market beta + sector shock + idiosyncratic noise), so names within a sector
+    move together. Every step advances the whole universe in one NumPy pass and
+    batch reads are fancy-indexed, so 10k+ symbols per cycle stay cheap.
+
+    Execution is inherited from MockBroker (paper fills).
+    """
+    batch_size = 500
+    batch_pause = 0.0
+
+    def __init__(self, symbols: Sequence[str], seed: int = 42, step_seconds: float = 1.0,
+                 annual_vol: float = 0.25, regime: str = "NORMAL", regime_switch_prob: float = 0.0,
+                 latency_ms: float = 0.0, latency_jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, auth_error_rate: float = 0.0,
+                 clock=time.time):
+        super().__init__()
+        self.symbols = list(symbols)
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        self.rng = np.random.default_rng(seed)
+        self.step_seconds = step_seconds
+        self.annual_vol = annual_vol
+        self.regime = regime
+        self.regime_switch_prob = regime_switch_prob
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.auth_error_rate = auth_error_rate
+        self.clock = clock
+        self.seed = seed
+        self.auth_failed = False
+        self.last_error: Optional[str] = None
+        self.lock = threading.Lock()
+        self.chunk_index: Dict[tuple, np.ndarray] = {}
+
+        n = len(self.symbols)
+        registry = get_registry()
+        sectors = [registry.sectors[sid] if (sid := registry.id(s)) is not None else "UNKNOWN" for s in self.symbols]
+        sector_names = sorted(set(sectors))
+        # Unknown names get spread over synthetic sectors so they still cluster
+        n_synth = max(1, n // 50)
+        self.sector_ids = np.array([
+            sector_names.index(sec) if sec != "UNKNOWN" else len(sector_names) + i % n_synth
+            for i, sec in enumerate(sectors)
+        ])
+        self.n_sectors = int(self.sector_ids.max()) + 1 if n else 1
+
+        rng = self.rng
+        self.beta = rng.uniform(0.6, 1.4, n)
+        self.sector_loading = rng.uniform(0.3, 0.8, n)
+        self.idio_scale = rng.uniform(0.6, 1.2, n)
+        self.base_volume = rng.lognormal(6, 1.2, n) # per-step volume scale
+
+        self.price = np.exp(rng.uniform(np.log(50), np.log(5000), n))
+        self.day_open = self.price.copy()
+        self.day_high = self.price.copy()
+        self.day_low = self.price.copy()
+        self.volume = np.zeros(n)
+        self.last_step = self.clock()
+
+    def authenticate(self):
+        return not self.auth_failed
+
+    def reset_auth(self):
+        self.auth_failed = False
+
+    def set_regime(self, regime: str):
+        self.regime = regime
+
+    def new_day(self):
+        """Roll the session: today's close becomes the new open, range and volume reset."""
+        with self.lock:
+            self.day_open = self.price.copy()
+            self.day_high = self.price.copy()
+            self.day_low = self.price.copy()
+            self.volume[:] = 0
+
+    def step(self, n_steps: int = 1, tail: int = 0):
+        """
+        Advance every symbol by n_steps in one vectorized pass. `tail` more steps
+        are folded into the last one: one draw with the variance of tail + 1 steps.
+        """
+        n = len(self.symbols)
+        if n == 0 or n_steps <= 0: return
+        rng = self.rng
+        total = n_steps + tail
+        if self.regime_switch_prob > 0 and rng.random() < 1 - (1 - self.regime_switch_prob) ** total:
+            self.regime = str(rng.choice(list(VOL_REGIMES)))
+
+        sigma = self.annual_vol * VOL_REGIMES.get(self.regime, 1.0) * math.sqrt(self.step_seconds / SECONDS_PER_YEAR)
+        market = rng.standard_normal((n_steps, 1))
+        sector = rng.standard_normal((n_steps, self.n_sectors))[:, self.sector_ids]
+        idio = rng.standard_normal((n_steps, n))
+        shocks = sigma * (self.beta * market + self.sector_loading * sector + self.idio_scale * idio) / 1.6
+        if tail: shocks[-1] *= math.sqrt(tail + 1)
+
+        path = self.price * np.exp(np.cumsum(shocks, axis=0))
+        self.day_high = np.maximum(self.day_high, path.max(axis=0))
+        self.day_low = np.minimum(self.day_low, path.min(axis=0))
+        activity = 1 + 50 * np.abs(shocks).sum(axis=0)
+        self.volume += self.base_volume * total * activity * rng.lognormal(0, 0.3, n)
+        self.price = path[-1]
+
+    def _advance(self):
+        now = self.clock()
+        n_steps = int((now - self.last_step) / self.step_seconds)
+        if n_steps > 0:
+            # Cap catch-up after long idle gaps; the tail is collapsed into one step
+            self.step(min(n_steps, 300), max(0, n_steps - 300))
+            self.last_step += n_steps * self.step_seconds
+
+    def _inject_faults(self) -> bool:
+        """Simulated latency and Dhan-style failures. Returns False if the call fails."""
+        # Draws share self.rng with the price steps, so they take the lock (CompositeFeed calls from a pool)
+        with self.lock:
+            delay = self.latency_ms
+            if self.latency_jitter_ms: delay += self.latency_jitter_ms * self.rng.exponential()
+            auth_error = bool(self.auth_error_rate) and self.rng.random() < self.auth_error_rate
+            error = bool(self.error_rate) and self.rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay / 1000)
+        if self.auth_failed:
+            return False
+        if auth_error:
+            self.auth_failed = True
+            self.last_error = "808"
+            metrics.counter("ag_broker_errors_total", broker="synthetic", code="808").inc()
+            print("🚨 [SYNTHETIC] Injected AUTH FAILURE (808). Feed dark until reset_auth().")
+            return False
+        if error:
+            self.last_error = "805"
+            metrics.counter("ag_broker_errors_total", broker="synthetic", code="805").inc()
+            return False
+        return True
+
+    def _rows(self, symbols: List[str]) -> np.ndarray:
+        key = tuple(symbols)
+        rows = self.chunk_index.get(key)
+        if rows is None:
+            rows = np.array([self.index.get(s, -1) for s in symbols], dtype=np.int64)
+            if len(self.chunk_index) > 1000: self.chunk_index.clear()
+            self.chunk_index[key] = rows
+        return rows
+
+    def get_market_data(self, symbol: str, interval: str) -> Optional[Dict]:
+        return self.get_market_data_batch([symbol]).get(symbol)
+
+    def get_market_data_batch(self, symbols: List[str]) -> Dict[str, Dict]:
+        if not self._inject_faults():
+            return {}
+        rows = self._rows(symbols)
+        with self.lock:
+            self._advance()
+            valid = rows >= 0
+            idx = rows[valid]
+            cols = zip(self.day_open[idx].tolist(), self.day_high[idx].tolist(), self.day_low[idx].tolist(),
+                       self.price[idx].tolist(), self.volume[idx].tolist())
+        names = [s for s, ok in zip(symbols, valid.tolist()) if ok]
+        return {
+            s: {"open": o, "high": h, "low": l, "close": c, "volume": v}
+            for s, (o, h, l, c, v) in zip(names, cols)
+        }
+
+    def get_history_batch(self, symbols: List[str], days: int = 60) -> Dict[str, Dict[str, List[float]]]:
+        """
+        Seeded daily bars ending at today's open (oldest first), drawn with the same
+        beta/sector structure as the live steps. Deterministic per seed.
+        """
+        rows = self._rows(symbols)
+        valid = rows >= 0
+        idx = rows[valid]
+        if not len(idx) or days <= 0: return {}
+        rng = np.random.default_rng(self.seed + 1)
+        n = len(self.symbols)
+        sigma = self.annual_vol * VOL_REGIMES.get(self.regime, 1.0) / math.sqrt(252)
+        market = rng.standard_normal((days, 1))
+        sector = rng.standard_normal((days, self.n_sectors))[:, self.sector_ids]
+        rets = sigma * (self.beta * market + self.sector_loading * sector
+                        + self.idio_scale * rng.standard_normal((days, n))) / 1.6
+        wick = np.abs(rng.standard_normal((2, days, n))) * sigma * 0.5
+        with self.lock:
+            last_close = self.day_open.copy()
+        # Walk back from today's open: close[d] = last_close * exp(-sum of later returns)
+        later = np.cumsum(rets[::-1], axis=0)[::-1] - rets
+        close = last_close * np.exp(-later)
+        open_ = np.vstack([close[:1] * np.exp(-rets[:1]), close[:-1]])
+        high = np.maximum(open_, close) * (1 + wick[0])
+        low = np.minimum(open_, close) * (1 - wick[1])
+        volume = self.base_volume * 375 * rng.lognormal(0, 0.3, (days, n)) # ~375 one-minute steps a day
+
+        cols = [a[:, idx].T.tolist() for a in (open_, high, low, close, volume)]
+        names = [s for s, ok in zip(symbols, valid.tolist()) if ok]
+        return {
+            s: {"open": o, "high": h, "low": l, "close": c, "volume": v}
+            for s, o, h, l, c, v in zip(names, *cols)
+        }
+
+    def snapshot_arrays(self) -> Dict[str, np.ndarray]:
+        """Whole-universe snapshot as arrays (row order = self.symbols)."""
+        with self.lock:
+            self._advance()
+            return {
+                "open": self.day_open.copy(), "high": self.day_high.copy(), "low": self.day_low.copy(),
+                "close": self.price.copy(), "volume": self.volume.copy()
+            }
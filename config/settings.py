@@ -18,11 +18,109 @@ class Settings(BaseSettings):
     PER_TRADE_RISK_PCT: float = 0.5
     
     # Strategy
+    STRATEGIES: str = "mean_reversion"  # Comma separated, see strategies/runtime.py (mean_reversion_rules = compiled/vectorized)
     TARGET_VOL_MULT: float = 1.0
     TARGET_TREND_MULT: float = 0.4
     
     # Broker Config
     DEFAULT_BROKER: str = "ZERODHA"  # Options: ZERODHA, DHAN, MOCK
+    DATA_FEED: str = "MOCK"  # Options: MOCK (yfinance), DHAN, KITE, SYNTHETIC, AUTO (health-routed over FEED_SOURCES)
+    
+    # Composite feed (DATA_FEED=AUTO, see brokers/composite.py)
+    FEED_SOURCES: str = "DHAN,KITE,MOCK"  # Preference order; unconfigured brokers are skipped
+    FEED_HEDGE_BUDGET: float = 0.1  # Max share of chunks re-sent to a second source
+    FEED_HEDGE_MIN_MS: float = 50.0  # Never hedge earlier than this
+    FEED_PROBE_SEC: float = 30.0  # First re-probe of a failed source (backs off up to 10x)
+    FEED_TIMEOUT_SEC: float = 5.0  # Give up on a chunk after this
+    FEED_FAILURE_THRESHOLD: int = 3  # Failures in a row before a source is taken out
+    
+    # Synthetic Feed (offline load testing)
+    SYNTHETIC_SYMBOLS: int = 0  # Pad universe with SYNxxxxx names up to this count
+    SYNTHETIC_SEED: int = 42
+    SYNTHETIC_REGIME_SWITCH_PROB: float = 0.0  # Per step
+    SYNTHETIC_LATENCY_MS: float = 0.0
+    SYNTHETIC_LATENCY_JITTER_MS: float = 0.0
+    SYNTHETIC_ERROR_RATE: float = 0.0  # 805-style failures per call
+    SYNTHETIC_AUTH_ERROR_RATE: float = 0.0  # 808-style failures per call
+    
+    # Quote polling (tiered by proximity/volatility/positions, see core/poll_scheduler.py)
+    POLL_TIERED: bool = False  # Opt in (True = tiered); False = fetch the whole watchlist every loop
+    POLL_HOT_SEC: float = 0.5  # Refresh interval per tier
+    POLL_WARM_SEC: float = 3.0
+    POLL_COLD_SEC: float = 30.0
+    POLL_HOT_BAND: float = 0.02  # Base ranges from a level
+    POLL_WARM_BAND: float = 0.1
+    POLL_VOLATILE_MOVE: float = 0.05  # Avg move per fetch (base ranges) that keeps a symbol at least warm
+    POLL_CALLS_PER_SEC: float = 0.0  # Quote request budget; 0 = what the fixed full-pass loop used
+    POLL_PASS_SEC: float = 3.0  # Loop length of the fixed full-pass loop
+    POLL_TICK_SEC: float = 0.25  # Shortest engine loop when polling tiered
+    
+    # Support/Resistance levels (daily history, see core/levels.py)
+    LEVEL_LOOKBACK_DAYS: int = 60
+    LEVEL_SWING_WINDOW: int = 2  # Bars each side that a swing high/low must dominate
+    LEVEL_CLUSTER_TOL: float = 0.25  # Swings within this * base range form one level
+    LEVEL_MIN_TOUCHES: int = 2
+    LEVEL_PROXIMITY_BAND: float = 0.25  # Symbols within this many base ranges of a level are evaluated every cycle
+    LEVEL_RECHECK_CYCLES: int = 10  # The rest every Nth cycle (1 = every symbol every cycle)
+    
+    # Exposure clustering (rolling return correlation, see core/correlation.py)
+    CORR_MAX_SYMBOLS: int = 0  # Opt in: symbols tracked (matrix is this^2 float64, ~32 MB at 2000); 0 disables
+    CORR_WINDOW: int = 120  # Bars in the rolling window
+    CORR_BAR_SEC: float = 60.0
+    CORR_MIN_BARS: int = 30  # No clusters before this many bars
+    CORR_CLUSTER_THRESHOLD: float = 0.8  # Symbols linked by correlation >= this form a cluster
+    CORR_DEDUP: bool = True  # Filter a signal when its cluster already has an exposure on the same side
+    
+    # Regime (TSD counts over daily bars, see core/regime.py)
+    REGIME_MODE: str = "symbol"  # symbol (per-symbol regime) or market (one aggregate for all)
+    REGIME_TREND_METHOD: str = "linreg"  # linreg (20-day slope) or body (close-to-close move)
+    REGIME_PERIOD: int = 20
+    REGIME_TSD_MULT: float = 0.7  # TSD day if |T| > mult * R
+    REGIME_MARKET_BREADTH: float = 0.5  # Share of symbols with a TSD day for a market TSD day
+    
+    # Bars (see core/bars.py)
+    BAR_TIMEFRAMES_MIN: str = "1,5,15"  # Comma separated, minutes
+    BAR_HISTORY: int = 100  # Closed bars kept per symbol and timeframe
+    BAR_SIGNAL_TIMEFRAME_MIN: int = 1  # Candle the strategies see as bar/prior
+    
+    # Journal (SQLite, see core/journal.py)
+    JOURNAL_PATH: str = "ag_journal.db"  # Empty disables journaling
+    JOURNAL_BATCH_SIZE: int = 500  # Max rows per write transaction
+    JOURNAL_FLUSH_SEC: float = 0.2  # How long the writer waits to fill a batch
+    
+    # Session recording for replay (see core/replay.py)
+    RECORD_SESSION_PATH: Optional[str] = None  # e.g. sessions/2024-05-02.jsonl.gz
+    
+    # Engine / API process split (see core/engine_host.py)
+    ENGINE_MODE: str = "thread"  # thread (inside the API), process (API spawns it), external (python -m core.engine_host)
+    ENGINE_STATE_SHM: str = "ag_trader_state"  # Shared-memory segment with the dashboard state
+    ENGINE_STATE_SHM_MB: int = 8
+    ENGINE_CONTROL_ADDRESS: str = "ag_trader_control.sock"  # Unix socket path (created 0600) or host:port
+    ENGINE_CONTROL_KEY: str = ""  # external mode only, private and set for both processes; process mode uses a random key per run
+    
+    # Tracing (Chrome/Perfetto trace files, see core/tracing.py)
+    TRACE_SAMPLE_RATE: float = 0.01  # Share of engine cycles traced in full (every chunk, stage and tick)
+    TRACE_SIGNALS: bool = True  # Trace every signal from its quote chunk to the broker ack
+    TRACE_MAX_EVENTS: int = 200000  # Spans kept in memory (oldest dropped)
+    TRACE_EXPORT_PATH: str = "ag_trace.json"
+    
+    # Sharded Execution (0 = single process)
+    SHARD_WORKERS: int = 0
+    SHARD_CYCLE_SEC: float = 3.0
+    
+    # Order Router
+    ORDER_ROUTER_WORKERS: int = 4
+    ORDER_RATE_LIMIT_PER_SEC: float = 10.0
+    ORDER_BURST: int = 20
+    ORDER_DEDUP_TTL_SEC: int = 3600
+    ORDER_STATUS_POLL_SEC: float = 1.0
+    ORDER_MAX_RECORDS: int = 10000  # Tracked orders kept; the oldest finished ones are dropped past this
+    
+    # Memory bounds (see core/memory.py, /admin/memory)
+    MOCK_QUOTE_CACHE_SEC: float = 60.0  # Yahoo quote reuse window
+    MOCK_QUOTE_CACHE_SIZE: int = 5000  # Tickers cached at most
+    MOCK_MAX_ORDERS: int = 10000  # Paper orders kept; the oldest finished ones are dropped past this
+    MEMORY_MAX_SNAPSHOTS: int = 4  # tracemalloc snapshots kept for diffs
     
     # Credentials (optional for mock, required for live)
     GEMINI_API_KEY: Optional[str] = None
@@ -30,6 +128,7 @@ class Settings(BaseSettings):
     KITE_ACCESS_TOKEN: Optional[str] = None
     DHAN_CLIENT_ID: Optional[str] = None
     DHAN_ACCESS_TOKEN: Optional[str] = None
+    DHAN_SCRIP_MASTER_PATH: Optional[str] = None # api-scrip-master.csv for numeric security ids
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,99 @@
+# NSE trading universe and sector classification used by the symbol registry.
+
+NSE_UNIVERSE = [
+    "ABB","ACC","APLAPOLLO","AUBANK","ADANIENSOL","ADANIENT","ADANIGREEN",
+    "ADANIPORTS","ADANIPOWER","ATGL","ABCAPITAL","ALKEM","AMBUJACEM","APOLLOHOSP",
+    "ASHOKLEY","ASIANPAINT","ASTRAL","AUROPHARMA","DMART","AXISBANK","BSE",
+    "BAJAJ-AUTO","BAJFINANCE","BAJAJFINSV","BAJAJHLDNG","BAJAJHFL","BANKBARODA",
+    "BANKINDIA","BDL","BEL","BHARATFORG","BHEL","BPCL","BHARTIARTL","BHARTIHEXA",
+    "BIOCON","BLUESTARCO","BOSCHLTD","BRITANNIA","CGPOWER","CANBK","CHOLAFIN",
+    "CIPLA","COALINDIA","COCHINSHIP","COFORGE","COLPAL","CONCOR","COROMANDEL",
+    "CUMMINSIND","DLF","DABUR","DIVISLAB","DIXON","DRREDDY",
+    "EICHERMOT","ETERNAL","EXIDEIND","NYKAA","FEDERALBNK","FORTIS","GAIL",
+    "GMRAIRPORT","GLENMARK","GODFRYPHLP","GODREJCP","GODREJPROP","GRASIM","HCLTECH",
+    "HDFCAMC","HDFCBANK","HDFCLIFE","HAVELLS","HEROMOTOCO","HINDALCO","HAL",
+    "HINDPETRO","HINDUNILVR","HINDZINC","POWERINDIA","HUDCO","HYUNDAI","ICICIBANK",
+    "ICICIGI","IDFCFIRSTB","IRB","ITC","INDIANB","INDHOTEL","IOC","IRCTC","IRFC",
+    "IREDA","IGL","INDUSTOWER","INDUSINDBK","NAUKRI","INFY","INDIGO","JSWENERGY",
+    "JSWSTEEL","JINDALSTEL","JIOFIN","JUBLFOOD","KEI","KPITTECH","KALYANKJIL",
+    "KOTAKBANK","LTF","LICHSGFIN","LTIM","LT","LICI","LODHA","LUPIN","MRF",
+    "M&MFIN","M&M","MANKIND","MARICO","MARUTI","MFSL","MAXHEALTH","MAZDOCK",
+    "MOTILALOFS","MPHASIS","MUTHOOTFIN","NHPC","NMDC","NTPC","NATIONALUM",
+    "NESTLEIND","OBEROIRLTY","ONGC","OIL","PAYTM","OFSS","POLICYBZR","PIIND",
+    "PAGEIND","PATANJALI","PERSISTENT","PHOENIXLTD","PIDILITIND","POLYCAB",
+    "PFC","POWERGRID","PREMIERENE","PRESTIGE","PNB","RECLTD","RVNL","RELIANCE",
+    "SBICARD","SBILIFE","SRF","MOTHERSON","SHREECEM","SHRIRAMFIN","ENRIN",
+    "SIEMENS","SOLARINDS","SONACOMS","SBIN","SAIL","SUNPHARMA","SUPREMEIND",
+    "SUZLON","SWIGGY","TVSMOTOR","TATACOMM","TCS","TATACONSUM","TATAELXSI",
+    "TMPV","TATAPOWER","TATASTEEL","TATATECH","TECHM","TITAN","TORNTPHARM",
+    "TORNTPOWER","TRENT","TIINDIA","UPL","ULTRACEMCO","UNIONBANK","UNITDSPR",
+    "VBL","VEDL","VMM","IDEA","VOLTAS","WAAREEENER","WIPRO","YESBANK","ZYDUSLIFE"
+]
+
+SECTOR_MEMBERS = {
+    "BANKS": [
+        "AUBANK","AXISBANK","BANKBARODA","BANKINDIA","CANBK","FEDERALBNK","HDFCBANK",
+        "ICICIBANK","IDFCFIRSTB","INDIANB","INDUSINDBK","KOTAKBANK","PNB","SBIN",
+        "UNIONBANK","YESBANK"
+    ],
+    "FINANCIAL_SERVICES": [
+        "ABCAPITAL","BSE","BAJFINANCE","BAJAJFINSV","BAJAJHLDNG","BAJAJHFL","CHOLAFIN",
+        "HDFCAMC","HDFCLIFE","HUDCO","ICICIGI","IRFC","IREDA","JIOFIN","LTF","LICHSGFIN",
+        "LICI","M&MFIN","MFSL","MOTILALOFS","MUTHOOTFIN","PAYTM","POLICYBZR","PFC",
+        "RECLTD","SBICARD","SBILIFE","SHRIRAMFIN"
+    ],
+    "IT": [
+        "COFORGE","HCLTECH","INFY","KPITTECH","LTIM","MPHASIS","OFSS","PERSISTENT",
+        "TCS","TATAELXSI","TATATECH","TECHM","WIPRO"
+    ],
+    "CONSUMER_SERVICES": [
+        "DMART","ETERNAL","NYKAA","INDHOTEL","IRCTC","JUBLFOOD","NAUKRI","INDIGO",
+        "SWIGGY","TRENT","VMM"
+    ],
+    "AUTO": [
+        "ASHOKLEY","BAJAJ-AUTO","BHARATFORG","BOSCHLTD","EICHERMOT","EXIDEIND",
+        "HEROMOTOCO","HYUNDAI","M&M","MARUTI","MOTHERSON","MRF","SONACOMS","TVSMOTOR",
+        "TMPV","TIINDIA"
+    ],
+    "HEALTHCARE": [
+        "ALKEM","APOLLOHOSP","AUROPHARMA","BIOCON","CIPLA","DIVISLAB","DRREDDY","FORTIS",
+        "GLENMARK","LUPIN","MANKIND","MAXHEALTH","SUNPHARMA","TORNTPHARM","ZYDUSLIFE"
+    ],
+    "OIL_GAS": [
+        "ATGL","BPCL","GAIL","HINDPETRO","IOC","IGL","ONGC","OIL","RELIANCE"
+    ],
+    "POWER": [
+        "ADANIENSOL","ADANIGREEN","ADANIPOWER","JSWENERGY","NHPC","NTPC","POWERGRID",
+        "PREMIERENE","SUZLON","TATAPOWER","TORNTPOWER","WAAREEENER"
+    ],
+    "METALS": [
+        "APLAPOLLO","COALINDIA","HINDALCO","HINDZINC","JSWSTEEL","JINDALSTEL","NMDC",
+        "NATIONALUM","SAIL","TATASTEEL","VEDL"
+    ],
+    "CAPITAL_GOODS": [
+        "ABB","ASTRAL","BDL","BEL","BHEL","CGPOWER","COCHINSHIP","CUMMINSIND","ENRIN",
+        "HAL","KEI","MAZDOCK","POLYCAB","POWERINDIA","SIEMENS","SUPREMEIND"
+    ],
+    "INFRASTRUCTURE": [
+        "ADANIENT","ADANIPORTS","CONCOR","GMRAIRPORT","IRB","LT","RVNL"
+    ],
+    "MATERIALS": [
+        "ACC","AMBUJACEM","COROMANDEL","GRASIM","PIIND","PIDILITIND","SHREECEM",
+        "SOLARINDS","SRF","ULTRACEMCO","UPL"
+    ],
+    "FMCG": [
+        "BRITANNIA","COLPAL","DABUR","GODFRYPHLP","GODREJCP","HINDUNILVR","ITC","MARICO",
+        "NESTLEIND","PATANJALI","TATACONSUM","UNITDSPR","VBL"
+    ],
+    "CONSUMER_DURABLES": [
+        "ASIANPAINT","BLUESTARCO","DIXON","HAVELLS","KALYANKJIL","PAGEIND","TITAN","VOLTAS"
+    ],
+    "REALTY": [
+        "DLF","GODREJPROP","LODHA","OBEROIRLTY","PHOENIXLTD","PRESTIGE"
+    ],
+    "TELECOM": [
+        "BHARTIARTL","BHARTIHEXA","IDEA","INDUSTOWER","TATACOMM"
+    ],
+}
+
+SECTORS = {symbol: sector for sector, members in SECTOR_MEMBERS.items() for symbol in members}
@@ -0,0 +1,135 @@
+import threading
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+FIELDS = ("open", "high", "low", "close", "volume")
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+
+class BarSeries:
+    """
+    Closed bars of one timeframe for every symbol id, in a mirrored ring: each
+    bar is written at pos and pos + capacity, so the newest `capacity` bars are
+    always one contiguous slice and view() never copies. float32 keeps a row of
+    100 bars at ~4 KB per symbol.
+    """
+    def __init__(self, seconds: int, capacity: int, n_symbols: int = 0):
+        self.seconds = seconds
+        self.capacity = capacity
+        self.size = 0
+        self.buf = np.zeros((0, 2 * capacity, len(FIELDS)), dtype=np.float32)
+        self.count = np.zeros(0, dtype=np.int64) # bars closed so far
+        # Forming bar per symbol
+        self.bucket = np.zeros(0, dtype=np.int64) # -1 = none yet
+        self.forming = np.zeros((0, len(FIELDS)))
+        self.start_volume = np.zeros(0) # cumulative day volume when the bar opened
+        self._ensure(max(n_symbols, 1))
+
+    def _ensure(self, n: int):
+        if n <= self.size: return
+        size = max(n, self.size * 2, 16)
+        grow = size - self.size
+        self.buf = np.concatenate([self.buf, np.zeros((grow, 2 * self.capacity, len(FIELDS)), dtype=np.float32)])
+        self.count = np.concatenate([self.count, np.zeros(grow, dtype=np.int64)])
+        self.bucket = np.concatenate([self.bucket, np.full(grow, -1, dtype=np.int64)])
+        self.forming = np.concatenate([self.forming, np.full((grow, len(FIELDS)), np.nan)])
+        self.start_volume = np.concatenate([self.start_volume, np.zeros(grow)])
+        self.size = size
+
+    def update(self, idx: np.ndarray, price: np.ndarray, cum_volume: np.ndarray, last_volume: np.ndarray, ts: float):
+        """Fold one snapshot into the forming bars; bars whose bucket ended are closed first."""
+        bucket = int(ts // self.seconds)
+        current = self.bucket[idx]
+        new = current != bucket
+        closing = idx[new & (current >= 0)]
+        if closing.size:
+            self._push(closing, self.forming[closing])
+
+        if new.any():
+            rows = idx[new]
+            self.bucket[rows] = bucket
+            self.forming[rows, OPEN] = self.forming[rows, HIGH] = self.forming[rows, LOW] = price[new]
+            # Volume traded since the previous poll belongs to the new bar
+            prev = last_volume[new]
+            self.start_volume[rows] = np.where(np.isnan(prev), cum_volume[new], prev)
+
+        # Cumulative volume going backwards means the session restarted
+        reset = cum_volume < self.start_volume[idx]
+        if reset.any(): self.start_volume[idx[reset]] = 0.0
+        self.forming[idx, HIGH] = np.fmax(self.forming[idx, HIGH], price)
+        self.forming[idx, LOW] = np.fmin(self.forming[idx, LOW], price)
+        self.forming[idx, CLOSE] = price
+        self.forming[idx, VOLUME] = cum_volume - self.start_volume[idx]
+
+    def _push(self, rows: np.ndarray, bars: np.ndarray):
+        pos = self.count[rows] % self.capacity
+        self.buf[rows, pos] = bars
+        self.buf[rows, pos + self.capacity] = bars
+        self.count[rows] += 1
+
+    def view(self, sid: int, n: Optional[int] = None) -> np.ndarray:
+        """Last n closed bars (oldest first) as a read-only [k, OHLCV] view into the ring."""
+        if sid >= self.size: return self.buf[0, :0]
+        c = int(self.count[sid])
+        k = min(n or self.capacity, c, self.capacity)
+        end = (c - 1) % self.capacity + self.capacity + 1 if c else 0
+        v = self.buf[sid, end - k:end]
+        v.flags.writeable = False
+        return v
+
+    def closed(self, sid: int) -> int:
+        return int(self.count[sid]) if sid < self.size else 0
+
+class BarBuilder:
+    """
+    Aggregates polled/streamed snapshots into OHLCV bars for several timeframes
+    (1/5/15 minutes by default). Quotes carry the cumulative day volume, so a
+    bar's volume is the difference over the bar. Symbols with no quote during a
+    bucket simply get no bar for it (no synthetic flat bars).
+
+    Memory is bounded: timeframes x symbols x 2 x capacity x 5 float32.
+    """
+    def __init__(self, timeframes: Sequence[int] = (60, 300, 900), capacity: int = 100, n_symbols: int = 0):
+        self.lock = threading.Lock()
+        self.series: Dict[int, BarSeries] = {tf: BarSeries(tf, capacity, n_symbols) for tf in timeframes}
+        self.last_volume = np.full(max(n_symbols, 16), np.nan)
+
+    def update_quotes(self, sids: Sequence[int], quotes: Iterable[Dict], ts: float):
+        """One cycle of quotes (same order as sids) into every timeframe, vectorized."""
+        rows = [(sid, q['close'], q.get('volume', 0.0)) for sid, q in zip(sids, quotes) if 'close' in q]
+        if not rows: return
+        idx = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        price = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+        volume = np.fromiter((r[2] or 0.0 for r in rows), dtype=np.float64, count=len(rows))
+        self.update(idx, price, volume, ts)
+
+    def update(self, idx: np.ndarray, price: np.ndarray, cum_volume: np.ndarray, ts: float):
+        with self.lock:
+            n = int(idx.max()) + 1
+            if n > len(self.last_volume):
+                self.last_volume = np.concatenate([self.last_volume, np.full(max(n, 2 * len(self.last_volume)) - len(self.last_volume), np.nan)])
+            last = self.last_volume[idx]
+            for series in self.series.values():
+                series._ensure(n)
+                series.update(idx, price, cum_volume, last, ts)
+            self.last_volume[idx] = cum_volume
+
+    def view(self, sid: int, timeframe: int = 60, n: Optional[int] = None) -> np.ndarray:
+        """Zero-copy [k, OHLCV] view of the last n closed bars (oldest first)."""
+        return self.series[timeframe].view(sid, n)
+
+    def closed(self, sid: int, timeframe: int = 60) -> int:
+        """Number of bars closed so far; changes exactly when a new bar closes (a bar key)."""
+        return self.series[timeframe].closed(sid)
+
+    def prior(self, sid: int, timeframe: int = 60) -> Optional[Dict[str, float]]:
+        """Last closed bar as a candle dict, or None before the first bar closes."""
+        v = self.series[timeframe].view(sid, 1)
+        if not len(v): return None
+        return dict(zip(FIELDS, v[0].tolist()))
+
+    def current(self, sid: int, timeframe: int = 60) -> Optional[Dict[str, float]]:
+        """The still-forming bar as a candle dict, or None if the symbol has no quote yet."""
+        series = self.series[timeframe]
+        if sid >= series.size or series.bucket[sid] < 0: return None
+        return dict(zip(FIELDS, series.forming[sid].tolist()))
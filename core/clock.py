@@ -0,0 +1,47 @@
+import datetime
+import time
+
+class WallClock:
+    """Real time. The engine reads time only through its clock, so replay can swap in SimClock."""
+    def time(self) -> float:
+        return time.time()
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.now()
+
+    def today(self) -> datetime.date:
+        return datetime.date.today()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+class SimClock(WallClock):
+    """
+    Simulated time for replaying recorded sessions. speed=0 jumps straight to
+    each new timestamp (as fast as the CPU allows); speed=k paces the replay at
+    k x real time, measured from the first advance so processing time counts.
+    """
+    def __init__(self, start: float, speed: float = 0.0):
+        self.t = start
+        self.speed = speed
+        self.anchor = None # (sim time, real time) when pacing started
+
+    def time(self) -> float:
+        return self.t
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.t)
+
+    def today(self) -> datetime.date:
+        return self.now().date()
+
+    def advance_to(self, t: float):
+        if t <= self.t: return
+        if self.speed > 0:
+            if self.anchor is None: self.anchor = (self.t, time.perf_counter())
+            wait = self.anchor[1] + (t - self.anchor[0]) / self.speed - time.perf_counter()
+            if wait > 0: time.sleep(wait)
+        self.t = t
+
+    def sleep(self, seconds: float):
+        self.advance_to(self.t + seconds)
@@ -0,0 +1,240 @@
+import math
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+class RollingCorrelation:
+    """
+    Rolling covariance/correlation of per-bar log returns across the universe,
+    so correlated signals (several PSU banks touching support together) can be
+    recognized as one bet.
+
+    Prices go in every cycle (O(changed symbols)); each time a bar of bar_sec
+    ends, the universe's returns over it become one row of a ring of `window`
+    rows. The sums behind the covariance (sum r, sum r r^T) are kept up to date
+    with rank-k updates (rows in minus rows out, one GEMM) when a query needs
+    them, instead of recomputing over the window; every `window` bars they are
+    rebuilt from the ring so float error cannot accumulate. A symbol with no
+    new quote in a bar has a zero return for it.
+
+    Symbols get a column on their first price, up to max_symbols (the sum
+    matrix is max_symbols^2 float64; symbols beyond that are not tracked).
+    Clusters are connected components of the graph corr >= threshold,
+    computed once per new bar on first use.
+    """
+    def __init__(self, window: int = 120, bar_sec: float = 60.0, max_symbols: int = 2000,
+                 min_bars: int = 30, threshold: float = 0.8, capacity: int = 0):
+        self.window = window
+        self.bar_sec = bar_sec
+        self.max_symbols = max_symbols
+        self.min_bars = min_bars
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.col_of = np.full(max(capacity, 16), -1, dtype=np.intp) # sid -> column
+        self.sids = np.empty(0, dtype=np.intp) # column -> sid
+        self.size = 0
+        self.price = np.empty(0) # last price per column
+        self.prev_close = np.empty(0) # price at the end of the previous bar
+        self.ring = np.zeros((window, 0)) # [bar slot, column] returns
+        self.bars = 0 # bars closed so far
+        self.bucket: Optional[int] = None
+        self.sum = np.zeros(0)
+        self.sum_sq = np.zeros((0, 0))
+        self.applied = 0 # bars folded into sum/sum_sq
+        self.outgoing: List[np.ndarray] = [] # rows overwritten in the ring but still in the sums
+        self._clusters = ((-1, 0), np.empty(0, dtype=np.intp)) # ((bars, size), label per column)
+        self._by_sid = ((-1, 0), np.empty(0, dtype=np.intp)) # ((bars, size), label per symbol id)
+
+    @classmethod
+    def from_config(cls, config, capacity: int = 0) -> "RollingCorrelation":
+        return cls(window=config.CORR_WINDOW, bar_sec=config.CORR_BAR_SEC, max_symbols=config.CORR_MAX_SYMBOLS,
+                   min_bars=config.CORR_MIN_BARS, threshold=config.CORR_CLUSTER_THRESHOLD, capacity=capacity)
+
+    def _columns(self, sids: np.ndarray) -> np.ndarray:
+        """Columns for sids, adding new ones while there is room (-1 = not tracked)."""
+        if len(sids) and sids.max() >= len(self.col_of):
+            grow = max(int(sids.max()) + 1, 2 * len(self.col_of)) - len(self.col_of)
+            self.col_of = np.concatenate([self.col_of, np.full(grow, -1, dtype=np.intp)])
+        cols = self.col_of[sids]
+        new = np.unique(sids[cols < 0])[:self.max_symbols - self.size]
+        if len(new):
+            n, size = len(new), self.size + len(new)
+            self.col_of[new] = np.arange(self.size, size)
+            self.sids = np.concatenate([self.sids, new])
+            self.price = np.concatenate([self.price, np.full(n, np.nan)])
+            self.prev_close = np.concatenate([self.prev_close, np.full(n, np.nan)])
+            self.ring = np.concatenate([self.ring, np.zeros((self.window, n))], axis=1)
+            self.sum = np.concatenate([self.sum, np.zeros(n)])
+            sum_sq = np.zeros((size, size))
+            sum_sq[:self.size, :self.size] = self.sum_sq
+            self.sum_sq = sum_sq
+            self.outgoing = [np.concatenate([row, np.zeros(n)]) for row in self.outgoing]
+            self.size = size
+            cols = self.col_of[sids]
+        return cols
+
+    def update(self, sids: Sequence[int], prices: Sequence[float], ts: float):
+        """Latest prices (same order as sids); closes the running bar first if ts is past it."""
+        idx = np.asarray(sids, dtype=np.intp)
+        price = np.asarray(prices, dtype=float)
+        bucket = int(ts // self.bar_sec)
+        with self.lock:
+            if self.bucket is not None and bucket > self.bucket: self._close_bar()
+            self.bucket = bucket
+            if not len(idx): return
+            cols = self._columns(idx)
+            keep = (cols >= 0) & np.isfinite(price) & (price > 0)
+            self.price[cols[keep]] = price[keep]
+
+    def _close_bar(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = np.log(self.price / self.prev_close)
+        r[~np.isfinite(r)] = 0.0
+        self.prev_close = self.price.copy()
+        slot = self.bars % self.window
+        if self.bars >= self.window:
+            if len(self.outgoing) < self.window: self.outgoing.append(self.ring[slot].copy())
+            else: self.applied = -1 # too far behind: rebuild from the ring on the next query
+        self.ring[slot] = r
+        self.bars += 1
+
+    def _sync(self):
+        """Bring sum/sum_sq up to the latest bar (caller holds the lock)."""
+        if self.applied == self.bars: return
+        fresh = self.bars - self.applied
+        if self.applied < 0 or fresh > self.window or self.bars // self.window != self.applied // self.window:
+            rows = self.ring[:min(self.bars, self.window)]
+            self.sum = rows.sum(axis=0)
+            self.sum_sq = rows.T @ rows
+        else:
+            slots = np.arange(self.applied, self.bars) % self.window
+            added = self.ring[slots]
+            removed = np.array(self.outgoing).reshape(-1, self.size)
+            # One rank-k GEMM: rows in with weight +1, rows out with -1
+            rows = np.concatenate([added, removed])
+            sign = np.concatenate([np.ones(len(added)), -np.ones(len(removed))])
+            self.sum += sign @ rows
+            self.sum_sq += (rows.T * sign) @ rows
+        self.outgoing = []
+        self.applied = self.bars
+
+    def _covariance(self, cols: np.ndarray) -> np.ndarray:
+        """Covariance block of per-bar returns for these columns (caller holds the lock, after _sync)."""
+        n = min(self.bars, self.window)
+        mean = self.sum[cols] / n
+        return (self.sum_sq[np.ix_(cols, cols)] - n * np.outer(mean, mean)) / (n - 1)
+
+    def ready(self) -> bool:
+        return min(self.bars, self.window) >= max(self.min_bars, 2)
+
+    def correlation(self, sid_a: int, sid_b: int) -> float:
+        """Rolling correlation of two symbols' returns (NaN if either is untracked or there is too little data)."""
+        with self.lock:
+            cols = self._tracked([sid_a, sid_b])
+            if not self.ready() or (cols < 0).any(): return float("nan")
+            self._sync()
+            cov = self._covariance(cols)
+        denom = math.sqrt(cov[0, 0] * cov[1, 1])
+        return float(cov[0, 1] / denom) if denom > 0 else float("nan")
+
+    def _tracked(self, sids: Sequence[int]) -> np.ndarray:
+        idx = np.asarray(sids, dtype=np.intp)
+        cols = np.full(len(idx), -1, dtype=np.intp)
+        known = idx < len(self.col_of)
+        cols[known] = self.col_of[idx[known]]
+        return cols
+
+    def _labels(self) -> np.ndarray:
+        """Cluster label per column (-1 = no correlated peer), recomputed once per bar."""
+        if self._clusters[0] == (self.bars, self.size): return self._clusters[1]
+        self._sync()
+        n = min(self.bars, self.window)
+        mean = self.sum / n
+        sd = np.sqrt(np.clip(np.diag(self.sum_sq) - n * mean * mean, 0.0, None)) # x sqrt(n - 1), cancels below
+        limit = self.threshold * sd
+        # corr >= threshold  <=>  cov >= threshold * sd_i * sd_j, in row blocks that stay in cache
+        adj = np.empty((self.size, self.size), dtype=bool)
+        for i in range(0, self.size, 128):
+            block = self.sum_sq[i:i + 128] - n * np.outer(mean[i:i + 128], mean)
+            np.greater_equal(block, np.outer(limit[i:i + 128], sd), out=adj[i:i + 128])
+        flat = sd <= 0 # no movement in the window: no correlation
+        adj[flat] = False
+        adj[:, flat] = False
+        np.fill_diagonal(adj, False)
+        labels = np.full(self.size, -1, dtype=np.intp)
+        # Connected components by frontier expansion over the boolean adjacency
+        for i in np.flatnonzero(adj.any(axis=1)).tolist():
+            if labels[i] >= 0: continue
+            members = np.zeros(self.size, dtype=bool)
+            members[i] = True
+            frontier = members.copy()
+            while frontier.any():
+                frontier = adj[frontier].any(axis=0) & ~members
+                members |= frontier
+            labels[members] = i
+        self._clusters = ((self.bars, self.size), labels)
+        return labels
+
+    def cluster(self, sid: int) -> int:
+        """Cluster id of a symbol, or -1 if it has no correlated peer (or too little data yet)."""
+        with self.lock:
+            col = self._tracked([sid])[0]
+            if col < 0 or not self.ready(): return -1
+            return int(self._labels()[col])
+
+    def clusters(self, sids: Sequence[int]) -> np.ndarray:
+        """cluster() for many symbols at once."""
+        with self.lock:
+            cols = self._tracked(sids)
+            out = np.full(len(cols), -1, dtype=np.intp)
+            if not self.ready(): return out
+            known = cols >= 0
+            out[known] = self._labels()[cols[known]]
+            return out
+
+    def cluster_labels(self) -> np.ndarray:
+        """
+        Cluster id per symbol id (-1 = none), rebuilt once per bar. A new array
+        replaces the old one rather than being written in place, so callers
+        may keep and index it without holding the lock.
+        """
+        with self.lock:
+            key = (self.bars, self.size) if self.ready() else (-1, self.size)
+            if self._by_sid[0] != key:
+                out = np.full(len(self.col_of), -1, dtype=np.intp)
+                if self.ready():
+                    tracked = self.col_of >= 0
+                    out[tracked] = self._labels()[self.col_of[tracked]]
+                self._by_sid = (key, out)
+            return self._by_sid[1]
+
+    def members(self, sid: int) -> List[int]:
+        """Symbol ids in the same cluster (including sid), or [] if it has none."""
+        with self.lock:
+            col = self._tracked([sid])[0]
+            if col < 0 or not self.ready(): return []
+            labels = self._labels()
+            if labels[col] < 0: return []
+            return self.sids[labels == labels[col]].tolist()
+
+    def portfolio_variance(self, sids: Sequence[int], weights: Sequence[float]) -> float:
+        """
+        Per-bar return variance of a book with these weights (e.g. signed
+        notional: LONG +, SHORT -). Untracked symbols are left out.
+        """
+        with self.lock:
+            cols = self._tracked(sids)
+            w = np.asarray(weights, dtype=float)
+            known = cols >= 0
+            if not self.ready() or not known.any(): return float("nan")
+            self._sync()
+            cols, w = cols[known], w[known]
+            return float(w @ self._covariance(cols) @ w)
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            labels = self._labels() if self.ready() else np.full(self.size, -1)
+            clustered = labels[labels >= 0]
+            return {"symbols": self.size, "bars": self.bars, "clusters": int(len(np.unique(clustered))),
+                    "clustered_symbols": int(len(clustered))}
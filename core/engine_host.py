@@ -0,0 +1,187 @@
+"""
+Runs the TradingEngine in its own process, next to (not inside) the API.
+
+The engine publishes a JSON snapshot of the dashboard state into shared
+memory on every dashboard update (core/state_channel.py), and takes control
+commands (killswitch, paper toggle, capital, history/metrics/memory queries,
+trace export) over a local multiprocessing.connection socket. The API process
+only copies bytes out of the segment, so neither process's GIL is shared with
+the other.
+
+The control channel unpickles what it receives, so it is locked down: a Unix
+socket readable by the owner only (unless a host:port is configured), and an
+authkey that is random per run when the API spawns the engine, or a private
+ENGINE_CONTROL_KEY shared by both sides for an external engine.
+
+    python -m core.engine_host      # engine for an API started with ENGINE_MODE=external
+"""
+import json
+import os
+import secrets
+import stat
+import threading
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import config
+
+def parse_address(address: str):
+    """"host:port" -> TCP tuple, anything else is a Unix socket path."""
+    host, sep, port = address.rpartition(":")
+    return (host, int(port)) if sep and port.isdigit() else address
+
+SHIPPED_KEY = "ag-trader-local" # the key older releases defaulted to; public, so never accepted
+
+def new_authkey() -> bytes:
+    """Per-run key for an engine the API spawns itself (handed over as a process argument)."""
+    return secrets.token_bytes(32)
+
+def configured_authkey() -> bytes:
+    """ENGINE_CONTROL_KEY for an external engine; refuses to run without a private one."""
+    key = config.ENGINE_CONTROL_KEY
+    if not key or key == SHIPPED_KEY:
+        raise RuntimeError("[CONTROL] ENGINE_MODE=external needs a private ENGINE_CONTROL_KEY in both processes "
+                           "(e.g. python -c \"import secrets; print(secrets.token_hex(32))\").")
+    return key.encode()
+
+def handle_command(engine, cmd: str, args: Dict[str, Any]) -> Any:
+    """Control commands shared by the in-process (thread) and out-of-process API modes."""
+    if cmd == "killswitch":
+        engine.kill_switch = not engine.kill_switch
+        engine.update_dashboard(force=True)
+        return {"status": "STOPPED" if engine.kill_switch else "ARMED"}
+    if cmd == "toggle_paper":
+        engine.toggle_paper_mode(args.get("enabled", True))
+        return {"status": "success", "paper_mode": engine.paper_mode}
+    if cmd == "set_capital":
+        engine.set_initial_capital(float(args.get("amount", 100000.0)))
+        return {"status": "success", "capital": engine.initial_capital}
+    if cmd == "metrics":
+        from core.metrics import metrics
+        return metrics.render()
+    if cmd == "history_equity":
+        from core.history import history
+        return history.equity.query(args.get("start"), args.get("end"), args.get("points", 1000))
+    if cmd == "history_events":
+        from core.history import history
+        return history.events[args["kind"]].query(args.get("start"), args.get("end"), args.get("symbol"),
+                                                  args.get("cursor"), args.get("limit", 100))
+    if cmd == "trace":
+        from core.tracing import tracer
+        action = args.get("action", "status")
+        if action == "dump": return tracer.export()
+        if action == "export":
+            tracer.export(config.TRACE_EXPORT_PATH) # fixed path: the API must not choose where the engine writes
+            return {"path": os.path.abspath(config.TRACE_EXPORT_PATH), "events": len(tracer.events)}
+        if action == "clear": tracer.clear()
+        elif action != "status": raise ValueError(f"Unknown trace action '{action}'")
+        return {"events": len(tracer.events), "max_events": tracer.events.maxlen,
+                "sample_rate": tracer.sample_rate, "signals": tracer.signals}
+    if cmd == "memory":
+        from core.memory import memory_report
+        return memory_report(engine)
+    if cmd == "tracemalloc":
+        from core.memory import profiler
+        profiler.max_snapshots = config.MEMORY_MAX_SNAPSHOTS
+        action = args.get("action", "status")
+        if action == "start": return profiler.start(args.get("frames") or 1)
+        if action == "stop": return profiler.stop()
+        if action == "status": return profiler.status()
+        if action == "snapshot": return profiler.snapshot(args.get("label"), args.get("top", 20), args.get("key", "lineno"))
+        if action == "diff": return profiler.diff(args.get("since"), args.get("until"), args.get("top", 20), args.get("key", "lineno"))
+        raise ValueError(f"Unknown tracemalloc action '{action}'")
+    raise ValueError(f"Unknown command '{cmd}'")
+
+class ControlServer:
+    """Serves handle_command over a Listener; one thread per connected client."""
+    def __init__(self, engine, address: str, authkey: bytes):
+        self.engine = engine
+        address = parse_address(address)
+        unix = isinstance(address, str)
+        if unix and os.path.exists(address) and stat.S_ISSOCK(os.stat(address).st_mode):
+            os.unlink(address) # left behind by an engine that did not shut down cleanly
+        self.listener = Listener(address, authkey=authkey)
+        if unix: os.chmod(address, 0o600) # owner only, on top of the authkey
+
+    def start(self):
+        threading.Thread(target=self._accept, name="engine-control", daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except Exception as e:
+                print(f"[CONTROL] Rejected connection: {e}")
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    cmd, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(("ok", handle_command(self.engine, cmd, args)))
+                except Exception as e:
+                    conn.send(("error", f"{type(e).__name__}: {e}"))
+
+class ControlClient:
+    """API side of the control channel; reconnects once if the engine restarted."""
+    def __init__(self, address: str, authkey: bytes):
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self.conn = None
+        self.lock = threading.Lock()
+
+    def call(self, cmd: str, **args) -> Any:
+        with self.lock:
+            for attempt in range(2):
+                try:
+                    if self.conn is None: self.conn = Client(self.address, authkey=self.authkey)
+                    self.conn.send((cmd, args))
+                    status, result = self.conn.recv()
+                    break
+                except (EOFError, OSError):
+                    self.conn = None
+                    if attempt: raise
+        if status == "error": raise RuntimeError(result)
+        return result
+
+class EngineHost:
+    """Wires a TradingEngine to the state segment and the control server."""
+    def __init__(self, engine, shm_name: str, shm_bytes: int, address: str, authkey: bytes):
+        from core.state_channel import StateWriter
+        self.engine = engine
+        self.writer = StateWriter(shm_name, shm_bytes)
+        self.control = ControlServer(engine, address, authkey)
+        self.lock = threading.Lock()
+        engine.on_update = self.publish
+
+    def publish(self, current_symbol: str = "MULTI"):
+        payload = json.dumps(self.engine.dashboard_state(current_symbol), default=str).encode()
+        with self.lock: # commands and the engine loop both trigger updates
+            self.writer.publish(payload)
+
+    def run(self):
+        self.control.start()
+        self.publish()
+        try:
+            self.engine.start()
+        finally:
+            self.writer.close()
+
+def run_engine_process(shm_name: Optional[str] = None, address: Optional[str] = None, authkey: Optional[bytes] = None):
+    """Process entry point (also the multiprocessing target used by ENGINE_MODE=process)."""
+    from main import TradingEngine
+    EngineHost(
+        TradingEngine(),
+        shm_name or config.ENGINE_STATE_SHM,
+        config.ENGINE_STATE_SHM_MB * 1024 * 1024,
+        address or config.ENGINE_CONTROL_ADDRESS,
+        authkey or configured_authkey()
+    ).run()
+
+if __name__ == "__main__":
+    run_engine_process()
@@ -0,0 +1,154 @@
+import bisect
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+EVENT_KINDS = ("orders", "fills", "signals")
+
+class TimeSeries:
+    """
+    Append-only (timestamp, value) series in growable NumPy arrays. Range lookup
+    is a binary search and downsampling is vectorized, so a week of 1-second
+    points is queried without touching Python objects per point.
+    """
+    def __init__(self, max_points: int = 2_000_000):
+        self.max_points = max_points
+        self.lock = threading.Lock()
+        self.ts = np.empty(1024)
+        self.values = np.empty(1024)
+        self.size = 0
+
+    def append(self, ts: float, value: float):
+        with self.lock:
+            if self.size and ts < self.ts[self.size - 1]:
+                ts = self.ts[self.size - 1] # keep the index monotonic across clock jumps
+            if self.size == len(self.ts):
+                if self.size >= self.max_points:
+                    # Drop the oldest half instead of growing past the cap
+                    keep = self.size // 2
+                    self.ts[:keep] = self.ts[self.size - keep:self.size]
+                    self.values[:keep] = self.values[self.size - keep:self.size]
+                    self.size = keep
+                else:
+                    self.ts = np.concatenate([self.ts, np.empty(len(self.ts))])
+                    self.values = np.concatenate([self.values, np.empty(len(self.values))])
+            self.ts[self.size] = ts
+            self.values[self.size] = value
+            self.size += 1
+
+    def __len__(self) -> int:
+        return self.size
+
+    def range(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Copies of the points with start <= ts <= end."""
+        with self.lock:
+            ts = self.ts[:self.size]
+            lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+            hi = self.size if end is None else int(np.searchsorted(ts, end, side="right"))
+            return ts[lo:hi].copy(), self.values[lo:hi].copy()
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None, points: int = 1000) -> Dict[str, Any]:
+        ts, values = self.range(start, end)
+        total = len(ts)
+        if points > 0 and total > points:
+            ts, values = downsample_minmax(ts, values, points)
+        return {"t": ts.tolist(), "v": values.tolist(), "count": total, "downsampled": len(ts) < total}
+
+def downsample_minmax(ts: np.ndarray, values: np.ndarray, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce to at most `points` points by splitting into points/2 equal-count
+    buckets and keeping each bucket's min and max (in time order), so peaks and
+    drawdowns survive the reduction.
+    """
+    size = -(-len(ts) // max(1, points // 2)) # ceil
+    n_buckets = -(-len(ts) // size)
+    grid = np.full(n_buckets * size, np.nan)
+    grid[:len(values)] = values
+    grid = grid.reshape(n_buckets, size)
+    base = np.arange(n_buckets) * size
+    picks = np.unique(np.concatenate([base + np.nanargmin(grid, axis=1), base + np.nanargmax(grid, axis=1)]))
+    return ts[picks], values[picks]
+
+class EventLog:
+    """
+    Append-only event records (dicts with "ts", optionally "symbol") with a
+    time index and a per-symbol index. Every event gets a monotonically
+    increasing sequence number, which doubles as the pagination cursor.
+    """
+    def __init__(self, max_events: int = 200_000):
+        self.max_events = max_events
+        self.lock = threading.Lock()
+        self.events: List[Dict[str, Any]] = []
+        self.ts: List[float] = []
+        self.by_symbol: Dict[str, List[int]] = {} # symbol -> seq numbers
+        self.base_seq = 0 # seq of events[0]
+
+    def append(self, event: Dict[str, Any]) -> int:
+        with self.lock:
+            ts = event.setdefault("ts", time.time())
+            if self.ts and ts < self.ts[-1]:
+                ts = event["ts"] = self.ts[-1]
+            seq = self.base_seq + len(self.events)
+            event["seq"] = seq
+            self.events.append(event)
+            self.ts.append(ts)
+            symbol = event.get("symbol")
+            if symbol: self.by_symbol.setdefault(symbol, []).append(seq)
+            if len(self.events) > self.max_events:
+                self._trim(len(self.events) - self.max_events // 2)
+            return seq
+
+    def _trim(self, drop: int):
+        self.events = self.events[drop:]
+        self.ts = self.ts[drop:]
+        self.base_seq += drop
+        for symbol in list(self.by_symbol):
+            seqs = self.by_symbol[symbol]
+            seqs = seqs[bisect.bisect_left(seqs, self.base_seq):]
+            if seqs: self.by_symbol[symbol] = seqs
+            else: del self.by_symbol[symbol]
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None, symbol: Optional[str] = None,
+              cursor: Optional[int] = None, limit: int = 100) -> Dict[str, Any]:
+        """
+        Events with start <= ts <= end (oldest first), optionally for one symbol.
+        Pass the returned next_cursor back to continue; None means the end.
+        """
+        limit = max(1, min(limit, 5000))
+        with self.lock:
+            lo = self.base_seq if start is None else self.base_seq + bisect.bisect_left(self.ts, start)
+            hi = self.base_seq + (len(self.ts) if end is None else bisect.bisect_right(self.ts, end))
+            if cursor is not None: lo = max(lo, cursor + 1)
+            if symbol is None:
+                seqs = range(lo, min(hi, lo + limit + 1))
+            else:
+                index = self.by_symbol.get(symbol, [])
+                i = bisect.bisect_left(index, lo)
+                seqs = [s for s in index[i:i + limit + 1] if s < hi]
+            page = [self.events[s - self.base_seq] for s in seqs]
+        more = len(page) > limit
+        page = page[:limit]
+        return {"items": page, "next_cursor": page[-1]["seq"] if more else None}
+
+class HistoryStore:
+    """
+    Equity curve plus order/fill/signal events for the history API. In memory
+    only, so it covers the current engine process and starts empty after a
+    restart; the SQLite journal (JOURNAL_PATH) is the durable record.
+    """
+    def __init__(self, max_points: int = 2_000_000, max_events: int = 200_000):
+        self.equity = TimeSeries(max_points)
+        self.events = {kind: EventLog(max_events) for kind in EVENT_KINDS}
+
+    def record_equity(self, equity: float, ts: Optional[float] = None):
+        self.equity.append(time.time() if ts is None else ts, equity)
+
+    def record(self, kind: str, event: Dict[str, Any]) -> int:
+        return self.events[kind].append(event)
+
+history = HistoryStore()
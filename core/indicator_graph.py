@@ -0,0 +1,166 @@
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class IndicatorGraph:
+    """
+    Registry of named indicators with declared dependencies. A node is computed
+    at most once per symbol per evaluation and shared by every strategy that
+    asks for it. Nodes with a key are also kept across evaluations, per symbol,
+    until their key changes: scope="bar" nodes are keyed on the last closed bar,
+    and key=fn(ctx) nodes on whatever their value really depends on (levels on
+    the level engine's revision of the symbol, the regime on the day's counts).
+    A keyed node's key must cover its dependencies too.
+    """
+    def __init__(self):
+        self.nodes: Dict[str, Tuple[Callable, Tuple[str, ...], Optional[Callable]]] = {}
+        self.cache: Dict[int, Dict[str, Tuple[Any, Any]]] = {} # sid -> node -> (key, value)
+        self.lock = threading.Lock()
+
+    def register(self, name: str, fn: Callable[["IndicatorContext"], Any],
+                 deps: Iterable[str] = (), scope: str = "tick", key: Optional[Callable[["IndicatorContext"], Any]] = None):
+        """fn receives the context; deps are resolved (and memoized) before fn runs."""
+        if scope == "bar": key = _bar_key
+        self.nodes[name] = (fn, tuple(deps), key)
+
+    def validate(self, names: Iterable[str]):
+        """Raise if a requested indicator (or a dependency) is unknown or cyclic."""
+        def visit(name: str, path: Tuple[str, ...]):
+            if name in path:
+                raise ValueError(f"Indicator cycle: {' -> '.join(path + (name,))}")
+            if name not in self.nodes:
+                raise KeyError(f"Unknown indicator: {name}")
+            for dep in self.nodes[name][1]:
+                visit(dep, path + (name,))
+        for name in names:
+            visit(name, ())
+
+    def context(self, sid: int, symbol: str, data: Dict, bar_key: Any = None) -> "IndicatorContext":
+        kept = self.cache.get(sid)
+        if kept is None:
+            with self.lock:
+                kept = self.cache.setdefault(sid, {})
+        return IndicatorContext(self, sid, symbol, data, bar_key, kept)
+
+    def invalidate(self, sid: Optional[int] = None):
+        with self.lock:
+            if sid is None: self.cache.clear()
+            else: self.cache.pop(sid, None)
+
+def _bar_key(ctx: "IndicatorContext") -> Any:
+    return ctx.bar_key
+
+class IndicatorContext:
+    """One symbol's view of the graph for one evaluation: ctx['levels'], ctx.data, ..."""
+    __slots__ = ("graph", "sid", "symbol", "data", "bar_key", "values", "kept")
+
+    def __init__(self, graph: IndicatorGraph, sid: int, symbol: str, data: Dict,
+                 bar_key: Any = None, kept: Optional[Dict[str, Tuple[Any, Any]]] = None):
+        self.graph = graph
+        self.sid = sid
+        self.symbol = symbol
+        self.data = data
+        self.bar_key = bar_key
+        self.values: Dict[str, Any] = {}
+        self.kept = kept # this symbol's keyed node values, shared across evaluations
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self.values:
+            return self.values[name]
+        fn, deps, key_fn = self.graph.nodes[name]
+        key = key_fn(self) if key_fn is not None and self.kept is not None else None
+        entry = self.kept.get(name) if key is not None else None
+        if entry is not None and entry[0] == key:
+            value = entry[1]
+        else:
+            for dep in deps:
+                self[dep]
+            value = fn(self)
+            if key is not None: self.kept[name] = (key, value)
+        self.values[name] = value
+        return value
+
+    def require(self, names: Iterable[str]) -> List[Any]:
+        return [self[n] for n in names]
+
+def register_default_indicators(graph: IndicatorGraph, levels_fn: Callable[[int, Dict], Dict],
+                                regime_fn: Callable[[int], str], bars=None, timeframe: int = 60,
+                                levels_key: Optional[Callable[[int], Any]] = None,
+                                regime_key: Optional[Callable[[int], Any]] = None):
+    """
+    Standard nodes: levels (and support/resistance/base_range from them), the
+    tick trend shift, the regime, and the forming/prior candle from a BarBuilder
+    (the raw quote stands in for both until bars exist).
+
+    levels_key / regime_key (sid -> key) change whenever a symbol's levels or
+    regime may have; with them those nodes (and the level fields) are kept
+    across ticks instead of being looked up on every evaluation.
+    """
+    lkey = (lambda ctx: levels_key(ctx.sid)) if levels_key else None
+    graph.register("levels", lambda ctx: levels_fn(ctx.sid, ctx.data), key=lkey)
+    graph.register("support", lambda ctx: ctx['levels']['support'], deps=("levels",), key=lkey)
+    graph.register("resistance", lambda ctx: ctx['levels']['resistance'], deps=("levels",), key=lkey)
+    graph.register("base_range", lambda ctx: ctx['levels']['base_range'], deps=("levels",), key=lkey)
+    # Simplified trend shift for tick-by-tick: its input is the quote itself, so it stays per evaluation
+    graph.register("trend_shift", lambda ctx: ctx.data['close'] - ctx.data.get('open', ctx.data['close']))
+    graph.register("regime", lambda ctx: regime_fn(ctx.sid),
+                   key=(lambda ctx: regime_key(ctx.sid)) if regime_key else None)
+    if bars is None:
+        graph.register("bar", lambda ctx: ctx.data)
+        graph.register("prior", lambda ctx: ctx.data.get('prior', ctx.data))
+        return
+    graph.register("bar", lambda ctx: _candle(bars.current(ctx.sid, timeframe), ctx))
+    graph.register("prior", lambda ctx: bars.prior(ctx.sid, timeframe) or ctx['bar'], deps=("bar",))
+    graph.register("bars", lambda ctx: bars.view(ctx.sid, timeframe), scope="bar")
+
+def _candle(bar: Optional[Dict], ctx: IndicatorContext) -> Dict:
+    if bar is None: return ctx.data
+    bar['symbol'] = ctx.symbol
+    return bar
+
+CANDLE = ("open", "high", "low", "close", "volume")
+
+def universe_columns(fields: Iterable[str], sids: Sequence[int], quotes: Sequence[Dict], levels: Sequence[Dict],
+                     regimes, bars=None, timeframe: int = 60) -> Dict[str, np.ndarray]:
+    """
+    Batch counterpart of the default nodes for strategies compiled to NumPy
+    (strategies/rules.py): one float array per requested field over many
+    symbols. Candle fields come from the forming bar (prior_* from the last
+    closed one), with the same quote fallbacks as the per-symbol nodes.
+    `levels` are the per-row level dicts, `regimes` a RegimeTracker.
+    """
+    fields = set(fields)
+    idx = np.asarray(sids, dtype=np.intp)
+    n = len(idx)
+    cols: Dict[str, np.ndarray] = {}
+    if fields & {"support", "resistance", "base_range"}:
+        for f in ("support", "resistance", "base_range"):
+            cols[f] = np.fromiter((lvl[f] for lvl in levels), dtype=float, count=n)
+    if "trend_shift" in fields:
+        cols["trend_shift"] = np.fromiter((q['close'] - q.get('open', q['close']) for q in quotes), dtype=float, count=n)
+    if "regime" in fields:
+        from core.regime import REGIMES
+        cols["regime"] = REGIMES[regimes.regimes(idx)] if n else np.empty(0, dtype=REGIMES.dtype)
+    if not fields & {*CANDLE, *(f"prior_{f}" for f in CANDLE)}:
+        return cols
+
+    quote = np.array([[q.get(f, np.nan) for f in CANDLE] for q in quotes], dtype=float).reshape(n, len(CANDLE))
+    if bars is None:
+        bar = quote
+        prior = np.array([[q.get('prior', q).get(f, np.nan) for f in CANDLE] for q in quotes],
+                         dtype=float).reshape(n, len(CANDLE))
+    else:
+        series = bars.series[timeframe]
+        inside = idx < series.size
+        rows = np.where(inside, idx, 0)
+        has_bar = inside & (series.bucket[rows] >= 0)
+        bar = np.where(has_bar[:, None], series.forming[rows], quote)
+        count = np.where(inside, series.count[rows], 0)
+        pos = (count - 1) % series.capacity + series.capacity
+        prior = np.where((count > 0)[:, None], series.buf[rows, pos].astype(float), bar)
+    for k, f in enumerate(CANDLE):
+        cols[f] = bar[:, k]
+        cols[f"prior_{f}"] = prior[:, k]
+    return cols
@@ -1,23 +1,27 @@
-import pandas as pd
-import numpy as np
+from typing import TYPE_CHECKING
 
-def calculate_base_range(high: pd.Series, low: pd.Series, period: int = 20) -> pd.Series:
+if TYPE_CHECKING: # pandas/numpy load on first use, not on import
+    import pandas as pd
+
+def calculate_base_range(high: "pd.Series", low: "pd.Series", period: int = 20) -> "pd.Series":
     """
     R = SMA(High - Low, 20 periods)
     """
     return (high - low).rolling(window=period).mean()
 
-def calculate_trend_shift_ema(close: pd.Series, period: int = 200) -> pd.Series:
+def calculate_trend_shift_ema(close: "pd.Series", period: int = 200) -> "pd.Series":
     """
     T = slope of EMA(200)
     """
     ema = close.ewm(span=period, adjust=False).mean()
     return ema.diff()
 
-def calculate_trend_shift_linreg(close: pd.Series, period: int = 20) -> pd.Series:
+def calculate_trend_shift_linreg(close: "pd.Series", period: int = 20) -> "pd.Series":
     """
     T = Linear regression slope of closing prices (20 periods)
     """
+    import numpy as np
+
     def get_slope(y):
         x = np.arange(len(y))
         slope, _ = np.polyfit(x, y, 1)
@@ -0,0 +1,227 @@
+import itertools
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    mode TEXT,
+    data_feed TEXT,
+    capital REAL
+);
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    symbol TEXT NOT NULL,
+    strategy TEXT,
+    side TEXT,
+    price REAL,
+    entry REAL,
+    target REAL,
+    stop_loss REAL,
+    reason TEXT,
+    outcome TEXT,
+    order_key TEXT
+);
+CREATE INDEX IF NOT EXISTS signals_ts ON signals (ts);
+CREATE INDEX IF NOT EXISTS signals_symbol_ts ON signals (symbol, ts);
+CREATE INDEX IF NOT EXISTS signals_order_key ON signals (order_key);
+CREATE TABLE IF NOT EXISTS filter_outcomes (
+    signal_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    filter TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    detail REAL
+);
+CREATE INDEX IF NOT EXISTS filter_outcomes_signal ON filter_outcomes (signal_id);
+CREATE INDEX IF NOT EXISTS filter_outcomes_filter_ts ON filter_outcomes (filter, ts);
+CREATE TABLE IF NOT EXISTS orders (
+    session_id INTEGER NOT NULL,
+    client_order_id TEXT NOT NULL,
+    broker TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT,
+    quantity INTEGER,
+    status TEXT,
+    broker_order_id TEXT,
+    idempotency_key TEXT,
+    error TEXT,
+    PRIMARY KEY (session_id, client_order_id)
+);
+CREATE INDEX IF NOT EXISTS orders_symbol_created ON orders (symbol, created_at);
+CREATE INDEX IF NOT EXISTS orders_created ON orders (created_at);
+CREATE INDEX IF NOT EXISTS orders_key ON orders (idempotency_key);
+CREATE TABLE IF NOT EXISTS fills (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    client_order_id TEXT NOT NULL,
+    broker_order_id TEXT,
+    symbol TEXT NOT NULL,
+    side TEXT,
+    quantity INTEGER,
+    price REAL
+);
+CREATE INDEX IF NOT EXISTS fills_ts ON fills (ts);
+CREATE INDEX IF NOT EXISTS fills_symbol_ts ON fills (symbol, ts);
+"""
+
+# table -> statement for one queued row
+STATEMENTS = {
+    "signals": "INSERT INTO signals (id, session_id, ts, symbol, strategy, side, price, entry, target, stop_loss, reason, outcome, "
+               "order_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    "filter_outcomes": "INSERT INTO filter_outcomes (signal_id, ts, filter, passed, detail) VALUES (?, ?, ?, ?, ?)",
+    # Status updates arrive as the router moves an order along; the latest one wins
+    "orders": "INSERT INTO orders (session_id, client_order_id, broker, created_at, updated_at, symbol, side, quantity, "
+              "status, broker_order_id, idempotency_key, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+              "ON CONFLICT (session_id, client_order_id) DO UPDATE SET updated_at = excluded.updated_at, "
+              "status = excluded.status, broker_order_id = COALESCE(excluded.broker_order_id, broker_order_id), "
+              "error = excluded.error",
+    "fills": "INSERT INTO fills (session_id, ts, client_order_id, broker_order_id, symbol, side, quantity, price) "
+             "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+    "sessions_end": "UPDATE sessions SET ended_at = ? WHERE id = ?",
+}
+
+class Journal:
+    """
+    Durable record of sessions, signals, filter decisions, orders and fills in
+    an embedded SQLite database (WAL mode). Callers only enqueue a tuple; one
+    writer thread drains the queue and commits everything waiting (up to
+    batch_size rows) in a single transaction, so the tick path never waits on
+    disk. Readers use their own connection and are not blocked by the writer.
+    """
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 0.2,
+                 mode: str = "", data_feed: str = "", capital: Optional[float] = None):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: "queue.Queue[Optional[Tuple[str, tuple]]]" = queue.Queue()
+        self.written = 0
+        self.dropped = 0
+        self.read_lock = threading.Lock()
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        with conn:
+            self.session_id = conn.execute(
+                "INSERT INTO sessions (started_at, mode, data_feed, capital) VALUES (?, ?, ?, ?)",
+                (time.time(), mode, data_feed, capital)).lastrowid
+        # Signal ids are handed out here so filter rows can reference them before the insert lands
+        last = conn.execute("SELECT COALESCE(MAX(id), 0) FROM signals").fetchone()[0]
+        self._signal_ids = itertools.count(last + 1)
+        self.reader = conn
+
+        self.writer = threading.Thread(target=self._write_loop, name="journal-writer", daemon=True)
+        self.writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL") # durable at checkpoints; a crash loses at most the last batch
+        return conn
+
+    # --- Writes (any thread, non-blocking) ---
+
+    def _put(self, table: str, row: tuple):
+        self.queue.put((table, row))
+
+    def record_signal(self, symbol: str, signal: Dict[str, Any], price: float, outcome: str,
+                      order_key: Optional[str] = None, ts: Optional[float] = None) -> int:
+        """Returns the signal id; order_key is the idempotency key, which links the signal to its order."""
+        signal_id = next(self._signal_ids)
+        self._put("signals", (
+            signal_id, self.session_id, time.time() if ts is None else ts, symbol, signal.get('strategy'),
+            signal.get('side'), price, signal.get('entry'), signal.get('target'), signal.get('stop_loss'),
+            signal.get('reason'), outcome, order_key
+        ))
+        return signal_id
+
+    def record_filter(self, signal_id: int, name: str, passed: bool, detail: Optional[float] = None,
+                      ts: Optional[float] = None):
+        self._put("filter_outcomes", (signal_id, time.time() if ts is None else ts, name, int(passed), detail))
+
+    def record_order(self, record, broker: Optional[str] = None, ts: Optional[float] = None):
+        """Insert or update an OrderRecord (core/order_router.py) on every status change."""
+        intent = record.intent
+        self._put("orders", (
+            self.session_id, record.client_order_id, broker, intent.created_at, time.time() if ts is None else ts,
+            intent.symbol, intent.side, intent.quantity, record.status, record.broker_order_id,
+            intent.idempotency_key, record.error
+        ))
+
+    def record_fill(self, record, price: Optional[float] = None, ts: Optional[float] = None):
+        intent = record.intent
+        self._put("fills", (
+            self.session_id, record.filled_at or (time.time() if ts is None else ts), record.client_order_id,
+            record.broker_order_id, intent.symbol, intent.side, intent.quantity, price
+        ))
+
+    # --- Writer thread ---
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            item = self.queue.get()
+            batch = [item]
+            # Group whatever else is already waiting (or arrives within flush_interval) into this transaction
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._commit(conn, [b for b in batch if b is not None])
+            for _ in batch: self.queue.task_done()
+            if batch[-1] is None:
+                conn.close()
+                return
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[Tuple[str, tuple]]):
+        if not batch: return
+        # Consecutive rows for the same table go through one executemany; order is preserved
+        groups = [(table, [row for _, row in rows]) for table, rows in itertools.groupby(batch, key=lambda b: b[0])]
+        try:
+            with conn:
+                for table, rows in groups:
+                    conn.executemany(STATEMENTS[table], rows)
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            self.dropped += len(batch)
+            print(f"[JOURNAL] Write failed, {len(batch)} rows dropped: {e}")
+
+    def flush(self):
+        """Block until everything enqueued so far is committed."""
+        self.queue.join()
+
+    def close(self):
+        self._put("sessions_end", (time.time(), self.session_id))
+        self.queue.put(None)
+        self.writer.join(timeout=10)
+
+    # --- Reads ---
+
+    def query(self, sql: str, params: Sequence = ()) -> List[Dict[str, Any]]:
+        with self.read_lock:
+            cur = self.reader.execute(sql, params)
+            names = [c[0] for c in cur.description]
+            return [dict(zip(names, row)) for row in cur.fetchall()]
+
+    def orders_since(self, since: float) -> List[Dict[str, Any]]:
+        """Latest state of every order created at or after `since`, across sessions."""
+        return self.query("SELECT * FROM orders WHERE created_at >= ? ORDER BY created_at", (since,))
+
+    def signals(self, start: Optional[float] = None, end: Optional[float] = None,
+                symbol: Optional[str] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        sql, params = "SELECT * FROM signals WHERE ts >= ? AND ts <= ?", [start or 0.0, end or float("inf")]
+        if symbol:
+            sql += " AND symbol = ?"
+            params.append(symbol)
+        return self.query(sql + " ORDER BY ts LIMIT ?", params + [limit])
@@ -0,0 +1,311 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def tick_levels(price: float, high: float, low: float) -> Dict[str, float]:
+    """
+    Fallback levels from a single quote: +/-15% of the day's range around the
+    price (at least 0.2%), base range half of that.
+    """
+    vol_range = max(0.002, (high - low) / price * 0.15)
+    return {
+        "resistance": price * (1 + vol_range),
+        "support": price * (1 - vol_range),
+        "base_range": price * (vol_range * 0.5)
+    }
+
+OHLC = ("open", "high", "low", "close")
+RECOMPUTE_CHUNK = 1024 # rows per pass; swing clustering is O(lookback^2) memory per row
+
+def _nearest(candidates: np.ndarray, above: bool) -> np.ndarray:
+    """Row-wise nearest candidate (NaN = no candidate); NaN where a row has none."""
+    fill = np.inf if above else -np.inf
+    filled = np.where(np.isnan(candidates), fill, candidates)
+    best = filled.min(axis=1) if above else filled.max(axis=1)
+    return np.where(np.isfinite(best), best, np.nan)
+
+class LevelEngine:
+    """
+    Support/resistance for the whole universe from daily bars, held in arrays
+    indexed by registry symbol id. Rows are recomputed in vectorized batches
+    (pre-market for everyone, then only the rows that got a new bar), so a
+    per-tick lookup is a plain array read.
+
+    Candidates per symbol, the nearest one on each side of the last close wins:
+      - classic floor pivots from the prior session (R1/S1)
+      - prior session high / low
+      - swing highs/lows clustered within cluster_tol * base range, kept if
+        touched at least min_touches times
+
+    Also usable as a mapping sid -> {"support", "resistance", "base_range", ...}
+    so existing callers (planned trades, shard results) keep working.
+    """
+    def __init__(self, lookback: int = 60, swing_window: int = 2, cluster_tol: float = 0.25,
+                 min_touches: int = 2, range_period: int = 20, capacity: int = 256):
+        self.lookback = lookback
+        self.swing_window = swing_window
+        self.cluster_tol = cluster_tol
+        self.min_touches = min_touches
+        self.range_period = range_period
+        self.lock = threading.Lock()
+        self.capacity = 0
+        self.bars = np.empty((0, lookback, len(OHLC))) # [sid, bar (oldest first, NaN padded), OHLC]
+        self.support = np.empty(0)
+        self.resistance = np.empty(0)
+        self.base_range = np.empty(0)
+        self.pivot = np.empty(0)
+        self.prior_high = np.empty(0)
+        self.prior_low = np.empty(0)
+        self.prior_close = np.empty(0)
+        self.valid = np.zeros(0, dtype=bool)
+        self.from_history = np.zeros(0, dtype=bool)
+        self.revision = np.zeros(0, dtype=np.int64) # bumped whenever a row's levels change (cache key)
+        self._ensure(capacity)
+
+    def _ensure(self, n: int):
+        """Grow every per-symbol array (geometrically) to hold at least n ids."""
+        if n <= self.capacity: return
+        size = max(n, self.capacity * 2, 16)
+        grow = size - self.capacity
+        self.bars = np.concatenate([self.bars, np.full((grow, self.lookback, len(OHLC)), np.nan)])
+        for name in ("support", "resistance", "base_range", "pivot", "prior_high", "prior_low", "prior_close"):
+            setattr(self, name, np.concatenate([getattr(self, name), np.full(grow, np.nan)]))
+        self.valid = np.concatenate([self.valid, np.zeros(grow, dtype=bool)])
+        self.from_history = np.concatenate([self.from_history, np.zeros(grow, dtype=bool)])
+        self.revision = np.concatenate([self.revision, np.zeros(grow, dtype=np.int64)])
+        self.capacity = size
+
+    # --- History ---
+
+    def load_history(self, sids: Sequence[int], history: Sequence[Optional[Dict[str, List[float]]]]):
+        """
+        Seed bars from per-symbol daily history ({"open": [...], ...}, oldest
+        first, completed sessions only) and recompute those rows in one pass.
+        """
+        rows = [sid for sid, h in zip(sids, history) if h and h.get("close")]
+        if not rows: return 0
+        with self.lock:
+            self._ensure(max(rows) + 1)
+            block = np.full((len(rows), self.lookback, len(OHLC)), np.nan)
+            k = 0
+            for h in history:
+                if not h or not h.get("close"): continue
+                n = min(len(h["close"]), self.lookback)
+                block[k, -n:] = np.column_stack([h[f][-n:] for f in OHLC])
+                k += 1
+            idx = np.asarray(rows)
+            self.bars[idx] = block
+            self._recompute(idx)
+        return len(rows)
+
+    def add_bars(self, sids: Sequence[int], opens: Iterable[float], highs: Iterable[float],
+                 lows: Iterable[float], closes: Iterable[float]):
+        """Append one closed bar per symbol (ring shift) and recompute just those rows."""
+        if not len(sids): return
+        idx = np.asarray(sids)
+        bar = np.column_stack([np.asarray(list(x), dtype=float) for x in (opens, highs, lows, closes)])
+        with self.lock:
+            self._ensure(int(idx.max()) + 1)
+            self.bars[idx, :-1] = self.bars[idx, 1:]
+            self.bars[idx, -1] = bar
+            self._recompute(idx)
+
+    def _recompute(self, idx: np.ndarray):
+        for i in range(0, len(idx), RECOMPUTE_CHUNK):
+            self._recompute_rows(idx[i:i + RECOMPUTE_CHUNK])
+
+    def _recompute_rows(self, idx: np.ndarray):
+        bars = self.bars[idx]
+        high, low, close = bars[:, :, 1], bars[:, :, 2], bars[:, :, 3]
+        ph, pl, pc = high[:, -1], low[:, -1], close[:, -1]
+
+        # Floor pivots off the prior session
+        pivot = (ph + pl + pc) / 3
+        r1 = 2 * pivot - pl
+        s1 = 2 * pivot - ph
+
+        # Base range: SMA(High - Low) over the last range_period sessions
+        spans = (high - low)[:, -self.range_period:]
+        counts = (~np.isnan(spans)).sum(axis=1)
+        base_range = np.where(counts > 0, np.nansum(spans, axis=1) / np.maximum(counts, 1), np.nan)
+
+        res_cluster, sup_cluster = self._swing_clusters(high, low, pc, base_range)
+
+        with np.errstate(invalid="ignore"):
+            above = np.column_stack([r1, ph, res_cluster])
+            below = np.column_stack([s1, pl, sup_cluster])
+            # Only levels strictly beyond the last close (a flat bar yields none)
+            resistance = _nearest(np.where(above > pc[:, None], above, np.nan), above=True)
+            support = _nearest(np.where(below < pc[:, None], below, np.nan), above=False)
+
+        self.support[idx] = support
+        self.resistance[idx] = resistance
+        self.base_range[idx] = base_range
+        self.pivot[idx] = pivot
+        self.prior_high[idx], self.prior_low[idx], self.prior_close[idx] = ph, pl, pc
+        ok = ~(np.isnan(support) | np.isnan(resistance) | np.isnan(base_range))
+        self.valid[idx] = ok
+        self.from_history[idx] = ok
+        self.revision[idx] += 1
+
+    def _swing_clusters(self, high: np.ndarray, low: np.ndarray, price: np.ndarray, base_range: np.ndarray):
+        """Nearest clustered swing high above / swing low below price, per row."""
+        k = self.swing_window
+        n_rows = high.shape[0]
+        if high.shape[1] < 2 * k + 1:
+            empty = np.full(n_rows, np.nan)
+            return empty, empty.copy()
+        with np.errstate(invalid="ignore"):
+            win_h = sliding_window_view(high, 2 * k + 1, axis=1)
+            win_l = sliding_window_view(low, 2 * k + 1, axis=1)
+            mid_h, mid_l = high[:, k:-k], low[:, k:-k]
+            # All-NaN windows (padding) compare False and drop out
+            swing_h = np.where(mid_h == win_h.max(axis=2), mid_h, np.nan)
+            swing_l = np.where(mid_l == win_l.min(axis=2), mid_l, np.nan)
+
+            tol = (self.cluster_tol * base_range)[:, None, None]
+            res = self._cluster(swing_h, tol)
+            sup = self._cluster(swing_l, tol)
+            res = np.where(res > price[:, None], res, np.nan)
+            sup = np.where(sup < price[:, None], sup, np.nan)
+        return _nearest(res, above=True), _nearest(sup, above=False)
+
+    def _cluster(self, swings: np.ndarray, tol: np.ndarray) -> np.ndarray:
+        """For each swing point: mean of swings within tol if touched min_touches times, else NaN."""
+        near = np.abs(swings[:, :, None] - swings[:, None, :]) <= tol # NaN -> False
+        touches = near.sum(axis=2)
+        total = np.where(near, swings[:, None, :], 0.0).sum(axis=2)
+        return np.where(touches >= self.min_touches, total / np.maximum(touches, 1), np.nan)
+
+    # --- Lookup ---
+    # Readers take the lock too: writers grow (swap) the arrays and write a row field by field
+
+    def _has(self, sid: int) -> bool:
+        return 0 <= sid < self.capacity and bool(self.valid[sid])
+
+    def _row(self, sid: int) -> Dict[str, float]:
+        return {
+            "resistance": float(self.resistance[sid]),
+            "support": float(self.support[sid]),
+            "base_range": float(self.base_range[sid]),
+            "pivot": float(self.pivot[sid])
+        }
+
+    def __contains__(self, sid: int) -> bool:
+        with self.lock:
+            return self._has(sid)
+
+    def __getitem__(self, sid: int) -> Dict[str, float]:
+        with self.lock:
+            if not self._has(sid): raise KeyError(sid)
+            return self._row(sid)
+
+    def get(self, sid: int, default=None):
+        with self.lock:
+            return self._row(sid) if self._has(sid) else default
+
+    def __setitem__(self, sid: int, lvl: Dict[str, float]):
+        """Direct write (tick fallback / shard workers); history rows are recomputed on their next bar."""
+        with self.lock:
+            self._ensure(sid + 1)
+            self.resistance[sid] = lvl["resistance"]
+            self.support[sid] = lvl["support"]
+            self.base_range[sid] = lvl["base_range"]
+            self.pivot[sid] = lvl.get("pivot", np.nan)
+            self.valid[sid] = True
+            self.from_history[sid] = False
+            self.revision[sid] += 1
+
+    def revision_of(self, sid: int) -> int:
+        """Changes whenever the symbol's levels do."""
+        with self.lock:
+            return int(self.revision[sid]) if 0 <= sid < self.capacity else 0
+
+    def __len__(self) -> int:
+        with self.lock:
+            return int(self.valid.sum())
+
+    def items(self):
+        with self.lock:
+            rows = [(sid, self._row(sid)) for sid in np.flatnonzero(self.valid).tolist()]
+        yield from rows
+
+    def clear(self):
+        with self.lock:
+            self.valid[:] = False
+            self.from_history[:] = False
+            self.bars[:] = np.nan
+            self.revision += 1
+
+class ProximityIndex:
+    """
+    Symbols ordered by how far price is from their nearest level, in base
+    ranges: min(price - support, resistance - price) / base_range, so 0 is at
+    a level and negative is beyond one (where the strategies can fire).
+
+    Distances are kept in an array by symbol id and recomputed only for the
+    rows whose price is updated (or whose levels changed, via refresh), so
+    picking the symbols within a band is one vectorized scan plus a sort of
+    the candidates. Symbols without levels yet sort first (-inf): their first
+    tick is what creates fallback levels.
+    """
+    def __init__(self, levels: LevelEngine):
+        self.levels = levels
+        self.capacity = 0
+        self.price = np.empty(0)
+        self.distance = np.empty(0) # NaN until the symbol has a price
+        self._ensure(levels.capacity)
+
+    def _ensure(self, n: int):
+        if n <= self.capacity: return
+        size = max(n, self.capacity * 2, 16)
+        grow = size - self.capacity
+        self.price = np.concatenate([self.price, np.full(grow, np.nan)])
+        self.distance = np.concatenate([self.distance, np.full(grow, np.nan)])
+        self.capacity = size
+
+    def update(self, sids: Sequence[int], prices: Iterable[float]):
+        """New prices for these symbols; only their distances are recomputed."""
+        if not len(sids): return
+        idx = np.asarray(sids, dtype=np.intp)
+        self._ensure(int(idx.max()) + 1)
+        self.price[idx] = np.fromiter(prices, dtype=float, count=len(idx))
+        self._recompute(idx)
+
+    def refresh(self, sids: Optional[Sequence[int]] = None):
+        """Levels moved (session roll, tick fallback): recompute these rows, or every priced row."""
+        idx = np.flatnonzero(~np.isnan(self.price)) if sids is None else np.asarray(sids, dtype=np.intp)
+        idx = idx[idx < self.capacity]
+        if len(idx): self._recompute(idx)
+
+    def _recompute(self, idx: np.ndarray):
+        lv = self.levels
+        price = self.price[idx]
+        known = idx < lv.capacity
+        rows = np.where(known, idx, 0)
+        with lv.lock:
+            support, resistance = lv.support[rows], lv.resistance[rows]
+            base_range, valid = lv.base_range[rows], lv.valid[rows] & known
+        with np.errstate(invalid="ignore", divide="ignore"):
+            dist = np.minimum(price - support, resistance - price) / base_range
+        # No levels (or a degenerate base range) -> always a candidate
+        dist = np.where(valid & np.isfinite(dist), dist, -np.inf)
+        self.distance[idx] = np.where(np.isnan(price), np.nan, dist)
+
+    def within(self, band: float) -> np.ndarray:
+        """Symbol ids no more than band base ranges from a level, nearest (or furthest beyond) first."""
+        with np.errstate(invalid="ignore"):
+            idx = np.flatnonzero(self.distance <= band) # NaN (never priced) compares False
+        return idx[np.argsort(self.distance[idx], kind="stable")]
+
+    def distances(self, sids: np.ndarray) -> np.ndarray:
+        """Distance per symbol id, NaN for ids never priced."""
+        out = np.full(len(sids), np.nan)
+        known = sids < self.capacity
+        out[known] = self.distance[sids[known]]
+        return out
+
+    def __len__(self) -> int:
+        return int((~np.isnan(self.distance)).sum())
@@ -0,0 +1,290 @@
+"""
+Memory accounting for a running engine.
+
+- memory_report(engine): bytes and entry counts of every long-lived structure
+  (levels, bars, quotes, order maps, broker caches, history, dashboard state)
+  next to the process RSS, so growth can be pinned on a structure.
+- profiler: on-demand tracemalloc snapshots and diffs by allocation site.
+  Tracing is off until started (it slows allocation down noticeably).
+- TTLCache: the time- and size-bounded map the broker caches use.
+"""
+import collections
+import json
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.metrics import metrics
+
+_OPAQUE = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+           threading.Thread, str, bytes, int, float, bool, type(None))
+
+class TTLCache:
+    """
+    Map whose entries expire ttl seconds after they were written, holding at
+    most max_items. Expired entries read as missing and are swept on writes;
+    with one ttl for all entries, write order is expiry order, so the sweep
+    only ever looks at the front.
+    """
+    def __init__(self, name: str, ttl: float, max_items: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.ttl = ttl
+        self.max_items = max_items
+        self.clock = clock
+        self.data: "collections.OrderedDict[Hashable, Tuple[float, Any]]" = collections.OrderedDict() # key -> (expires, value)
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self.data.get(key)
+        if item is None or item[0] <= self.clock(): return default
+        return item[1]
+
+    def __contains__(self, key: Hashable) -> bool:
+        item = self.data.get(key)
+        return item is not None and item[0] > self.clock()
+
+    def __setitem__(self, key: Hashable, value: Any):
+        with self.lock:
+            now = self.clock()
+            self.data.pop(key, None)
+            self.data[key] = (now + self.ttl, value)
+            self._sweep(now)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        item = self.data.get(key)
+        if item is None or item[0] <= self.clock(): raise KeyError(key)
+        return item[1]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def sweep(self):
+        with self.lock:
+            self._sweep(self.clock())
+
+    def _sweep(self, now: float):
+        dropped = 0
+        while self.data:
+            expires = next(iter(self.data.values()))[0]
+            if expires > now and len(self.data) <= self.max_items: break
+            self.data.popitem(last=False)
+            dropped += 1
+        if dropped: metrics.counter("ag_cache_evictions_total", cache=self.name).inc(dropped)
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None, sample: int = 500) -> int:
+    """
+    Bytes held by obj and everything it references: containers and instance
+    attributes are followed, NumPy arrays count their buffers, and code, modules
+    and threads are not followed. Objects already in `seen` count zero.
+    Containers with more than `sample` members (per-symbol maps) are estimated
+    from an evenly spaced sample of them.
+    """
+    seen = set() if seen is None else seen
+    total, stack = 0, [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen: continue
+        seen.add(id(o))
+        total += sys.getsizeof(o) # arrays that own their data include it
+        if isinstance(o, _OPAQUE): continue
+        if isinstance(o, np.ndarray):
+            if o.base is not None: stack.append(o.base)
+            if o.dtype == object: stack.extend(o.ravel().tolist())
+            continue
+        if isinstance(o, dict): members = _copy(o.items)
+        elif isinstance(o, (list, tuple, set, frozenset, collections.deque)): members = _copy(o.__iter__)
+        else:
+            if hasattr(o, "__dict__"): stack.append(vars(o))
+            for slot in getattr(type(o), "__slots__", ()):
+                if hasattr(o, slot): stack.append(getattr(o, slot))
+            continue
+        if len(members) <= sample:
+            stack.extend(members)
+        else:
+            step = len(members) / sample
+            picked = [members[int(i * step)] for i in range(sample)]
+            total += int(sum(deep_sizeof(m, seen, sample) for m in picked) * len(members) / sample)
+    return total
+
+def _copy(iterate: Callable) -> list:
+    """Members of a container other threads may be resizing (router records, journal queue)."""
+    for _ in range(3):
+        try: return list(iterate())
+        except RuntimeError: continue # changed size during iteration
+    return []
+
+def process_memory() -> Dict[str, Optional[int]]:
+    """Current and peak resident set size of this process, in bytes (None where the OS doesn't say)."""
+    rss = peak = None
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"): rss = int(line.split()[1]) * 1024
+                elif line.startswith("VmHWM:"): peak = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if peak is None:
+        try:
+            import resource
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            peak = maxrss if sys.platform == "darwin" else maxrss * 1024 # bytes on macOS, KiB elsewhere
+        except (ImportError, OSError):
+            pass
+    return {"rss_bytes": rss, "peak_rss_bytes": peak}
+
+def engine_structures(engine) -> List[Tuple[str, Any]]:
+    """(name, object) for the engine's long-lived structures; components the engine doesn't have are left out."""
+    from core.history import history
+    from core.tracing import tracer
+    router = engine.order_router
+    mock = engine.mock_broker
+    journal = getattr(engine, "journal", None)
+    candidates = [
+        ("registry", engine.registry),
+        ("levels", engine.levels),
+        ("proximity", getattr(engine, "proximity", None)),
+        ("regimes", engine.regimes),
+        ("bars", engine.bars),
+        ("indicator_cache", getattr(engine.indicators, "cache", None)),
+        ("poller", getattr(engine, "poller", None)),
+        ("last_quotes", engine.last_quotes),
+        ("pending_eval", getattr(engine, "pending_eval", None)),
+        ("planned_by_id", engine.planned_by_id),
+        ("logs", engine.logs),
+        ("equity_history", engine.equity_history),
+        ("router.records", router.records),
+        ("router.seen_keys", router.seen_keys),
+        ("router.queue", router.queue.queue),
+        ("mock.orders", mock.orders),
+        ("mock.cache", mock.cache),
+        ("journal.queue", journal.queue.queue if journal else None),
+        ("history.equity", history.equity),
+        *((f"history.{kind}", log) for kind, log in history.events.items()),
+        ("metrics", metrics),
+        ("trace.events", tracer.events),
+    ]
+    return [(name, obj) for name, obj in candidates if obj is not None]
+
+def _items(obj: Any) -> Optional[int]:
+    if hasattr(obj, "__len__"):
+        try: return len(obj)
+        except TypeError: pass
+    capacity = getattr(obj, "capacity", None)
+    return capacity if isinstance(capacity, int) else None
+
+def structure_sizes(structures: Iterable[Tuple[str, Any]]) -> Dict[str, Dict[str, Optional[int]]]:
+    """
+    name -> {"bytes", "items"}. Objects shared between structures (e.g. the
+    levels behind the proximity index) are counted under the first name only.
+    """
+    seen: set = set()
+    return {name: {"bytes": deep_sizeof(obj, seen), "items": _items(obj)} for name, obj in structures}
+
+def memory_report(engine) -> Dict[str, Any]:
+    """Per-structure sizes (largest first), the serialized dashboard state and process memory."""
+    sizes = structure_sizes(engine_structures(engine))
+    dashboard = len(json.dumps(engine.dashboard_state(), default=str))
+    sizes["dashboard_state"] = {"bytes": dashboard, "items": None}
+    accounted = sum(s["bytes"] for s in sizes.values())
+    return {
+        "ts": time.time(),
+        **process_memory(),
+        "accounted_bytes": accounted,
+        "structures": dict(sorted(sizes.items(), key=lambda kv: -kv[1]["bytes"])),
+        "tracemalloc": profiler.status(),
+    }
+
+class AllocationProfiler:
+    """
+    tracemalloc on demand: start tracing, take labelled snapshots, and diff
+    two of them (or the latest against a fresh one) by allocation site.
+    Only the last max_snapshots are kept; each holds every live trace.
+    """
+    def __init__(self, max_snapshots: int = 4):
+        self.max_snapshots = max_snapshots
+        self.snapshots: "collections.OrderedDict[str, Tuple[float, tracemalloc.Snapshot]]" = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self._labels = 0
+
+    def start(self, frames: int = 1) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing(): tracemalloc.start(max(1, frames))
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        with self.lock:
+            self.snapshots.clear()
+        tracemalloc.stop()
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else 0,
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            "snapshots": [{"label": label, "ts": ts} for label, (ts, _) in self.snapshots.items()],
+        }
+
+    def _take(self, label: Optional[str]) -> Tuple[str, tracemalloc.Snapshot]:
+        if not tracemalloc.is_tracing(): raise RuntimeError("tracemalloc is not tracing; start it first")
+        snap = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        with self.lock:
+            self._labels += 1
+            label = label or f"snap{self._labels}"
+            self.snapshots.pop(label, None)
+            self.snapshots[label] = (time.time(), snap)
+            while len(self.snapshots) > self.max_snapshots: self.snapshots.popitem(last=False)
+        return label, snap
+
+    def snapshot(self, label: Optional[str] = None, top: int = 20, key: str = "lineno") -> Dict[str, Any]:
+        """Take a snapshot; returns the largest allocation sites in it."""
+        label, snap = self._take(label)
+        stats = snap.statistics(key)
+        return {
+            "label": label,
+            "total_bytes": sum(s.size for s in stats),
+            "top": [{"site": _site(s.traceback), "bytes": s.size, "count": s.count} for s in stats[:top]],
+        }
+
+    def diff(self, since: Optional[str] = None, until: Optional[str] = None, top: int = 20,
+             key: str = "lineno") -> Dict[str, Any]:
+        """
+        Growth by allocation site from snapshot `since` (default: the latest)
+        to snapshot `until` (default: one taken now), largest change first.
+        """
+        with self.lock:
+            if not self.snapshots: raise RuntimeError("No snapshot to diff against; take one first")
+            since = since or next(reversed(self.snapshots))
+            if since not in self.snapshots: raise KeyError(f"Unknown snapshot '{since}'")
+            old = self.snapshots[since][1]
+            new = self.snapshots[until][1] if until in self.snapshots else None
+        if new is None:
+            if until is not None: raise KeyError(f"Unknown snapshot '{until}'")
+            until, new = self._take(None)
+        stats = new.compare_to(old, key)
+        return {
+            "since": since,
+            "until": until,
+            "size_diff_bytes": sum(s.size_diff for s in stats),
+            "count_diff": sum(s.count_diff for s in stats),
+            "top": [{"site": _site(s.traceback), "size_diff_bytes": s.size_diff, "count_diff": s.count_diff,
+                     "bytes": s.size, "count": s.count} for s in stats[:top]],
+        }
+
+def _site(traceback: tracemalloc.Traceback) -> str:
+    return " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in traceback)
+
+profiler = AllocationProfiler()
+
+metrics.describe("ag_cache_evictions_total", "Entries dropped from bounded caches (expired or over the size cap).")
@@ -0,0 +1,197 @@
+import bisect
+import threading
+import time
+from typing import Dict, List, Tuple
+
+# Log-linear (HDR-style) buckets over integer microseconds: every power of two is
+# split into SUB_BUCKETS linear slots, giving ~12% relative precision from 1us to ~70min.
+SUB_BITS = 3
+SUB_BUCKETS = 1 << SUB_BITS
+MAX_EXPONENT = 32
+N_BUCKETS = (MAX_EXPONENT + 1) * SUB_BUCKETS
+
+# Coarse `le` ladder (seconds) exported to Prometheus. The fine buckets don't
+# line up with it, so samples are also counted against it directly (inclusive).
+EXPORT_BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+EXPORT_BOUNDS_US = tuple(round(b * 1_000_000) for b in EXPORT_BOUNDS)
+
+def _bucket_index(us: int) -> int:
+    if us < SUB_BUCKETS:
+        return us
+    exponent = us.bit_length() - 1
+    if exponent > MAX_EXPONENT:
+        return N_BUCKETS - 1
+    sub = (us >> (exponent - SUB_BITS)) & (SUB_BUCKETS - 1)
+    return (exponent - SUB_BITS + 1) * SUB_BUCKETS + sub
+
+def _bucket_upper_us(index: int) -> int:
+    """Exclusive upper bound (in us) of a bucket."""
+    if index < SUB_BUCKETS:
+        return index + 1
+    exponent = index // SUB_BUCKETS + SUB_BITS - 1
+    sub = index % SUB_BUCKETS
+    return (SUB_BUCKETS + sub + 1) << (exponent - SUB_BITS)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], le: str = None) -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    if le is not None: parts.append(f'le="{le}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Timer:
+    __slots__ = ("hist", "start")
+
+    def __init__(self, hist: "LatencyHistogram"):
+        self.hist = hist
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.record_us((time.perf_counter_ns() - self.start) // 1000)
+        return False
+
+class LatencyHistogram:
+    """Fixed-size latency histogram; record() is O(1) with no allocation."""
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.le_counts = [0] * (len(EXPORT_BOUNDS) + 1) # per EXPORT_BOUNDS slot, last = above all
+        self.count = 0
+        self.sum_us = 0
+        self.max_us = 0
+        self.lock = threading.Lock()
+
+    def record_us(self, us: int):
+        idx = _bucket_index(us)
+        le = bisect.bisect_left(EXPORT_BOUNDS_US, us) # first bound >= us
+        with self.lock:
+            self.counts[idx] += 1
+            self.le_counts[le] += 1
+            self.count += 1
+            self.sum_us += us
+            if us > self.max_us: self.max_us = us
+
+    def record(self, seconds: float):
+        self.record_us(int(seconds * 1_000_000))
+
+    def time(self) -> _Timer:
+        """`with hist.time():` records the block's wall time."""
+        return _Timer(self)
+
+    def percentile(self, p: float) -> float:
+        """Approximate percentile in seconds (bucket upper bound)."""
+        with self.lock:
+            counts, total = list(self.counts), self.count
+        if total == 0: return 0.0
+        rank = p / 100 * total
+        seen = 0
+        for idx, c in enumerate(counts):
+            seen += c
+            if c and seen >= rank:
+                return min(_bucket_upper_us(idx), self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    def snapshot(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum_us / self.count / 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max_us / 1000, 3),
+        }
+
+    def export_buckets(self) -> List[Tuple[float, int]]:
+        """Cumulative counts at EXPORT_BOUNDS (Prometheus `le` semantics)."""
+        with self.lock:
+            counts = list(self.le_counts)
+        out, cumulative = [], 0
+        for bound, count in zip(EXPORT_BOUNDS, counts):
+            cumulative += count
+            out.append((bound, cumulative))
+        return out
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self.lock:
+            self.value += amount
+
+class MetricsRegistry:
+    """
+    Process-wide histograms and counters, keyed by metric name + label set,
+    rendered in the Prometheus text exposition format.
+    """
+    def __init__(self):
+        self.histograms: Dict[str, Dict[Tuple, LatencyHistogram]] = {}
+        self.counters: Dict[str, Dict[Tuple, Counter]] = {}
+        self.help: Dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    def _get(self, family: Dict, factory, name: str, labels: Dict):
+        key = tuple(sorted(labels.items()))
+        series = family.get(name)
+        metric = series.get(key) if series is not None else None
+        if metric is None:
+            with self.lock:
+                series = family.setdefault(name, {})
+                metric = series.setdefault(key, factory())
+        return metric
+
+    def describe(self, name: str, text: str):
+        self.help[name] = text
+
+    def histogram(self, name: str, **labels) -> LatencyHistogram:
+        return self._get(self.histograms, LatencyHistogram, name, labels)
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._get(self.counters, Counter, name, labels)
+
+    def timer(self, name: str, **labels) -> _Timer:
+        return _Timer(self.histogram(name, **labels))
+
+    def snapshot(self) -> Dict:
+        """JSON-friendly summary (percentiles per series)."""
+        out = {}
+        for name, series in list(self.histograms.items()):
+            for key, hist in list(series.items()):
+                out[f"{name}{_format_labels(key)}"] = hist.snapshot()
+        for name, series in list(self.counters.items()):
+            for key, c in list(series.items()):
+                out[f"{name}{_format_labels(key)}"] = c.value
+        return out
+
+    def render(self) -> str:
+        lines = []
+        for name, series in sorted(self.histograms.items()):
+            if name in self.help: lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in list(series.items()):
+                for bound, cumulative in hist.export_buckets():
+                    lines.append(f"{name}_bucket{_format_labels(key, bound)} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(key, '+Inf')} {hist.count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {hist.sum_us / 1_000_000}")
+                lines.append(f"{name}_count{_format_labels(key)} {hist.count}")
+        for name, series in sorted(self.counters.items()):
+            if name in self.help: lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for key, c in list(series.items()):
+                lines.append(f"{name}{_format_labels(key)} {c.value}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+metrics.describe("ag_stage_latency_seconds", "Engine pipeline stage latency.")
+metrics.describe("ag_broker_request_seconds", "Broker API round-trip latency per endpoint.")
+metrics.describe("ag_broker_errors_total", "Broker API errors by error code.")
+metrics.describe("ag_orders_total", "Order router status transitions.")
+metrics.describe("ag_signals_total", "Strategy signals by outcome.")
+metrics.describe("ag_cycles_total", "Completed engine cycles.")
+metrics.describe("ag_ticks_skipped_total", "Changed symbols left for the recheck cycle as too far from their levels.")
+metrics.describe("ag_changed_quotes_total", "Quotes that differed from the previous cycle.")
@@ -0,0 +1,283 @@
+import itertools
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from core.metrics import metrics
+from core.tracing import tracer
+
+# Broker statuses (Kite/Dhan/Mock) folded into the router's lifecycle
+FILLED_STATUSES = {"COMPLETE", "FILLED", "TRADED"}
+DEAD_STATUSES = {"REJECTED", "CANCELLED", "EXPIRED", "NOT_FOUND"}
+TERMINAL_STATES = {"FILLED", "REJECTED", "CANCELLED"}
+
+@dataclass
+class OrderIntent:
+    symbol: str
+    side: str
+    quantity: int
+    order_type: str = "MARKET"
+    price: Optional[float] = None
+    target: Optional[float] = None
+    stop_loss: Optional[float] = None
+    idempotency_key: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+@dataclass
+class OrderRecord:
+    client_order_id: str
+    intent: OrderIntent
+    status: str = "QUEUED"  # QUEUED -> SUBMITTED -> ACKED -> FILLED | REJECTED | CANCELLED
+    broker_order_id: Optional[str] = None
+    error: Optional[str] = None
+    submitted_at: Optional[float] = None
+    acked_at: Optional[float] = None
+    filled_at: Optional[float] = None
+    broker: Any = field(default=None, repr=False) # the broker that placed it; its status is asked there
+    trace: Any = field(default=None, repr=False) # SignalTrace of the signal that placed it (core/tracing.py)
+    trace_ns: int = 0 # perf_counter_ns of the last lifecycle step, while traced
+
+    def to_dict(self) -> Dict:
+        return {
+            "client_order_id": self.client_order_id,
+            "broker_order_id": self.broker_order_id,
+            "symbol": self.intent.symbol,
+            "side": self.intent.side,
+            "quantity": self.intent.quantity,
+            "status": self.status,
+            "error": self.error,
+        }
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens/sec refill, up to `burst` banked.
+    """
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class OrderRouter:
+    """
+    Takes order intents from the strategy through a queue and submits them to the
+    broker from a pool of worker threads, so tick threads never block on the network.
+    Intents are deduplicated by idempotency key and tracked until a terminal state.
+
+    workers=0 is the synchronous mode used by replay: submit() sends inline
+    (no rate limit) and status tracking happens only when poll() is called.
+    Past max_records tracked orders, the oldest finished ones are forgotten.
+
+    An order is polled on the broker that placed it, so a paper/live toggle
+    doesn't send live order ids to the mock broker (or the reverse). An order
+    the broker refuses to place frees its idempotency key for a retry.
+    """
+    def __init__(self, broker_provider: Callable, workers: int = 4, rate: float = 10.0,
+                 burst: int = 20, dedup_ttl: float = 3600, poll_interval: float = 1.0,
+                 batch_size: int = 10, max_records: int = 10_000, clock: Callable[[], float] = time.time):
+        self.broker_provider = broker_provider
+        self.workers = workers
+        self.clock = clock
+        self.bucket = TokenBucket(rate, burst)
+        self.dedup_ttl = dedup_ttl
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_records = max_records
+
+        self.queue: "queue.Queue[OrderRecord]" = queue.Queue()
+        self.records: Dict[str, OrderRecord] = {}
+        self.seen_keys: Dict[str, float] = {}
+        self.listeners: List[Callable[[OrderRecord], None]] = []
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._started = False
+
+    def add_listener(self, callback: Callable[[OrderRecord], None]):
+        """Register a callback fired on every status change."""
+        self.listeners.append(callback)
+
+    def start(self):
+        with self.lock:
+            if self._started: return
+            self._started = True
+        if not self.workers: return
+        for i in range(self.workers):
+            threading.Thread(target=self._worker, name=f"order-router-{i}", daemon=True).start()
+        threading.Thread(target=self._track_acks, name="order-acks", daemon=True).start()
+
+    def seen(self, idempotency_key: str) -> bool:
+        """True if the key was submitted within the dedup window (cheap pre-check for callers)."""
+        seen_at = self.seen_keys.get(idempotency_key)
+        return seen_at is not None and self.clock() - seen_at < self.dedup_ttl
+
+    def submit(self, intent: OrderIntent, trace=None) -> Optional[str]:
+        """
+        Enqueue an intent. Returns the client order id, or None if the idempotency
+        key was already seen within the dedup window. With a trace (core/tracing.py),
+        the order's queueing, placement and acks are recorded as its spans.
+        """
+        now = self.clock()
+        with self.lock:
+            if intent.idempotency_key:
+                seen_at = self.seen_keys.get(intent.idempotency_key)
+                if seen_at is not None and now - seen_at < self.dedup_ttl:
+                    return None
+                self.seen_keys[intent.idempotency_key] = now
+                if len(self.seen_keys) > 10000:
+                    self.seen_keys = {k: t for k, t in self.seen_keys.items() if now - t < self.dedup_ttl}
+            record = OrderRecord(client_order_id=f"AG{next(self._ids):08d}", intent=intent,
+                                 trace=trace, trace_ns=time.perf_counter_ns())
+            self.records[record.client_order_id] = record
+            if len(self.records) > self.max_records: self._trim_records()
+        self.start()
+        if self.workers: self.queue.put(record)
+        else: self._send(record)
+        return record.client_order_id
+
+    def _trim_records(self):
+        """Forget the oldest finished orders down to half of max_records (caller holds the lock)."""
+        drop = len(self.records) - self.max_records // 2
+        done = [cid for cid, r in self.records.items() if r.status in TERMINAL_STATES][:drop]
+        for cid in done: del self.records[cid]
+        if done: metrics.counter("ag_cache_evictions_total", cache="router_records").inc(len(done))
+
+    def get(self, client_order_id: str) -> Optional[OrderRecord]:
+        return self.records.get(client_order_id)
+
+    def open_orders(self) -> List[OrderRecord]:
+        with self.lock:
+            return [r for r in self.records.values() if r.status not in TERMINAL_STATES]
+
+    def _set_status(self, record: OrderRecord, status: str, error: Optional[str] = None):
+        if record.status == status: return
+        record.status = status
+        if error: record.error = error
+        now = self.clock()
+        metrics.counter("ag_orders_total", status=status).inc()
+        if record.trace and status != "SUBMITTED": # SUBMITTED is traced as place_order
+            ns = time.perf_counter_ns()
+            tracer.add(f"await_{status.lower()}", record.trace_ns, ns, record.trace, "order",
+                       {"order": record.client_order_id, "symbol": record.intent.symbol})
+            record.trace_ns = ns
+        if status == "SUBMITTED": record.submitted_at = now
+        elif status == "ACKED": record.acked_at = now
+        elif status == "FILLED": record.filled_at = now
+        for cb in self.listeners:
+            try: cb(record)
+            except Exception as e: print(f"[ROUTER] Listener error: {e}")
+
+    def _drain(self) -> List[OrderRecord]:
+        batch = [self.queue.get()]
+        while len(batch) < self.batch_size:
+            try: batch.append(self.queue.get_nowait())
+            except queue.Empty: break
+        return batch
+
+    def _worker(self):
+        while True:
+            for record in self._drain():
+                self.bucket.acquire()
+                self._send(record)
+
+    def _send(self, record: OrderRecord):
+        intent = record.intent
+        broker = record.broker = self.broker_provider()
+        name = type(broker).__name__
+        start = time.perf_counter_ns()
+        if record.trace:
+            args = {"order": record.client_order_id, "symbol": intent.symbol}
+            tracer.add("router_queue", record.trace_ns, start, record.trace, "order", args)
+        try:
+            with metrics.timer("ag_broker_request_seconds", broker=name, endpoint="place_order"):
+                order_id = self._place(broker, intent)
+            if record.trace:
+                record.trace_ns = time.perf_counter_ns()
+                tracer.add("place_order", start, record.trace_ns, record.trace, "order", {**args, "broker": name})
+        except Exception as e:
+            metrics.counter("ag_broker_errors_total", broker=name, code=type(e).__name__).inc()
+            self._release_key(intent)
+            self._set_status(record, "REJECTED", str(e))
+            print(f"[ROUTER] {record.client_order_id} {intent.symbol} rejected: {e}")
+            return
+
+        if not order_id or order_id == "error":
+            self._release_key(intent)
+            self._set_status(record, "REJECTED", "Broker returned no order id")
+            return
+        record.broker_order_id = str(order_id)
+        self._set_status(record, "SUBMITTED")
+
+    def _release_key(self, intent: OrderIntent):
+        """Let an intent that never reached the broker be submitted again."""
+        if not intent.idempotency_key: return
+        with self.lock:
+            self.seen_keys.pop(intent.idempotency_key, None)
+
+    def _place(self, broker, intent: OrderIntent) -> str:
+        if intent.target is not None and intent.stop_loss is not None:
+            return broker.place_oco_order(intent.symbol, intent.side, intent.quantity,
+                                          intent.price or 0.0, intent.target, intent.stop_loss)
+        return broker.place_order(intent.symbol, intent.side, intent.order_type,
+                                  intent.quantity, intent.price)
+
+    def _fetch_statuses(self, broker, pending: List[OrderRecord]) -> Dict[str, str]:
+        ids = [r.broker_order_id for r in pending]
+        if hasattr(broker, "get_order_statuses"):
+            return broker.get_order_statuses(ids)
+        return {oid: broker.get_order_status(oid) for oid in ids}
+
+    def _track_acks(self):
+        while True:
+            time.sleep(self.poll_interval)
+            self.poll()
+
+    def poll(self):
+        """One status pass over submitted orders (the ack thread's loop; call it directly when workers=0)."""
+        with self.lock:
+            pending = [r for r in self.records.values()
+                       if r.broker_order_id and r.status in ("SUBMITTED", "ACKED")]
+        current = self.broker_provider()
+        by_broker: Dict[int, List[OrderRecord]] = {id(current): []}
+        brokers = {id(current): current}
+        for record in pending:
+            broker = record.broker if record.broker is not None else current
+            brokers[id(broker)] = broker
+            by_broker.setdefault(id(broker), []).append(record)
+        for key, records in by_broker.items():
+            self._poll_broker(brokers[key], records)
+
+    def _poll_broker(self, broker, pending: List[OrderRecord]):
+        try:
+            if hasattr(broker, "sync_oco_groups"):
+                broker.sync_oco_groups()
+            if not pending: return
+            with metrics.timer("ag_broker_request_seconds", broker=type(broker).__name__, endpoint="order_status"):
+                statuses = self._fetch_statuses(broker, pending)
+        except Exception as e:
+            print(f"[ROUTER] Status poll error: {e}")
+            return
+
+        for record in pending:
+            status = (statuses.get(record.broker_order_id) or "").upper()
+            if not status or status == "UNKNOWN": continue
+            if status in FILLED_STATUSES:
+                if record.status == "SUBMITTED": self._set_status(record, "ACKED")
+                self._set_status(record, "FILLED")
+            elif status in DEAD_STATUSES:
+                self._set_status(record, "REJECTED" if status != "CANCELLED" else "CANCELLED", status)
+            else:
+                self._set_status(record, "ACKED")
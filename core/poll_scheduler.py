@@ -0,0 +1,150 @@
+import math
+import time
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+from core.metrics import metrics
+
+HOT, WARM, COLD = 0, 1, 2
+TIER_NAMES = ("hot", "warm", "cold")
+
+class PollScheduler:
+    """
+    Decides which symbols each quote request carries, instead of fetching the
+    whole watchlist every loop. Symbols sit in one of three tiers, each with
+    its own refresh interval:
+
+      hot:  an order/position in the symbol, or price within hot_band base
+            ranges of a level (ProximityIndex distance)
+      warm: within warm_band base ranges, or moving fast (EWMA of the move
+            between fetches >= volatile_move base ranges)
+      cold: everything else
+
+    Requests are paced by a token bucket of calls_per_sec. On every tick the
+    due symbols go out by how late they are relative to their tier's
+    interval, packed into full batches: spare room in the last batch is
+    filled with the symbols due soonest, so no call leaves with fewer
+    symbols than the feed allows.
+    """
+    def __init__(self, symbols: Sequence[str], sids: Sequence[int], proximity,
+                 intervals: Sequence[float] = (0.5, 3.0, 30.0), hot_band: float = 0.02,
+                 warm_band: float = 0.1, volatile_move: float = 0.05, batch_size: int = 50,
+                 calls_per_sec: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.symbols = list(symbols)
+        self.sids = np.asarray(sids, dtype=np.intp)
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        self.proximity = proximity
+        self.intervals = np.asarray(intervals, dtype=float)
+        self.hot_band = hot_band
+        self.warm_band = warm_band
+        self.volatile_move = volatile_move
+        self.batch_size = batch_size
+        self.calls_per_sec = calls_per_sec
+        self.clock = clock
+        n = len(self.symbols)
+        # Enough burst for one full pass, so the first tick fetches everything
+        self.burst = max(1, math.ceil(n / batch_size))
+        self.tokens = float(self.burst)
+        self.updated = clock()
+        self.next_due = np.zeros(n) # everything is due on the first tick
+        self.tier = np.full(n, WARM, dtype=np.int8)
+        self.last_price = np.full(n, np.nan)
+        self.move = np.zeros(n) # EWMA of |price change| per fetch, in base ranges
+        self.held = np.zeros(n, dtype=bool)
+
+    @classmethod
+    def from_config(cls, symbols: Sequence[str], sids: Sequence[int], proximity, feed, config,
+                    clock: Callable[[], float] = time.monotonic) -> "PollScheduler":
+        size = getattr(feed, "batch_size", 50)
+        pause = getattr(feed, "batch_pause", 0.2)
+        rate = config.POLL_CALLS_PER_SEC
+        if rate <= 0: # what the fixed loop spends: a paced full pass, then a sleep up to POLL_PASS_SEC (min 1s)
+            chunks = max(1, math.ceil(len(symbols) / size))
+            fetch_sec = chunks * pause
+            rate = chunks / (fetch_sec + max(1.0, config.POLL_PASS_SEC - fetch_sec))
+        if pause: rate = min(rate, 1.0 / pause)
+        return cls(symbols, sids, proximity,
+                   intervals=(config.POLL_HOT_SEC, config.POLL_WARM_SEC, config.POLL_COLD_SEC),
+                   hot_band=config.POLL_HOT_BAND, warm_band=config.POLL_WARM_BAND,
+                   volatile_move=config.POLL_VOLATILE_MOVE, batch_size=size, calls_per_sec=rate, clock=clock)
+
+    def hold(self, symbol: str, held: bool = True):
+        """Pin a symbol to the hot tier (open order or position)."""
+        i = self.index.get(symbol)
+        if i is not None: self.held[i] = held
+
+    def release_all(self):
+        self.held[:] = False
+
+    def observe(self, quotes: Dict[str, Dict]):
+        """Fresh quotes from a fetch: update each symbol's move rate."""
+        rows = [self.index[s] for s in quotes if s in self.index]
+        if not rows: return
+        idx = np.asarray(rows, dtype=np.intp)
+        price = np.array([q.get('close', np.nan) for s, q in quotes.items() if s in self.index])
+        levels = self.proximity.levels
+        sids = self.sids[idx]
+        base = np.full(len(idx), np.nan)
+        known = sids < levels.capacity
+        base[known] = levels.base_range[sids[known]]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            step = np.abs(price - self.last_price[idx]) / base
+        step = np.where(np.isfinite(step), step, 0.0)
+        self.move[idx] = 0.7 * self.move[idx] + 0.3 * step
+        self.last_price[idx] = np.where(np.isnan(price), self.last_price[idx], price)
+
+    def retier(self):
+        """Reassign tiers from distances, move rates and held symbols; promoted symbols are pulled forward."""
+        dist = self.proximity.distances(self.sids)
+        with np.errstate(invalid="ignore"):
+            tier = np.where(self.held | (dist <= self.hot_band), HOT,
+                            np.where((dist <= self.warm_band) | (self.move >= self.volatile_move) | np.isnan(dist),
+                                     WARM, COLD)).astype(np.int8)
+        # Moving up a tier pulls the next fetch in; moving down lets the current schedule run out
+        promoted = tier < self.tier
+        if promoted.any():
+            self.next_due[promoted] = np.minimum(self.next_due[promoted],
+                                                 self.clock() + self.intervals[tier[promoted]] / 2)
+        self.tier = tier
+
+    def next_batch(self) -> List[str]:
+        """Symbols for the requests this tick may make (a multiple of batch_size, or fewer if the list is short)."""
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.calls_per_sec)
+        self.updated = now
+        calls = int(self.tokens)
+        if calls < 1: return []
+        due = np.flatnonzero(self.next_due <= now)
+        if not len(due): return []
+        # Latest relative to their own interval first (hotter on ties): an over-committed
+        # budget stretches every tier by the same factor instead of starving the cold one
+        tier = self.tier[due]
+        lateness = (now - self.next_due[due]) / self.intervals[tier]
+        due = due[np.lexsort((tier, -lateness))]
+        n_calls = min(calls, math.ceil(len(due) / self.batch_size))
+        take = due[:n_calls * self.batch_size]
+        room = n_calls * self.batch_size - len(take)
+        if room:
+            waiting = np.flatnonzero(self.next_due > now)
+            if len(waiting):
+                nearest = waiting[np.argsort(self.next_due[waiting], kind="stable")[:room]]
+                take = np.concatenate([take, nearest])
+        self.tokens -= n_calls
+        self.next_due[take] = now + self.intervals[self.tier[take]]
+        for name, count in zip(TIER_NAMES, np.bincount(self.tier[take], minlength=3).tolist()):
+            if count: metrics.counter("ag_polled_symbols_total", tier=name).inc(count)
+        return [self.symbols[i] for i in take.tolist()]
+
+    def seconds_until_due(self) -> float:
+        """How long until the next symbol is due (and a token is there to fetch it)."""
+        if not len(self.next_due): return 1.0
+        wait_due = float(self.next_due.min()) - self.clock()
+        wait_token = (1 - self.tokens) / self.calls_per_sec if self.tokens < 1 else 0.0
+        return max(0.0, wait_due, wait_token)
+
+    def counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.tier, minlength=3)
+        return {name: int(c) for name, c in zip(TIER_NAMES, counts)}
+
+metrics.describe("ag_polled_symbols_total", "Symbols fetched by the tiered poll scheduler, by tier.")
@@ -0,0 +1,125 @@
+import threading
+from typing import Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from core.indicators import get_regime
+
+REGIMES = np.array(["REGIME_A", "REGIME_B", "REGIME_C"])
+
+def regime_codes(tsd_counts: np.ndarray) -> np.ndarray:
+    """Vectorized get_regime: 0 = A (<= 1), 1 = B (2-3), 2 = C (>= 4)."""
+    return np.where(tsd_counts <= 1, 0, np.where(tsd_counts <= 3, 1, 2))
+
+def daily_trend_shift(close: np.ndarray, period: int = 20, method: str = "linreg") -> np.ndarray:
+    """
+    T per day for [symbols x days] closes (NaN until enough history):
+    linreg = slope of the last `period` closes (calculate_trend_shift_linreg),
+    body = the day's close-to-close move.
+    """
+    out = np.full(close.shape, np.nan)
+    if method == "body":
+        out[:, 1:] = close[:, 1:] - close[:, :-1]
+        return out
+    if close.shape[1] < period: return out
+    x = np.arange(period) - (period - 1) / 2
+    weights = x / (x * x).sum()
+    out[:, period - 1:] = sliding_window_view(close, period, axis=1) @ weights
+    return out
+
+def daily_base_range(high: np.ndarray, low: np.ndarray, period: int = 20) -> np.ndarray:
+    """R per day: SMA(High - Low, period) (calculate_base_range), NaN until enough history."""
+    out = np.full(high.shape, np.nan)
+    if high.shape[1] < period: return out
+    out[:, period - 1:] = sliding_window_view(high - low, period, axis=1).mean(axis=2)
+    return out
+
+class RegimeTracker:
+    """
+    TSD count per symbol id, advanced once per closed daily bar for the whole
+    universe in one vectorized step (|T_day| > mult * R_day -> +1, else decay).
+
+    mode="symbol": each symbol trades on its own regime.
+    mode="market": every symbol uses the market aggregate, where a day counts
+    as a market TSD day if at least `breadth` of the symbols had one. Symbols
+    without daily history also fall back to the aggregate.
+    """
+    def __init__(self, mode: str = "symbol", period: int = 20, threshold_mult: float = 0.7,
+                 breadth: float = 0.5, method: str = "linreg", capacity: int = 256):
+        self.mode = mode
+        self.period = period
+        self.threshold_mult = threshold_mult
+        self.breadth = breadth
+        self.method = method
+        self.lock = threading.Lock()
+        self.counts = np.zeros(max(capacity, 16), dtype=np.int32)
+        self.known = np.zeros(max(capacity, 16), dtype=bool)
+        self.market_count = 0
+        self.revision = 0 # bumped on every count update (cache key for regime lookups)
+
+    def _ensure(self, n: int):
+        if n > len(self.counts):
+            grow = max(n, 2 * len(self.counts)) - len(self.counts)
+            self.counts = np.concatenate([self.counts, np.zeros(grow, dtype=np.int32)])
+            self.known = np.concatenate([self.known, np.zeros(grow, dtype=bool)])
+
+    def _tsd_days(self, bars: np.ndarray) -> np.ndarray:
+        """[rows x days] TSD flags from [rows x days x OHLC] daily bars; NaN where undecidable."""
+        high, low, close = bars[:, :, 1], bars[:, :, 2], bars[:, :, 3]
+        trend = daily_trend_shift(close, self.period, self.method)
+        base = daily_base_range(high, low, self.period)
+        with np.errstate(invalid="ignore"):
+            flags = (np.abs(trend) > self.threshold_mult * base).astype(float)
+        flags[np.isnan(trend) | np.isnan(base)] = np.nan
+        return flags
+
+    def _step(self, idx: np.ndarray, flags: np.ndarray):
+        """Advance counts for idx by one day; NaN flags leave a symbol unchanged."""
+        counts = self.counts[idx]
+        known = ~np.isnan(flags)
+        stepped = np.where(flags == 1, counts + 1, np.maximum(counts - 1, 0))
+        self.counts[idx] = np.where(known, stepped, counts)
+        if known.any():
+            market_tsd = np.nanmean(flags) >= self.breadth
+            self.market_count = self.market_count + 1 if market_tsd else max(0, self.market_count - 1)
+
+    def seed(self, sids: Sequence[int], bars: np.ndarray):
+        """Replay the daily history (oldest first) to get today's counts, one vectorized step per day."""
+        if not len(sids): return
+        idx = np.asarray(sids)
+        with self.lock:
+            self._ensure(int(idx.max()) + 1)
+            self.counts[idx] = 0
+            self.known[idx] = True
+            self.market_count = 0
+            flags = self._tsd_days(bars)
+            for day in range(flags.shape[1]):
+                self._step(idx, flags[:, day])
+            self.revision += 1
+
+    def on_day_close(self, sids: Sequence[int], bars: np.ndarray):
+        """One new closed daily bar per symbol (bars: history incl. the new day, oldest first)."""
+        if not len(sids): return
+        idx = np.asarray(sids)
+        with self.lock:
+            self._ensure(int(idx.max()) + 1)
+            self.known[idx] = True
+            self._step(idx, self._tsd_days(bars[:, -self.period:])[:, -1])
+            self.revision += 1
+
+    def count(self, sid: int) -> int:
+        if self.mode == "market" or sid >= len(self.known) or not self.known[sid]:
+            return self.market_count
+        return int(self.counts[sid])
+
+    def regime(self, sid: int) -> str:
+        return get_regime(self.count(sid))
+
+    def regimes(self, sids: Sequence[int]) -> np.ndarray:
+        """Regime codes (see REGIMES) for many symbols at once."""
+        if self.mode == "market":
+            return np.full(len(sids), int(regime_codes(np.int32(self.market_count))))
+        idx = np.asarray(sids)
+        self._ensure(int(idx.max()) + 1 if len(idx) else 0)
+        return regime_codes(np.where(self.known[idx], self.counts[idx], self.market_count))
@@ -0,0 +1,165 @@
+"""
+Session recording and accelerated replay through the real TradingEngine.
+
+Record a live session by setting RECORD_SESSION_PATH, then replay it:
+
+    python -m core.replay sessions/2024-05-02.jsonl.gz              # as fast as possible
+    python -m core.replay sessions/2024-05-02.jsonl.gz --speed 10   # 10 x real time
+    python -m core.replay sessions/2024-05-02.jsonl.gz --out signals.jsonl --journal replay.db
+
+Replay runs levels, regime, strategies, risk and the paper broker on a
+simulated clock, with ticks evaluated in watchlist order and orders routed
+synchronously, so the same recording always produces the same signals.
+AI confirmation is skipped (always confirms) because its answers are not
+reproducible.
+"""
+import argparse
+import gzip
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from core.clock import SimClock
+
+def _open(path: str, mode: str):
+    return gzip.open(path, mode + "t") if path.endswith(".gz") else open(path, mode)
+
+class SessionRecorder:
+    """
+    Writes what the engine consumed as JSON lines (gzip if the path ends in
+    .gz): a header, the pre-market daily history, then one line per cycle with
+    only the quotes that changed since the previous cycle plus the symbols that
+    dropped out of it.
+    """
+    def __init__(self, path: str, symbols: Sequence[str], started: float):
+        if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = _open(path, "w")
+        self.last: Dict[str, Dict[str, Any]] = {}
+        self._write({"kind": "header", "version": 1, "started": started, "symbols": list(symbols)})
+
+    def _write(self, record: Dict[str, Any]):
+        with self.lock:
+            self.file.write(json.dumps(record, separators=(",", ":"), default=float) + "\n")
+
+    def record_history(self, history: Dict[str, Dict[str, List[float]]]):
+        self._write({"kind": "history", "data": history})
+
+    def record_quotes(self, ts: float, quotes: Dict[str, Dict[str, Any]]):
+        changed = {s: dict(q) for s, q in quotes.items() if self.last.get(s) != q}
+        gone = [s for s in self.last if s not in quotes]
+        for s in gone: del self.last[s]
+        self.last.update(changed)
+        self._write({"kind": "quotes", "t": ts, "data": changed, "gone": gone})
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+def read_recording(path: str) -> Iterator[Dict[str, Any]]:
+    with _open(path, "r") as f:
+        for line in f:
+            if line.strip(): yield json.loads(line)
+
+class ReplayFeed:
+    """Serves the recorded daily history to run_pre_market; quotes are pushed by replay_session."""
+    batch_size = 1_000_000 # everything in one pre-market batch
+    batch_pause = 0.0
+
+    def __init__(self, history: Dict[str, Dict[str, List[float]]]):
+        self.history = history
+
+    def get_history_batch(self, symbols: List[str], days: int = 60) -> Dict[str, Dict[str, List[float]]]:
+        return {s: {f: v[-days:] for f, v in self.history[s].items()} for s in symbols if s in self.history}
+
+def replay_session(path: str, speed: float = 0.0, journal_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Replay a recording through a fresh engine and return a summary with every
+    signal (in order), order counts by status and the session PnL.
+    """
+    from main import TradingEngine
+    from core.history import history
+
+    records = read_recording(path)
+    header = next(records, None)
+    if not header or header.get("kind") != "header":
+        raise ValueError(f"{path} is not a session recording")
+    clock = SimClock(header["started"], speed)
+    signals_log = history.events["signals"]
+    first_seq = signals_log.base_seq + len(signals_log)
+
+    engine, executor = None, ThreadPoolExecutor(max_workers=1) # one worker keeps tick order fixed
+    recorded_history: Dict[str, Dict[str, List[float]]] = {}
+    quotes: Dict[str, Dict[str, Any]] = {}
+    cycles, wall_start = 0, time.perf_counter()
+    try:
+        for record in records:
+            if record["kind"] == "history":
+                recorded_history.update(record["data"])
+                continue
+            if record["kind"] != "quotes": continue
+            if engine is None:
+                engine = TradingEngine(clock=clock, data_feed=ReplayFeed(recorded_history), persist=False)
+                engine.ai_analyzer.api_key = None
+                engine.order_router.workers = 0 # synchronous routing: fills land in the cycle that placed them
+                if journal_path:
+                    from core.journal import Journal
+                    engine.journal = Journal(journal_path, mode="REPLAY", data_feed="ReplayFeed",
+                                             capital=engine.initial_capital)
+                engine.watchlist = list(header["symbols"])
+                engine.run_pre_market()
+
+            clock.advance_to(record["t"])
+            for s in record.get("gone", ()): quotes.pop(s, None)
+            quotes.update(record["data"])
+            if not engine.risk_manager.check_constraints():
+                engine.log("Risk limit reached. Halting replay.")
+                break
+            engine.run_cycle(dict(quotes), executor)
+            engine.order_router.poll()
+            cycles += 1
+    finally:
+        executor.shutdown()
+        if engine is not None and engine.journal: engine.journal.close()
+
+    signals, cursor = [], first_seq - 1
+    while cursor is not None:
+        page = signals_log.query(cursor=cursor, limit=5000)
+        signals += [{k: v for k, v in e.items() if k != "seq"} for e in page["items"]]
+        cursor = page["next_cursor"]
+    wall = time.perf_counter() - wall_start
+    sim = clock.time() - header["started"]
+    return {
+        "cycles": cycles,
+        "sim_seconds": round(sim, 3),
+        "wall_seconds": round(wall, 3),
+        "speedup": round(sim / wall, 1) if wall > 0 else None,
+        "signals": signals,
+        "orders": dict(Counter(r.status for r in engine.order_router.records.values())) if engine else {},
+        "pnl": engine.session_pnl if engine else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded AG_TRADER session")
+    parser.add_argument("recording", help="File written with RECORD_SESSION_PATH")
+    parser.add_argument("--speed", type=float, default=0.0, help="Multiple of real time (0 = as fast as possible)")
+    parser.add_argument("--out", help="Write the replayed signals here as JSON lines")
+    parser.add_argument("--journal", help="Journal the replay into this SQLite file")
+    args = parser.parse_args()
+
+    summary = replay_session(args.recording, speed=args.speed, journal_path=args.journal)
+    if args.out:
+        with open(args.out, "w") as f:
+            for signal in summary["signals"]:
+                f.write(json.dumps(signal, sort_keys=True) + "\n")
+    print(f"[REPLAY] {summary['cycles']} cycles, {summary['sim_seconds']:.0f}s of session in "
+          f"{summary['wall_seconds']:.1f}s ({summary['speedup']}x)")
+    print(f"[REPLAY] {len(summary['signals'])} signals, orders {summary['orders']}, PnL {summary['pnl']:.2f}")
+
+if __name__ == "__main__":
+    main()
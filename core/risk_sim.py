@@ -0,0 +1,139 @@
+"""
+Monte Carlo check of the session risk limits and position sizing.
+
+Bootstraps synthetic sessions from historical trade outcomes and applies the
+RiskManager rules to every path at once as NumPy arrays:
+
+    python -m core.risk_sim trades.csv                        # limits from Settings, 10% sizing
+    python -m core.risk_sim trades.csv --paths 1000000 --sessions 20 --sizes 5,10,20
+
+trades.csv needs a pnl_pct column (per-trade move in % of the position); a
+JSON list of numbers or JSON lines with "pnl_pct" also work.
+"""
+import argparse
+import csv
+import json
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+CHUNK_ROWS = 1_000_000 # sessions simulated per pass (bounds memory at ~tens of MB)
+PERCENTILES = (50, 90, 95, 99)
+
+def load_outcomes(path: str) -> np.ndarray:
+    """Per-trade PnL in % of position from .csv (pnl_pct column), a JSON list or JSON lines."""
+    with open(path) as f:
+        if path.endswith(".csv"):
+            return np.array([float(row["pnl_pct"]) for row in csv.DictReader(f) if row.get("pnl_pct")])
+        text = f.read().strip()
+    if text.startswith("["):
+        return np.array([float(x["pnl_pct"] if isinstance(x, dict) else x) for x in json.loads(text)])
+    return np.array([float(json.loads(line)["pnl_pct"]) for line in text.splitlines() if line.strip()])
+
+def simulate_sessions(pnl: np.ndarray, max_drawdown: float, max_losses: int) -> Dict[str, np.ndarray]:
+    """
+    RiskManager rules over [sessions x max_trades] trade PnL (% of capital), in
+    trade order. A session stops after the trade that trips a limit, exactly
+    like record_trade: trade count, session PnL <= -max_drawdown, or
+    max_losses losses in a row (a loss is pnl <= 0).
+    """
+    rows, max_trades = pnl.shape
+    k = np.arange(max_trades)
+    cum = np.cumsum(pnl, axis=1)
+    last_win = np.maximum.accumulate(np.where(pnl > 0, k, -1), axis=1)
+    streak = k - last_win
+
+    by_drawdown = cum <= -max_drawdown
+    by_losses = streak >= max_losses
+    stop = np.argmax(by_drawdown | by_losses | (k == max_trades - 1), axis=1)
+    r = np.arange(rows)
+
+    taken = k <= stop[:, None]
+    peak = np.maximum.accumulate(np.maximum(np.where(taken, cum, -np.inf), 0.0), axis=1)
+    drawdown = np.where(taken, peak - cum, 0.0).max(axis=1)
+    # Drawdown is checked before losses, mirroring the order reasons are reported in
+    reason = np.where(by_drawdown[r, stop], 1, np.where(by_losses[r, stop], 2, 0))
+    return {"pnl": cum[r, stop], "trades": stop + 1, "drawdown": drawdown, "reason": reason}
+
+def run_simulation(outcomes: Sequence[float], paths: int = 100_000, sessions: int = 1,
+                   position_pct: float = 10.0, max_trades: int = 3, max_drawdown: float = 1.5,
+                   max_losses: int = 2, ruin_pct: float = 10.0, seed: Optional[int] = 0) -> Dict[str, Any]:
+    """
+    `paths` equity paths of `sessions` sessions each, trades resampled with
+    replacement from `outcomes` and sized at position_pct of capital. Ruin is
+    the equity falling ruin_pct below where the path started.
+    """
+    outcomes = np.asarray(outcomes, dtype=float)
+    if not len(outcomes): raise ValueError("No trade outcomes to bootstrap from")
+    rng = np.random.default_rng(seed)
+    scale = position_pct / 100.0
+    total = paths * sessions
+    session_pnl = np.empty(total)
+    drawdown = np.empty(total)
+    trades = np.empty(total, dtype=np.int32)
+    reason = np.empty(total, dtype=np.int8)
+    for start in range(0, total, CHUNK_ROWS):
+        n = min(CHUNK_ROWS, total - start)
+        pnl = outcomes[rng.integers(0, len(outcomes), size=(n, max_trades))] * scale
+        out = simulate_sessions(pnl, max_drawdown, max_losses)
+        sl = slice(start, start + n)
+        session_pnl[sl], drawdown[sl], trades[sl], reason[sl] = out["pnl"], out["drawdown"], out["trades"], out["reason"]
+
+    # Sessions compound along each path
+    equity = np.cumprod(1.0 + session_pnl.reshape(paths, sessions) / 100.0, axis=1)
+    peak = np.maximum.accumulate(np.maximum(equity, 1.0), axis=1)
+    path_drawdown = ((peak - equity) / peak).max(axis=1) * 100.0
+    final = (equity[:, -1] - 1.0) * 100.0
+
+    def dist(x: np.ndarray) -> Dict[str, float]:
+        return {"mean": round(float(x.mean()), 4), **{f"p{p}": round(float(v), 4) for p, v in zip(PERCENTILES, np.percentile(x, PERCENTILES))}}
+
+    return {
+        "paths": paths,
+        "sessions": sessions,
+        "position_pct": position_pct,
+        "limits": {"max_trades": max_trades, "max_drawdown": max_drawdown, "max_losses": max_losses},
+        "session_pnl_pct": dist(session_pnl),
+        "session_drawdown_pct": dist(drawdown),
+        "trades_per_session": round(float(trades.mean()), 3),
+        "kill_switch": {
+            "drawdown": round(float((reason == 1).mean()), 5),
+            "consecutive_losses": round(float((reason == 2).mean()), 5),
+            "trade_cap": round(float((reason == 0).mean()), 5),
+        },
+        "path_return_pct": dist(final),
+        "path_drawdown_pct": dist(path_drawdown),
+        "ruin_probability": round(float((equity.min(axis=1) <= 1.0 - ruin_pct / 100.0).mean()), 6),
+    }
+
+def main():
+    from config.settings import config
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of the AG_TRADER session risk limits")
+    parser.add_argument("outcomes", help="Historical trade outcomes (.csv with pnl_pct, JSON list or JSON lines)")
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--sessions", type=int, default=1, help="Sessions per path (equity compounds across them)")
+    parser.add_argument("--sizes", default="10", help="Comma separated position sizes, %% of capital per trade")
+    parser.add_argument("--max-trades", type=int, default=config.MAX_TRADES_PER_SESSION)
+    parser.add_argument("--max-drawdown", type=float, default=config.MAX_SESSION_DRAWDOWN_PCT)
+    parser.add_argument("--max-losses", type=int, default=config.MAX_CONSECUTIVE_LOSSES)
+    parser.add_argument("--ruin-pct", type=float, default=10.0, help="Path drawdown that counts as ruin")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print full results as JSON")
+    args = parser.parse_args()
+
+    outcomes = load_outcomes(args.outcomes)
+    print(f"[RISK_SIM] {len(outcomes)} outcomes, win rate {np.mean(outcomes > 0):.1%}, mean {outcomes.mean():.3f}%")
+    results = []
+    for size in (float(s) for s in args.sizes.split(",")):
+        res = run_simulation(outcomes, args.paths, args.sessions, size, args.max_trades,
+                             args.max_drawdown, args.max_losses, args.ruin_pct, args.seed)
+        results.append(res)
+        ks = res["kill_switch"]
+        print(f"[RISK_SIM] size {size:>5.1f}%  session PnL p50 {res['session_pnl_pct']['p50']:+.3f}%  "
+              f"DD p95 {res['session_drawdown_pct']['p95']:.3f}%  kill dd {ks['drawdown']:.2%} "
+              f"losses {ks['consecutive_losses']:.2%}  path DD p99 {res['path_drawdown_pct']['p99']:.2f}%  "
+              f"ruin {res['ruin_probability']:.4%}")
+    if args.json: print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+import math
+import multiprocessing as mp
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import config
+from core.indicators import get_regime
+from core.levels import tick_levels
+from core.metrics import metrics
+
+FIELDS = ("open", "high", "low", "close", "volume")
+# Header slots (int64): write sequence (odd while writing), symbol count,
+# coordinator's tsd_count, the snapshot seq the coordinator released to workers,
+# the session ("day") the workers' levels/regimes must be from, and the engine
+# clock (ms) for the released snapshot
+SEQ, COUNT, TSD, READY, DAY, CLOCK_MS = range(6)
+HEADER_SLOTS = 8
+
+class SharedSnapshot:
+    """
+    One [n_symbols x OHLCV] float64 market snapshot in shared memory, guarded by a
+    seqlock: the single writer bumps the sequence to odd, copies, bumps to even;
+    readers retry if the sequence moved underneath them. Missing quotes are NaN.
+    """
+    def __init__(self, n_symbols: int, name: Optional[str] = None, create: bool = False):
+        size = (HEADER_SLOTS + max(1, n_symbols) * len(FIELDS)) * 8
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        if not create:
+            # Only the creator owns the segment; stop this process's tracker from unlinking it
+            try: resource_tracker.unregister(self.shm._name, "shared_memory")
+            except Exception: pass
+        self.name = self.shm.name
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray((n_symbols, len(FIELDS)), dtype=np.float64, buffer=self.shm.buf, offset=HEADER_SLOTS * 8)
+        if create:
+            self.header[:] = 0
+            self.header[COUNT] = n_symbols
+            self.data[:] = np.nan
+
+    @property
+    def seq(self) -> int:
+        return int(self.header[SEQ])
+
+    def publish(self, values: np.ndarray):
+        self.header[SEQ] += 1
+        self.data[:] = values
+        self.header[SEQ] += 1
+
+    def read(self, lo: int = 0, hi: Optional[int] = None) -> Tuple[np.ndarray, int]:
+        hi = self.data.shape[0] if hi is None else hi
+        while True:
+            before = int(self.header[SEQ])
+            if before & 1:
+                time.sleep(0.0005)
+                continue
+            rows = self.data[lo:hi].copy()
+            if int(self.header[SEQ]) == before:
+                return rows, before
+
+    def release(self, seq: int, tsd_count: int, day: int = 0, ts: float = 0.0):
+        """Coordinator hands a snapshot (and the regime, session and time for it) to the workers."""
+        self.header[TSD] = tsd_count
+        self.header[DAY] = day
+        self.header[CLOCK_MS] = int(round(ts * 1000))
+        self.header[READY] = seq
+
+    def close(self, unlink: bool = False):
+        self.header = self.data = None
+        self.shm.close()
+        if unlink:
+            try: self.shm.unlink()
+            except FileNotFoundError: pass
+
+def changed_rows(values: np.ndarray, prev: np.ndarray) -> np.ndarray:
+    """Rows with a live close whose OHLCV differs from prev (NaN equals NaN); prev is updated in place."""
+    same = ((values == prev) | (np.isnan(values) & np.isnan(prev))).all(axis=1)
+    rows = np.flatnonzero((values[:, 3] > 0) & ~same) # NaN compares False
+    prev[rows] = values[rows]
+    return rows
+
+def make_feed(name: str, symbols: List[str]):
+    """Construct the data feed inside the fetcher process (broker clients don't pickle)."""
+    if name == "SYNTHETIC":
+        from brokers.synthetic import SyntheticBroker
+        return SyntheticBroker(symbols, seed=config.SYNTHETIC_SEED,
+                               regime_switch_prob=config.SYNTHETIC_REGIME_SWITCH_PROB,
+                               latency_ms=config.SYNTHETIC_LATENCY_MS,
+                               latency_jitter_ms=config.SYNTHETIC_LATENCY_JITTER_MS,
+                               error_rate=config.SYNTHETIC_ERROR_RATE,
+                               auth_error_rate=config.SYNTHETIC_AUTH_ERROR_RATE)
+    if name == "DHAN":
+        from brokers.dhan import DhanBroker
+        return DhanBroker(config.DHAN_CLIENT_ID, config.DHAN_ACCESS_TOKEN, config.DHAN_SCRIP_MASTER_PATH)
+    if name == "KITE":
+        from brokers.kite import KiteBroker
+        return KiteBroker(config.KITE_API_KEY, config.KITE_ACCESS_TOKEN)
+    if name == "AUTO":
+        from brokers.composite import CompositeFeed
+        names = [n.strip().upper() for n in config.FEED_SOURCES.split(",") if n.strip().upper() != "AUTO"]
+        feeds = [(n, make_feed(n, symbols)) for n in names]
+        feeds = [(n, f) for n, f in feeds if n != "DHAN" or f.quotable] # no security ids: nothing to quote
+        return CompositeFeed.from_config(feeds, config)
+    from brokers.mock import MockBroker
+    return MockBroker.from_config(config) # same construction as the single-process engine
+
+def fetcher_main(shm_name: str, symbols: List[str], feed_name: str, cycle_sec: float, stop):
+    """Fetcher process: poll the feed for the whole watchlist, publish one snapshot per cycle."""
+    snapshot = SharedSnapshot(len(symbols), name=shm_name)
+    feed = make_feed(feed_name, symbols)
+    index = {s: i for i, s in enumerate(symbols)}
+    size = getattr(feed, "batch_size", 50)
+    pause = getattr(feed, "batch_pause", 0.2)
+    values = np.full((len(symbols), len(FIELDS)), np.nan)
+    try:
+        while not stop.is_set():
+            start = time.time()
+            for i in range(0, len(symbols), size):
+                try:
+                    batch = feed.get_market_data_batch(symbols[i:i + size])
+                except Exception as e:
+                    print(f"[SHARD] Fetch error: {e}")
+                    batch = {}
+                for s, q in batch.items():
+                    row = index.get(s)
+                    if row is not None:
+                        values[row] = [q.get(f, np.nan) for f in FIELDS]
+                if pause: time.sleep(pause)
+            snapshot.publish(values)
+            stop.wait(max(0.0, cycle_sec - (time.time() - start)))
+    finally:
+        snapshot.close()
+
+def worker_main(worker_id: int, shm_name: str, n_symbols: int, lo: int, hi: int, symbols: List[str],
+                results, control, stop):
+    """
+    Shard worker: evaluates the changed symbols of [lo, hi) against each released
+    snapshot and sends back (worker_id, seq, new levels, signals). Levels are
+    owned here; each session's history-based levels (row -> levels) and
+    per-symbol regimes come from the coordinator over `control`, tagged with
+    the session number the snapshot header asks for.
+    """
+    from core.bars import BarBuilder
+    from core.indicator_graph import IndicatorGraph, register_default_indicators
+    from strategies.runtime import StrategyRuntime
+    snapshot = SharedSnapshot(n_symbols, name=shm_name)
+    levels, new_levels = {}, {}
+    state = {"tsd_count": 0, "day": 0, "regimes": None}
+    timeframe = config.BAR_SIGNAL_TIMEFRAME_MIN * 60
+    # Bars for this shard only, keyed by position k within the shard
+    bars = BarBuilder(timeframes=(timeframe,), capacity=config.BAR_HISTORY, n_symbols=hi - lo)
+    prev = np.full((hi - lo, len(FIELDS)), np.nan)
+
+    def levels_for(k: int, data: dict) -> dict:
+        row = lo + k
+        lvl = levels.get(row)
+        if lvl is None:
+            lvl = levels[row] = new_levels[row] = tick_levels(data['close'], data['high'], data['low'])
+        return lvl
+
+    def regime_for(k: int) -> str:
+        return state["regimes"][k] if state["regimes"] else get_regime(state["tsd_count"])
+
+    graph = IndicatorGraph()
+    # A row's levels change only with a new session (or when first derived); regimes likewise, or with the TSD count
+    register_default_indicators(graph, levels_for, regime_for, bars=bars, timeframe=timeframe,
+                                levels_key=lambda k: (state["day"], lo + k in levels),
+                                regime_key=lambda k: (state["day"], 0 if state["regimes"] else state["tsd_count"]))
+    runtime = StrategyRuntime.from_names(graph, config.STRATEGIES, config)
+    last_ready = 0
+    try:
+        while not stop.is_set():
+            ready = int(snapshot.header[READY])
+            if ready == last_ready:
+                time.sleep(0.002)
+                continue
+            day = int(snapshot.header[DAY])
+            while state["day"] != day and not stop.is_set():
+                try: state["day"], day_levels, state["regimes"] = control.get(timeout=0.1)
+                except queue.Empty: continue
+                levels.clear()
+                levels.update(day_levels)
+                prev[:] = np.nan # new levels/regimes: re-evaluate unchanged quotes too
+            last_ready = ready
+            rows, seq = snapshot.read(lo, hi)
+            state["tsd_count"] = int(snapshot.header[TSD])
+            now = int(snapshot.header[CLOCK_MS]) / 1000
+
+            new_levels.clear()
+            signals = []
+            dirty = changed_rows(rows, prev)
+            if dirty.size:
+                bars.update(dirty, rows[dirty, 3], np.nan_to_num(rows[dirty, 4]), now)
+            for k in dirty.tolist():
+                o, h, l, c, v = rows[k].tolist()
+                row = lo + k # row in the watchlist, not a registry id
+                market_data = {"open": o, "high": h, "low": l, "close": c, "volume": v, "symbol": symbols[k]}
+                for signal in runtime.evaluate(k, symbols[k], market_data, bars.closed(k, timeframe)):
+                    signals.append((row, signal, c))
+            results.put((worker_id, seq, dict(new_levels), signals))
+    finally:
+        snapshot.close()
+
+class ShardCoordinator:
+    """
+    Sharded execution: one fetcher process publishes snapshots into shared memory,
+    N worker processes evaluate contiguous shards of the watchlist, and this process
+    (the engine) owns the session roll, regime, bars, risk, planned trades and
+    order routing. Like run_cycle, only quotes that changed since the previous
+    snapshot move bars, plans and (in the workers) signals.
+    """
+    def __init__(self, engine, n_workers: int, cycle_sec: float = 3.0):
+        self.engine = engine
+        self.n_workers = max(1, n_workers)
+        self.cycle_sec = cycle_sec
+        self.day = 0 # session number the workers' levels/regimes belong to
+        self.last_seq = 0
+        self.procs: list = []
+
+    def start(self, fetcher: bool = True):
+        """Spawn the fetcher (unless snapshots are published by the caller) and the workers."""
+        engine = self.engine
+        self.symbols = list(engine.watchlist)
+        self.sids = np.asarray(engine.registry.ids_for(self.symbols), dtype=np.intp)
+        self.index = {s: k for k, s in enumerate(self.symbols)}
+        n = len(self.symbols)
+        ctx = mp.get_context("spawn")
+        self.stop = ctx.Event()
+        self.results = ctx.Queue()
+        self.controls = [ctx.Queue() for _ in range(self.n_workers)]
+        self.snapshot = SharedSnapshot(n, create=True)
+        self.prev = np.full((n, len(FIELDS)), np.nan)
+        self.bounds = np.linspace(0, n, self.n_workers + 1).astype(int)
+
+        if fetcher:
+            self.procs.append(ctx.Process(target=fetcher_main, daemon=True, name="shard-fetcher",
+                                          args=(self.snapshot.name, self.symbols, config.DATA_FEED, self.cycle_sec, self.stop)))
+        for w in range(self.n_workers):
+            lo, hi = int(self.bounds[w]), int(self.bounds[w + 1])
+            self.procs.append(ctx.Process(target=worker_main, daemon=True, name=f"shard-worker-{w}",
+                                          args=(w, self.snapshot.name, n, lo, hi, self.symbols[lo:hi],
+                                                self.results, self.controls[w], self.stop)))
+        self._send_session()
+        for p in self.procs: p.start()
+        engine.log(f"[SHARD] {self.n_workers} workers over {n} symbols (fetcher: {config.DATA_FEED if fetcher else 'external'}).")
+
+    def _send_session(self):
+        """Each shard's levels and regimes for the current session; workers pick them up with the next snapshot."""
+        engine = self.engine
+        self.day += 1
+        for w, control in enumerate(self.controls):
+            lo, hi = int(self.bounds[w]), int(self.bounds[w + 1])
+            sids = self.sids[lo:hi].tolist()
+            levels = {row: engine.levels[sid] for row, sid in enumerate(sids, lo) if sid in engine.levels}
+            control.put((self.day, levels, [engine.regimes.regime(sid) for sid in sids]))
+
+    def step(self, executor) -> bool:
+        """One cycle over the newest snapshot; False if there is none yet."""
+        engine, snapshot = self.engine, self.snapshot
+        seq = snapshot.seq
+        if seq == self.last_seq or seq & 1: return False
+        with metrics.timer("ag_stage_latency_seconds", stage="cycle"):
+            if engine.session_date != engine.clock.today():
+                engine.roll_session()
+                self._send_session()
+            values, seq = snapshot.read()
+            self.last_seq = seq
+            now = engine.clock.time()
+            snapshot.release(seq, engine.tsd_count, self.day, now)
+
+            rows = changed_rows(values, self.prev)
+            if rows.size:
+                sids = self.sids[rows]
+                dirty = {self.symbols[k]: dict(zip(FIELDS, values[k].tolist())) for k in rows.tolist()}
+                with metrics.timer("ag_stage_latency_seconds", stage="bars"):
+                    engine.bars.update_quotes(sids, dirty.values(), now)
+                engine.proximity.update(sids, values[rows, 3])
+                if engine.correlation is not None:
+                    engine.correlation.update(sids, values[rows, 3], now)
+                    engine.correlation.cluster_labels()
+                engine.last_quotes.update(dirty)
+                if engine.recorder: engine.recorder.record_quotes(now, engine.last_quotes)
+                if not engine.position_symbols.isdisjoint(dirty): engine.positions_stale = True
+                metrics.counter("ag_changed_quotes_total").inc(len(dirty))
+
+            with metrics.timer("ag_stage_latency_seconds", stage="tick_eval"):
+                signals = self._collect(seq)
+            # AI confirmation can take seconds: keep it off the coordinator loop
+            if not engine.kill_switch:
+                for k, signal, price in signals:
+                    executor.submit(engine.handle_signal, self.symbols[k], signal, price, engine.levels[int(self.sids[k])])
+
+            # Plans move with changed quotes, plus every quoted symbol after a session roll (pending_eval)
+            refresh = set(rows.tolist())
+            refresh.update(self.index[s] for s in engine.pending_eval if s in self.index)
+            engine.pending_eval = {}
+            for k in sorted(refresh):
+                sid = int(self.sids[k])
+                lvl = engine.levels.get(sid)
+                if lvl and values[k, 3] > 0: engine.update_planned_trades(sid, self.symbols[k], float(values[k, 3]), lvl)
+            with metrics.timer("ag_stage_latency_seconds", stage="dashboard_sync"):
+                engine.update_dashboard()
+        metrics.counter("ag_cycles_total").inc()
+        return True
+
+    def run(self):
+        engine = self.engine
+        self.start()
+        try:
+            with ThreadPoolExecutor(max_workers=20) as executor:
+                while True:
+                    if not engine.risk_manager.check_constraints():
+                        engine.log("Risk limit reached. Halting.")
+                        break
+                    if not self.step(executor): time.sleep(0.01)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        self.stop.set()
+        for p in self.procs: p.join(timeout=5)
+        self.snapshot.close(unlink=True)
+
+    def _collect(self, seq: int) -> list:
+        """Gather one result per worker for this snapshot; stale messages are dropped."""
+        engine = self.engine
+        pending = set(range(self.n_workers))
+        signals = []
+        deadline = time.time() + self.cycle_sec * 2
+        while pending and time.time() < deadline:
+            try:
+                worker_id, worker_seq, new_levels, worker_signals = self.results.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            for k, lvl in new_levels.items():
+                engine.levels[int(self.sids[k])] = lvl
+            if new_levels: engine.proximity.refresh([int(self.sids[k]) for k in new_levels])
+            if worker_seq < seq: continue
+            pending.discard(worker_id)
+            signals.extend(worker_signals)
+        if pending:
+            engine.log(f"[SHARD] Workers {sorted(pending)} missed snapshot {seq}.")
+        return signals
@@ -0,0 +1,101 @@
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+# Layout: [version u64][current slot u64] then two slots of [seq u64][length u64][payload]
+HEADER = struct.Struct("<QQ")
+SLOT_HEADER = struct.Struct("<QQ")
+SLOT_START = 64
+
+class StateWriter:
+    """
+    Publishes state snapshots (bytes, e.g. JSON) into a shared-memory segment
+    for another process to read without any locking between the two.
+
+    Double buffer with a per-slot seqlock: each publish goes into the slot the
+    readers are not pointed at (seq odd while writing), then flips `current`.
+    A reader only retries if the writer lapped it twice during one copy.
+    """
+    def __init__(self, name: str, size: int = 8 * 1024 * 1024):
+        self.name = name
+        self.slot_size = (size - SLOT_START) // 2
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a crashed engine; readers re-attach by name
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.buf = self.shm.buf
+        self.version = 0
+        self.current = 0
+        HEADER.pack_into(self.buf, 0, 0, 0)
+
+    def publish(self, payload: bytes) -> bool:
+        """False (and nothing published) if the payload does not fit a slot."""
+        if len(payload) > self.slot_size - SLOT_HEADER.size:
+            print(f"[STATE] Snapshot of {len(payload)} bytes exceeds the {self.slot_size} byte slot; skipped.")
+            return False
+        slot = 1 - self.current
+        offset = SLOT_START + slot * self.slot_size
+        seq = SLOT_HEADER.unpack_from(self.buf, offset)[0]
+        SLOT_HEADER.pack_into(self.buf, offset, seq + 1, len(payload)) # odd: write in progress
+        start = offset + SLOT_HEADER.size
+        self.buf[start:start + len(payload)] = payload
+        SLOT_HEADER.pack_into(self.buf, offset, seq + 2, len(payload))
+        self.version += 1
+        self.current = slot
+        HEADER.pack_into(self.buf, 0, self.version, slot)
+        return True
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        self.shm.unlink()
+
+class StateReader:
+    """
+    Read side of StateWriter. On Linux the segment is mapped read-only from
+    /dev/shm, so the reader can never corrupt it.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.shm = None
+        path = f"/dev/shm/{name.lstrip('/')}"
+        if os.path.exists(path):
+            import mmap
+            with open(path, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.buf = memoryview(self.map)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            try: # the writer owns the segment; don't let this process's tracker unlink it
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+            except Exception:
+                pass
+            self.buf = self.shm.buf
+        self.slot_size = (len(self.buf) - SLOT_START) // 2
+
+    def read(self, retries: int = 100) -> Tuple[int, Optional[bytes]]:
+        """(version, payload) of the latest complete snapshot; (0, None) before the first publish."""
+        for _ in range(retries):
+            version, slot = HEADER.unpack_from(self.buf, 0)
+            if version == 0: return 0, None
+            offset = SLOT_START + slot * self.slot_size
+            seq, length = SLOT_HEADER.unpack_from(self.buf, offset)
+            if seq % 2 == 0:
+                start = offset + SLOT_HEADER.size
+                payload = bytes(self.buf[start:start + length])
+                if SLOT_HEADER.unpack_from(self.buf, offset)[0] == seq:
+                    return version, payload
+            time.sleep(0)
+        raise RuntimeError(f"State segment {self.name} kept changing during {retries} reads")
+
+    def close(self):
+        self.buf.release()
+        if self.shm is not None: self.shm.close()
+        else: self.map.close()
@@ -0,0 +1,100 @@
+import csv
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from config.universe import NSE_UNIVERSE, SECTORS
+
+def normalize_symbol(symbol: str) -> str:
+    """'tcs', 'TCS.NS' and ' TCS ' all map to 'TCS'."""
+    symbol = symbol.strip().upper()
+    return symbol.split('.')[0] if '.' in symbol else symbol
+
+class SymbolRegistry:
+    """
+    Assigns every instrument a dense integer id (0..n-1) and precomputes the
+    broker-specific identifiers, so hot paths index lists/arrays by id instead
+    of rebuilding strings every cycle. Ids are append-only and never reused.
+    """
+    def __init__(self, symbols: Iterable[str] = (), sectors: Optional[Dict[str, str]] = None):
+        self.sector_map = sectors if sectors is not None else SECTORS
+        self.lock = threading.Lock()
+        self.symbols: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.yahoo: List[str] = []
+        self.dhan_security_ids: List[Optional[str]] = []
+        self.sectors: List[str] = []
+        for s in symbols:
+            self.add(s)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return self.id(symbol) is not None
+
+    def add(self, symbol: str) -> int:
+        """Register a symbol (idempotent) and return its id."""
+        sid = self.id(symbol)
+        if sid is not None: return sid
+        base = normalize_symbol(symbol)
+        with self.lock:
+            if base in self.ids: return self.ids[base]
+            sid = len(self.symbols)
+            self.symbols.append(base)
+            self.yahoo.append(f"{base}.NS")
+            self.dhan_security_ids.append(None)
+            self.sectors.append(self.sector_map.get(base, "UNKNOWN"))
+            self.ids[base] = sid
+            # Also resolve the raw spelling without normalizing next time
+            self.ids[symbol] = sid
+            return sid
+
+    def id(self, symbol: str) -> Optional[int]:
+        sid = self.ids.get(symbol)
+        if sid is None:
+            sid = self.ids.get(normalize_symbol(symbol))
+        return sid
+
+    def symbol(self, sid: int) -> str:
+        return self.symbols[sid]
+
+    def yahoo_ticker(self, symbol: str) -> str:
+        sid = self.id(symbol)
+        if sid is not None: return self.yahoo[sid]
+        return symbol if "." in symbol else f"{symbol}.NS"
+
+    def ids_for(self, symbols: Iterable[str]) -> List[int]:
+        return [self.add(s) for s in symbols]
+
+    def attach_dhan_security_ids(self, security_ids: Dict[str, str]):
+        for sid, base in enumerate(self.symbols):
+            sec = security_ids.get(base)
+            if sec is not None:
+                self.dhan_security_ids[sid] = str(sec)
+
+    def load_dhan_scrip_master(self, path: str):
+        """Read NSE equity security ids from Dhan's api-scrip-master.csv."""
+        security_ids = {}
+        try:
+            with open(path, newline='') as f:
+                for row in csv.DictReader(f):
+                    if row.get("SEM_EXM_EXCH_ID") == "NSE" and row.get("SEM_SERIES") == "EQ":
+                        security_ids[row["SEM_TRADING_SYMBOL"]] = row["SEM_SMST_SECURITY_ID"]
+        except Exception as e:
+            print(f"[SYMBOLS] Dhan scrip master load error: {e}")
+            return
+        self.attach_dhan_security_ids(security_ids)
+
+_registry: Optional[SymbolRegistry] = None
+
+def load_registry(symbols: Iterable[str] = NSE_UNIVERSE) -> SymbolRegistry:
+    """Build the process-wide registry. Called once at engine startup."""
+    global _registry
+    _registry = SymbolRegistry(symbols)
+    return _registry
+
+def get_registry() -> SymbolRegistry:
+    global _registry
+    if _registry is None:
+        _registry = SymbolRegistry(NSE_UNIVERSE)
+    return _registry
@@ -0,0 +1,187 @@
+"""
+Tick-to-trade tracing, exported as Chrome trace JSON (chrome://tracing, ui.perfetto.dev).
+
+Two kinds of traces share one span buffer:
+
+- cycle traces, head-sampled at sample_rate: every fetch chunk, engine stage
+  and per-symbol tick of the cycle;
+- signal traces, one per strategy signal (when `signals` is on): the fetch
+  chunk that carried the symbol, its wait in the tick pool, evaluation, the
+  filters (costs, AI), order submission, the router queue, place_order and
+  the broker's ack/fill, linked by a flow arrow across threads.
+
+Unsampled cycles only keep their chunk timings and dispatch time (a few
+tuples per cycle), so a signal can be traced back to its quote without
+tracing every tick. Timestamps are time.perf_counter_ns (monotonic).
+"""
+import collections
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+class CycleTrace:
+    """One engine cycle: its id, whether it is sampled in full, and the timings signal traces reach back to."""
+    __slots__ = ("id", "recording", "chunks", "chunk_of", "dispatch_ns", "evaluate")
+
+    def __init__(self, trace_id: int, sampled: bool):
+        self.id = trace_id
+        self.recording = sampled
+        self.chunks: List[Tuple[int, int, Sequence[str]]] = [] # (start ns, end ns, symbols)
+        self.chunk_of: Optional[Dict[str, int]] = None # symbol -> chunk, built on the cycle's first signal
+        self.dispatch_ns = 0 # ticks handed to the pool
+        self.evaluate: Optional[Tuple[int, int]] = None # batch evaluation (vectorized path)
+
+class SignalTrace:
+    """The path of one signal; always recorded."""
+    __slots__ = ("id", "symbol", "recording")
+
+    def __init__(self, trace_id: int, symbol: str):
+        self.id = trace_id
+        self.symbol = symbol
+        self.recording = True
+
+class _Span:
+    __slots__ = ("tracer", "name", "trace", "cat", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, trace, cat: str, args: Optional[Dict]):
+        self.tracer = tracer
+        self.name = name
+        self.trace = trace
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.add(self.name, self.start, time.perf_counter_ns(), self.trace, self.cat, self.args)
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+NO_SPAN = _NoSpan()
+
+class Tracer:
+    def __init__(self, sample_rate: float = 0.0, signals: bool = False, max_events: int = 200_000):
+        self.events: "collections.deque" = collections.deque() # (name, cat, start ns, end ns, tid, trace id, args)
+        self.thread_names: Dict[int, str] = {}
+        self.local = threading.local()
+        self._ids = itertools.count(1)
+        self.origin_ns = time.perf_counter_ns()
+        self.configure(sample_rate, signals, max_events)
+
+    def configure(self, sample_rate: float, signals: bool, max_events: int = 200_000):
+        self.sample_rate = sample_rate
+        self.signals = signals
+        self.enabled = sample_rate > 0 or signals
+        self.events = collections.deque(self.events, maxlen=max_events)
+
+    # --- Recording ---
+
+    def begin_cycle(self) -> Optional[CycleTrace]:
+        """A trace for the next engine cycle, or None when tracing is off."""
+        if not self.enabled: return None
+        return CycleTrace(next(self._ids), self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def span(self, name: str, trace, cat: str = "engine", **args):
+        """Context manager timing a span of `trace`; free when the trace isn't recording."""
+        if trace is None or not trace.recording: return NO_SPAN
+        return _Span(self, name, trace, cat, args or None)
+
+    def add(self, name: str, start_ns: int, end_ns: int, trace, cat: str = "engine", args: Optional[Dict] = None):
+        if trace is None or not trace.recording: return
+        tid = threading.get_ident()
+        if tid not in self.thread_names: self.thread_names[tid] = threading.current_thread().name
+        self.events.append((name, cat, start_ns, end_ns, tid, trace.id, args))
+
+    def bind(self, trace: Optional[CycleTrace], fn: Callable, name: str = "tick") -> Callable:
+        """
+        fn for a pool of tick threads, made once per cycle: each call records its
+        start (and, in sampled cycles, its queue wait and run) against the cycle.
+        """
+        if trace is None: return fn
+        trace.dispatch_ns = queued = time.perf_counter_ns()
+        local, now = self.local, time.perf_counter_ns
+
+        if not trace.recording: # the common case: just what a signal trace needs
+            def run(*args):
+                local.cycle, local.tick_ns = trace, now()
+                try: return fn(*args)
+                finally: local.cycle = None
+            return run
+
+        def run_sampled(*args):
+            start = now()
+            local.cycle, local.tick_ns = trace, start
+            try:
+                return fn(*args)
+            finally:
+                local.cycle = None
+                args = {"symbol": args[0]} if args else None
+                self.add("tick_queue", queued, start, trace, "tick", args)
+                self.add(name, start, now(), trace, "tick", args)
+        return run_sampled
+
+    def signal(self, symbol: str) -> Optional[SignalTrace]:
+        """
+        Start the trace of a signal handled on this thread (None when signal
+        tracing is off). Its upstream spans come from the cycle the tick belonged to.
+        """
+        if not self.signals: return None
+        local = self.local
+        trace = SignalTrace(next(self._ids), symbol)
+        cycle = getattr(local, "cycle", None)
+        if cycle is None: return trace
+        now = time.perf_counter_ns()
+        args = {"symbol": symbol, "cycle": cycle.id}
+        if cycle.chunk_of is None: # racing threads build the same map
+            cycle.chunk_of = {s: i for i, (_, _, symbols) in enumerate(cycle.chunks) for s in symbols}
+        chunk = cycle.chunk_of.get(symbol)
+        if chunk is not None:
+            start, end, symbols = cycle.chunks[chunk]
+            self.add("fetch_chunk", start, end, trace, "signal", {**args, "symbols": len(symbols)})
+        tick_ns = getattr(local, "tick_ns", 0)
+        if cycle.evaluate:
+            self.add("evaluate_batch", cycle.evaluate[0], cycle.evaluate[1], trace, "signal", args)
+        if cycle.dispatch_ns and tick_ns:
+            self.add("tick_queue", cycle.dispatch_ns, tick_ns, trace, "signal", args)
+            if not cycle.evaluate: self.add("evaluate", tick_ns, now, trace, "signal", args)
+        return trace
+
+    def clear(self):
+        self.events.clear()
+
+    # --- Export ---
+
+    def export(self, path: Optional[str] = None) -> Dict[str, Any]:
+        """Chrome trace JSON (written to path if given). Spans of one signal are chained by a flow."""
+        pid = os.getpid()
+        out: List[Dict[str, Any]] = [{"ph": "M", "name": "process_name", "pid": pid, "args": {"name": "ag-engine"}}]
+        tids: Dict[int, int] = {}
+        for tid, name in list(self.thread_names.items()):
+            tids[tid] = len(tids) + 1
+            out.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tids[tid], "args": {"name": name}})
+        flows = set()
+        for name, cat, start, end, tid, trace_id, args in sorted(list(self.events), key=lambda e: e[2]):
+            ts = (start - self.origin_ns) / 1000
+            t = tids.setdefault(tid, len(tids) + 1)
+            out.append({"name": name, "cat": cat, "ph": "X", "ts": ts, "dur": (end - start) / 1000,
+                        "pid": pid, "tid": t, "args": {"trace": trace_id, **(args or {})}})
+            if cat in ("signal", "order"):
+                out.append({"name": "signal", "cat": "flow", "ph": "t" if trace_id in flows else "s", "id": trace_id,
+                            "ts": ts, "pid": pid, "tid": t, "bp": "e"})
+                flows.add(trace_id)
+        doc = {"traceEvents": out, "displayTimeUnit": "ms"}
+        if path:
+            with open(path, "w") as f: json.dump(doc, f)
+        return doc
+
+tracer = Tracer()
@@ -1,17 +1,19 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response
 import threading
 import os
 import sys
 import asyncio
 import json
 from contextlib import asynccontextmanager
+from typing import Optional
 
 # Ensure project root is in path for cloud deployment
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from main import TradingEngine
 from config.settings import config
-from core.indicators import get_regime
+from core.history import EVENT_KINDS
+from core.engine_host import ControlClient, configured_authkey, handle_command, new_authkey
 
 try:
     from uvicorn.protocols.utils import ClientDisconnected
@@ -37,34 +39,43 @@ trading_state = {
     "initial_capital": 100000.0
 }
 
-# Global engine reference for the killswitch endpoint
+# ENGINE_MODE=thread: the engine runs inside this process
 engine_instance = None
+# ENGINE_MODE=process/external: state comes from shared memory, commands go over IPC
+engine_process = None
+state_reader = None
+control = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global engine_instance
+    global engine_instance, engine_process, control
+    if config.ENGINE_MODE in ("process", "external"):
+        if config.ENGINE_MODE == "process":
+            import multiprocessing
+            from core.engine_host import run_engine_process
+            authkey = new_authkey()
+            control = ControlClient(config.ENGINE_CONTROL_ADDRESS, authkey)
+            print("[API] Starting Trading Engine process...")
+            engine_process = multiprocessing.get_context("spawn").Process(
+                target=run_engine_process, args=(None, None, authkey), name="ag-engine", daemon=True)
+            engine_process.start()
+            print(f"[API] Trading Engine process launched (pid {engine_process.pid}).")
+        else:
+            control = ControlClient(config.ENGINE_CONTROL_ADDRESS, configured_authkey())
+            print(f"[API] Attaching to external Trading Engine ({config.ENGINE_STATE_SHM}).")
+        yield
+        print("[API] Shutting down...")
+        if state_reader: state_reader.close()
+        if engine_process: engine_process.terminate()
+        return
+
     # Startup: Initialize and start the engine
+    from main import TradingEngine
     print("[API] Starting background Trading Engine...")
     engine_instance = TradingEngine()
     
     def sync_update(current_symbol="MULTI"):
-        state = {
-            "regime": get_regime(engine_instance.tsd_count),
-            "tsd_count": engine_instance.tsd_count,
-            "risk_consumed": engine_instance.risk_manager.daily_pnl,
-            "max_drawdown": config.MAX_SESSION_DRAWDOWN_PCT,
-            "kill_switch": engine_instance.kill_switch,
-            "pnl": round(engine_instance.session_pnl, 2),
-            "current_symbol": current_symbol,
-            "watchlist": engine_instance.watchlist,
-            "positions": engine_instance.broker.get_positions(),
-            "planned_trades": engine_instance.planned_trades,
-            "logs": engine_instance.logs,
-            "paper_mode": engine_instance.paper_mode,
-            "initial_capital": engine_instance.initial_capital,
-            "equity_history": engine_instance.equity_history
-        }
-        trading_state.update(state)
+        trading_state.update(engine_instance.dashboard_state(current_symbol))
     
     engine_instance.on_update = sync_update
     thread = threading.Thread(target=engine_instance.start, daemon=True)
@@ -73,6 +84,31 @@ async def lifespan(app: FastAPI):
     yield
     print("[API] Shutting down...")
 
+def state_snapshot() -> bytes:
+    """Latest dashboard state as JSON bytes; from shared memory when the engine is out of process."""
+    global state_reader
+    if control is None:
+        return json.dumps(trading_state, default=str).encode()
+    if state_reader is None:
+        from core.state_channel import StateReader
+        try:
+            state_reader = StateReader(config.ENGINE_STATE_SHM)
+        except FileNotFoundError: # engine still starting
+            return json.dumps(trading_state).encode()
+    payload = state_reader.read()[1]
+    return payload if payload is not None else json.dumps(trading_state).encode()
+
+def engine_call(cmd: str, **args):
+    """Run a control command on the engine, in-process or over IPC. None if there is no engine."""
+    if control is not None:
+        try:
+            return control.call(cmd, **args)
+        except (OSError, EOFError) as e:
+            print(f"[API] Engine unreachable: {e}")
+            return None
+    if engine_instance is None: return None
+    return handle_command(engine_instance, cmd, args)
+
 app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
@@ -85,7 +121,7 @@ app.add_middleware(
 
 @app.get("/status")
 async def get_status():
-    return trading_state
+    return Response(content=state_snapshot(), media_type="application/json")
 
 @app.post("/update")
 async def update_state(request: Request):
@@ -97,39 +133,93 @@ async def update_state(request: Request):
 
 @app.post("/killswitch")
 def toggle_killswitch():
-    if engine_instance:
-        engine_instance.kill_switch = not engine_instance.kill_switch
-        engine_instance.update_dashboard()
-        status = "STOPPED" if engine_instance.kill_switch else "ARMED"
-        return {"status": status}
-    return {"status": "error"}
+    return engine_call("killswitch") or {"status": "error"}
 
 @app.post("/toggle_paper")
 def toggle_paper(data: dict):
-    if engine_instance:
-        enabled = data.get("enabled", True)
-        engine_instance.toggle_paper_mode(enabled)
-        return {"status": "success", "paper_mode": engine_instance.paper_mode}
-    return {"status": "error"}
+    return engine_call("toggle_paper", enabled=data.get("enabled", True)) or {"status": "error"}
 
 @app.post("/set_capital")
 def set_capital(data: dict):
-    if engine_instance:
-        amount = data.get("amount", 100000.0)
-        engine_instance.set_initial_capital(float(amount))
-        return {"status": "success", "capital": engine_instance.initial_capital}
-    return {"status": "error"}
+    return engine_call("set_capital", amount=float(data.get("amount", 100000.0))) or {"status": "error"}
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus scrape endpoint (stage latency histograms, broker errors, orders)."""
+    return PlainTextResponse(engine_call("metrics") or "", media_type="text/plain; version=0.0.4")
+
+@app.get("/history/equity")
+def get_equity_history(start: Optional[float] = None, end: Optional[float] = None, points: int = 1000):
+    """
+    Equity curve between start and end (epoch seconds), downsampled server-side
+    to at most `points` points (min/max per bucket, so peaks survive).
+    Response is columnar: {"t": [...], "v": [...], "count", "downsampled"}.
+    """
+    return engine_call("history_equity", start=start, end=end, points=max(0, min(points, 20000)))
+
+@app.get("/history/{kind}")
+def get_event_history(kind: str, start: Optional[float] = None, end: Optional[float] = None,
+                      symbol: Optional[str] = None, cursor: Optional[int] = None, limit: int = 100):
+    """
+    Orders, fills or signals in a time range, oldest first; pass next_cursor
+    back for the next page. Covers the running engine only (see the journal for
+    earlier sessions).
+    """
+    if kind not in EVENT_KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown history '{kind}'. Options: {', '.join(EVENT_KINDS)}")
+    return engine_call("history_events", kind=kind, start=start, end=end, symbol=symbol, cursor=cursor, limit=limit)
+
+@app.get("/admin/memory")
+def get_memory():
+    """Engine memory by structure (bytes, entries), process RSS and tracemalloc status."""
+    return engine_call("memory")
+
+TRACEMALLOC_ACTIONS = ("start", "stop", "status", "snapshot", "diff")
+
+@app.post("/admin/memory/tracemalloc/{action}")
+def tracemalloc_action(action: str, frames: int = 1, label: Optional[str] = None, since: Optional[str] = None,
+                       until: Optional[str] = None, top: int = 20, key: str = "lineno"):
+    """
+    On-demand allocation profiling: start/stop tracing (frames = traceback depth),
+    snapshot (labelled), diff (growth by site from `since`, default the latest
+    snapshot, to `until`, default now). key: lineno, filename or traceback.
+    """
+    if action not in TRACEMALLOC_ACTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown action '{action}'. Options: {', '.join(TRACEMALLOC_ACTIONS)}")
+    if key not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="key must be lineno, filename or traceback")
+    try:
+        return engine_call("tracemalloc", action=action, frames=max(1, min(frames, 50)), label=label,
+                           since=since, until=until, top=max(1, min(top, 500)), key=key)
+    except (RuntimeError, KeyError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/admin/trace")
+def get_trace():
+    """Recorded spans as a Chrome trace file (open in ui.perfetto.dev or chrome://tracing)."""
+    doc = engine_call("trace", action="dump")
+    if doc is None: raise HTTPException(status_code=503, detail="Engine not running")
+    return Response(content=json.dumps(doc), media_type="application/json",
+                    headers={"Content-Disposition": 'attachment; filename="ag_trace.json"'})
+
+@app.post("/admin/trace/{action}")
+def trace_action(action: str):
+    """status, clear, or export (written on the engine host to TRACE_EXPORT_PATH)."""
+    if action not in ("status", "clear", "export"):
+        raise HTTPException(status_code=404, detail=f"Unknown action '{action}'. Options: status, clear, export")
+    return engine_call("trace", action=action)
 
 @app.get("/state")
 async def get_current_state():
-    return {"status": "success", "kill_switch": trading_state.get("kill_switch", False)}
+    state = trading_state if control is None else json.loads(state_snapshot())
+    return {"status": "success", "kill_switch": state.get("kill_switch", False)}
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     while True:
         try:
-            await websocket.send_text(json.dumps(trading_state))
+            await websocket.send_text(state_snapshot().decode())
             await asyncio.sleep(1) # Refresh rate
         except (WebSocketDisconnect, ClientDisconnected, RuntimeError):
             break
@@ -1,33 +1,55 @@
 import time
-import requests
-import datetime
 import threading
+import numpy as np
 from concurrent.futures import ThreadPoolExecutor
 from config.settings import config
-from core.indicators import calculate_base_range, calculate_trend_shift_linreg, update_tsd_count, get_regime
+from core.indicators import get_regime
 from core.risk_manager import RiskManager
-from strategies.mean_reversion import mean_reversion_strategy
+from core.order_router import OrderRouter, OrderIntent
+from core.symbols import load_registry
+from core.levels import LevelEngine, ProximityIndex, tick_levels
+from core.bars import BarBuilder
+from core.regime import RegimeTracker
+from core.metrics import metrics
+from core.history import history
+from core.journal import Journal
+from core.clock import WallClock
+from core.poll_scheduler import PollScheduler
+from core.correlation import RollingCorrelation
+from core.tracing import tracer
+from config.universe import NSE_UNIVERSE
+from strategies.runtime import StrategyRuntime
+from core.indicator_graph import IndicatorGraph, register_default_indicators, universe_columns
 from brokers.mock import MockBroker
-from brokers.dhan import DhanBroker
-from brokers.kite import KiteBroker
-import pandas as pd
 import os
 
 from utils.tax_calculator import TaxCalculator
 from utils.ai_analyzer import AITrendAnalyzer
 from utils.screenshot import ChartScreenshotter
-from utils.screenshot import ChartScreenshotter
 from core.screener import StockScreener
 from core.persistence import PersistenceManager
 
+STAGE = "ag_stage_latency_seconds"
+
 class TradingEngine:
-    def __init__(self):
+    def __init__(self, clock=None, data_feed=None, persist: bool = True):
+        """
+        clock: time source (core/clock.py); replay passes a SimClock.
+        data_feed: use this feed instead of the one DATA_FEED selects.
+        persist: load/save paper state and journal (off for replays).
+        """
+        self.clock = clock or WallClock()
+        self.persist = persist
+        self.recorder = None # SessionRecorder while RECORD_SESSION_PATH is set (core/replay.py)
+        # Sampled cycle traces and per-signal tick-to-trade traces (core/tracing.py)
+        tracer.configure(config.TRACE_SAMPLE_RATE, config.TRACE_SIGNALS, config.TRACE_MAX_EVENTS)
+        self.cycle_trace = None # trace of the cycle being fetched/run
+        self.poller = None # PollScheduler while polling tiered (POLL_TIERED)
         self.risk_manager = RiskManager(
             max_drawdown=config.MAX_SESSION_DRAWDOWN_PCT,
             max_trades=config.MAX_TRADES_PER_SESSION,
             max_losses=config.MAX_CONSECUTIVE_LOSSES
         )
-        self.strategy = mean_reversion_strategy(config)
         self.tax_calculator = TaxCalculator()
         self.ai_analyzer = AITrendAnalyzer(api_key=config.GEMINI_API_KEY)
         self.screenshotter = ChartScreenshotter()
@@ -38,46 +60,105 @@ class TradingEngine:
         self.initial_capital = 100000.0
         
         # Load Persistence if in Paper Mode
-        saved_state = PersistenceManager.load_paper_state()
+        saved_state = PersistenceManager.load_paper_state() if persist else {}
         if saved_state:
             print(f"[PERSISTENCE] Loaded Paper State: ₹{saved_state.get('capital', 100000)}")
             self.initial_capital = saved_state.get('capital', 100000.0)
             self.session_pnl = saved_state.get('pnl', 0.0)
             # We will load positions/history in a moment
         
-        self.tsd_count = 0
+        # Dense symbol ids: engine-side maps are keyed by id, not by string
+        self.registry = load_registry(NSE_UNIVERSE)
+        if config.DHAN_SCRIP_MASTER_PATH:
+            self.registry.load_dhan_scrip_master(config.DHAN_SCRIP_MASTER_PATH)
+
         self.watchlist = []
-        self.planned_trades = []
+        self.planned_by_id = {} # symbol id -> [LONG plan, SHORT plan]
         self.logs = ["[SYSTEM] Engine initializing..."]
         if not saved_state: self.session_pnl = 0.0
-        self.lock = threading.Lock()
-        self.levels = {} 
+        self.lock = threading.RLock() # log() is called while holding it (mode/capital changes)
+        # symbol id -> levels; history-based rows from run_pre_market, tick fallback otherwise
+        self.levels = LevelEngine(
+            lookback=config.LEVEL_LOOKBACK_DAYS,
+            swing_window=config.LEVEL_SWING_WINDOW,
+            cluster_tol=config.LEVEL_CLUSTER_TOL,
+            min_touches=config.LEVEL_MIN_TOUCHES,
+            capacity=len(self.registry)
+        )
+        # Distance to the nearest level per symbol: only near ones are evaluated every cycle
+        self.proximity = ProximityIndex(self.levels)
+        self.cycle_count = 0
+        # TSD regime per symbol, advanced on daily bars (tsd_count is the market aggregate)
+        self.regimes = RegimeTracker(
+            mode=config.REGIME_MODE,
+            period=config.REGIME_PERIOD,
+            threshold_mult=config.REGIME_TSD_MULT,
+            breadth=config.REGIME_MARKET_BREADTH,
+            method=config.REGIME_TREND_METHOD,
+            capacity=len(self.registry)
+        )
+        # Rolling return correlation: same-side signals in one cluster are one bet
+        self.correlation = RollingCorrelation.from_config(config, capacity=len(self.registry)) if config.CORR_MAX_SYMBOLS > 0 else None
+        self.exposures = {} # (symbol id, side) -> orders this session (incl. signals still in their filters)
+        self.session_date = None
+        self.last_quotes = {}
+        # Symbols whose quote changed since their last evaluation (dict as an ordered set)
+        self.pending_eval = {}
+
+        # 1/5/15-minute bars from the polled snapshots
+        self.bar_timeframe = config.BAR_SIGNAL_TIMEFRAME_MIN * 60
+        self.bars = BarBuilder(
+            timeframes=sorted({int(m) * 60 for m in config.BAR_TIMEFRAMES_MIN.split(",")} | {self.bar_timeframe}),
+            capacity=config.BAR_HISTORY,
+            n_symbols=len(self.registry)
+        )
+
+        # Strategies share one indicator graph (each indicator computed once per symbol;
+        # levels and regime only again after they change)
+        self.indicators = IndicatorGraph()
+        register_default_indicators(self.indicators, self.get_levels, self.regimes.regime,
+                                    bars=self.bars, timeframe=self.bar_timeframe,
+                                    levels_key=self.levels.revision_of, regime_key=lambda sid: self.regimes.revision)
+        self.runtime = StrategyRuntime.from_names(self.indicators, config.STRATEGIES, config)
+        self.strategy = self.runtime.strategies[0]
         self.kill_switch = False
         self.on_update = lambda symbol="MULTI": None
+        # Dashboard state is only rebuilt/published when something in it changed
+        self.state_version = 0
+        self.published_version = -1
+        self.planned_version = 0
+        self._planned = (-1, [])
+        self._positions = []
+        self.position_symbols = set()
+        self.positions_stale = True
         
         # Dashboard Data
-        self.equity_history = saved_state.get('equity_history', [{"time": datetime.datetime.now().strftime("%H:%M:%S"), "equity": self.initial_capital}])
-        self.last_equity_update = time.time()
-        self.last_persistence_save = time.time()
+        self.equity_history = saved_state.get('equity_history', [{"time": self.clock.now().strftime("%H:%M:%S"), "equity": self.initial_capital}])
+        self.last_equity_update = self.clock.time()
+        self.last_persistence_save = self.clock.time()
         
-        # Brokers
-        self.mock_broker = MockBroker()
-        self.dhan_broker = None
-        self.kite_broker = None
-        
-        if config.DHAN_CLIENT_ID and "your_" not in config.DHAN_CLIENT_ID:
-            self.dhan_broker = DhanBroker(config.DHAN_CLIENT_ID, config.DHAN_ACCESS_TOKEN)
-            
-        if config.KITE_API_KEY and "your_" not in config.KITE_API_KEY:
-            self.kite_broker = KiteBroker(config.KITE_API_KEY, config.KITE_ACCESS_TOKEN)
+        # Brokers (Dhan/Kite clients are built on first access, see dhan_broker/kite_broker)
+        self.mock_broker = MockBroker.from_config(config)
+        self._dhan_broker = None
+        self._kite_broker = None
 
         # Unified Data Feed & Execution
         # HYBRID MODE: Prefer Dhan, but allow Mock (yfinance) if Dhan Data is inactive
-        self.data_feed = self.dhan_broker or self.kite_broker
-        
         # Force Hybrid if Dhan Data is failing (User has inactive plan)
-        # Uncomment below to force yfinance data while keeping Dhan Execution
-        self.data_feed = self.mock_broker 
+        # Set DATA_FEED=DHAN/KITE to use the broker feed, SYNTHETIC for offline load testing,
+        # AUTO to route between FEED_SOURCES by live latency/errors
+        if data_feed is not None:
+            self.data_feed = data_feed
+        elif config.DATA_FEED == "SYNTHETIC":
+            self.data_feed = self.create_synthetic_feed()
+        elif config.DATA_FEED == "AUTO":
+            self.data_feed = self.create_composite_feed()
+        elif config.DATA_FEED == "DHAN":
+            self.data_feed = self.dhan_broker
+        elif config.DATA_FEED == "KITE":
+            self.data_feed = self.kite_broker
+        else:
+            self.data_feed = self.mock_broker 
 
         if not self.data_feed:
              self.log("[CRITICAL] NO DATA FEED AVAILABLE.")
@@ -85,6 +166,32 @@ class TradingEngine:
              self.data_feed = self.mock_broker
         
         self.broker = self.mock_broker # Execution starts in MOCK
+
+        # Orders leave tick threads through the router (sees broker swaps on mode toggle)
+        self.order_router = OrderRouter(
+            lambda: self.broker,
+            workers=config.ORDER_ROUTER_WORKERS,
+            rate=config.ORDER_RATE_LIMIT_PER_SEC,
+            burst=config.ORDER_BURST,
+            dedup_ttl=config.ORDER_DEDUP_TTL_SEC,
+            poll_interval=config.ORDER_STATUS_POLL_SEC,
+            max_records=config.ORDER_MAX_RECORDS,
+            clock=self.clock.time
+        )
+        self.order_router.add_listener(self.on_order_update)
+
+        # Signals, filter decisions and orders survive restarts in the journal
+        self.journal = None
+        if config.JOURNAL_PATH and persist:
+            self.journal = Journal(
+                config.JOURNAL_PATH,
+                batch_size=config.JOURNAL_BATCH_SIZE,
+                flush_interval=config.JOURNAL_FLUSH_SEC,
+                mode="PAPER" if self.paper_mode else "LIVE",
+                data_feed=type(self.data_feed).__name__,
+                capital=self.initial_capital
+            )
+            self.restore_orders()
         
         self.api_url = os.getenv("NEXT_PUBLIC_API_URL", "localhost:8000")
         if "://" not in self.api_url:
@@ -95,17 +202,178 @@ class TradingEngine:
 
         self.log(f"[SYSTEM] Hybrid Engine ready. Data: {type(self.data_feed).__name__}, Execution: {type(self.broker).__name__}")
 
+    @property
+    def dhan_broker(self):
+        """Dhan client, constructed (and dhanhq imported) the first time it is needed."""
+        if self._dhan_broker is None and config.DHAN_CLIENT_ID and "your_" not in config.DHAN_CLIENT_ID:
+            from brokers.dhan import DhanBroker
+            self._dhan_broker = DhanBroker(config.DHAN_CLIENT_ID, config.DHAN_ACCESS_TOKEN, config.DHAN_SCRIP_MASTER_PATH)
+        return self._dhan_broker
+
+    @property
+    def kite_broker(self):
+        """Kite client, constructed (and kiteconnect imported) the first time it is needed."""
+        if self._kite_broker is None and config.KITE_API_KEY and "your_" not in config.KITE_API_KEY:
+            from brokers.kite import KiteBroker
+            self._kite_broker = KiteBroker(config.KITE_API_KEY, config.KITE_ACCESS_TOKEN)
+        return self._kite_broker
+
+    def create_synthetic_feed(self):
+        """Simulated feed over the registry universe, padded with SYNxxxxx names up to SYNTHETIC_SYMBOLS."""
+        from brokers.synthetic import SyntheticBroker
+        extra = max(0, config.SYNTHETIC_SYMBOLS - len(self.registry))
+        self.registry.ids_for(f"SYN{i:05d}" for i in range(extra))
+        return SyntheticBroker(
+            self.registry.symbols,
+            seed=config.SYNTHETIC_SEED,
+            regime_switch_prob=config.SYNTHETIC_REGIME_SWITCH_PROB,
+            latency_ms=config.SYNTHETIC_LATENCY_MS,
+            latency_jitter_ms=config.SYNTHETIC_LATENCY_JITTER_MS,
+            error_rate=config.SYNTHETIC_ERROR_RATE,
+            auth_error_rate=config.SYNTHETIC_AUTH_ERROR_RATE
+        )
+
+    def create_composite_feed(self):
+        """Health-routed feed over the configured FEED_SOURCES that are actually available."""
+        from brokers.composite import CompositeFeed
+        candidates = {
+            "DHAN": lambda: self.dhan_broker if self.dhan_broker and self.dhan_broker.quotable else None,
+            "KITE": lambda: self.kite_broker if self.kite_broker and self.kite_broker.kite else None,
+            "MOCK": lambda: self.mock_broker,
+            "SYNTHETIC": self.create_synthetic_feed,
+        }
+        sources = []
+        for name in (n.strip().upper() for n in config.FEED_SOURCES.split(",")):
+            feed = candidates[name]() if name in candidates else None
+            if feed is not None: sources.append((name, feed))
+        if not sources: return None
+        self.log(f"[FEED] Composite feed over {', '.join(n for n, _ in sources)}")
+        return CompositeFeed.from_config(sources, config)
+
+    def run_pre_market(self, symbols=None) -> int:
+        """Fetch daily history for the watchlist and compute levels for all of it in batches."""
+        symbols = list(symbols or self.watchlist)
+        self.session_date = self.clock.today()
+        if not hasattr(self.data_feed, "get_history_batch"):
+            self.log(f"[LEVELS] {type(self.data_feed).__name__} has no history; using tick levels.")
+            return 0
+        size = getattr(self.data_feed, "batch_size", 50)
+        loaded = 0
+        with metrics.timer(STAGE, stage="pre_market"):
+            for i in range(0, len(symbols), size):
+                try:
+                    history = self.data_feed.get_history_batch(symbols[i:i+size], days=config.LEVEL_LOOKBACK_DAYS)
+                except Exception as e:
+                    self.log(f"[LEVELS] History fetch error: {e}")
+                    continue
+                if self.recorder: self.recorder.record_history(history)
+                loaded += self.levels.load_history(self.registry.ids_for(history), list(history.values()))
+            # One replay over all symbols so the market aggregate sees the whole universe
+            sids = np.flatnonzero(self.levels.from_history)
+            self.regimes.seed(sids, self.levels.bars[sids])
+        self.log(f"[LEVELS] History levels for {loaded}/{len(symbols)} symbols (tick fallback for the rest).")
+        self.log(f"[REGIME] Market TSD count {self.tsd_count} ({get_regime(self.tsd_count)}), mode: {self.regimes.mode}.")
+        return loaded
+
+    def roll_session(self):
+        """New trading day: the last quotes of the previous session close a daily bar per symbol."""
+        quotes = {s: q for s, q in self.last_quotes.items() if 'close' in q}
+        if quotes:
+            vals = list(quotes.values())
+            sids = self.registry.ids_for(quotes)
+            self.levels.add_bars(
+                sids,
+                [q.get('open', q['close']) for q in vals], [q.get('high', q['close']) for q in vals],
+                [q.get('low', q['close']) for q in vals], [q['close'] for q in vals]
+            )
+            self.regimes.on_day_close(sids, self.levels.bars[sids])
+            self.proximity.refresh()
+            self.pending_eval.update(dict.fromkeys(quotes)) # new levels/regimes: re-evaluate unchanged quotes too
+            self.log(f"[LEVELS] Session rolled: levels and regimes updated for {len(quotes)} symbols.")
+        if self.poller: self.poller.release_all()
+        # Simulated feeds start a new daily range too (directly or behind a CompositeFeed)
+        for feed in [s.feed for s in getattr(self.data_feed, "sources", ())] or [self.data_feed]:
+            if hasattr(feed, "new_day"): feed.new_day()
+        with self.lock:
+            self.exposures.clear()
+        self.session_date = self.clock.today()
+
+    def get_levels(self, sid: int, market_data: dict) -> dict:
+        lvl = self.levels.get(sid)
+        if lvl is None:
+            current_price = market_data['close']
+            lvl = self.levels[sid] = tick_levels(
+                current_price,
+                market_data.get('high', current_price * 1.01),
+                market_data.get('low', current_price * 0.99)
+            )
+            self.proximity.refresh([sid])
+        return lvl
+
+    @property
+    def tsd_count(self) -> int:
+        return self.regimes.market_count
+
+    @property
+    def planned_trades(self):
+        with self.lock: # flattened again only after a plan changed
+            if self._planned[0] != self.planned_version:
+                self._planned = (self.planned_version, [p for plans in self.planned_by_id.values() for p in plans])
+            return self._planned[1]
+
+    def positions(self) -> list:
+        """Broker positions, re-fetched only after an order update or a quote change in a held symbol."""
+        if self.positions_stale:
+            self.positions_stale = False
+            self._positions = self.broker.get_positions() or []
+            self.position_symbols = {p.get('symbol') or p.get('tradingSymbol') or p.get('tradingsymbol') for p in self._positions}
+            self.state_version += 1
+        return self._positions
+
     def log(self, message: str):
         with self.lock:
-            timestamp = datetime.datetime.now().strftime("%H:%M")
+            timestamp = self.clock.now().strftime("%H:%M")
             full_msg = f"[{timestamp}] {message}"
             self.logs.append(full_msg)
             if len(self.logs) > 50: self.logs.pop(0)
+            self.state_version += 1
             print(full_msg)
 
+    def restore_orders(self):
+        """Reload orders from the journal: dedup keys still in their window, and paper orders into the mock broker."""
+        rows = self.journal.orders_since(self.clock.time() - config.ORDER_DEDUP_TTL_SEC)
+        for row in rows:
+            if row['idempotency_key']:
+                self.order_router.seen_keys[row['idempotency_key']] = row['created_at']
+            if row['broker'] == type(self.mock_broker).__name__ and row['broker_order_id']:
+                status = "COMPLETE" if row['status'] == "FILLED" else row['status']
+                self.mock_broker.orders[row['broker_order_id']] = {"status": status, "symbol": row['symbol'], "side": row['side']}
+        if rows:
+            self.log(f"[JOURNAL] Restored {len(rows)} orders from {config.JOURNAL_PATH}")
+
+    def on_order_update(self, record):
+        event = record.to_dict()
+        event["ts"] = self.clock.time()
+        history.record("orders", dict(event))
+        self.positions_stale = True
+        if self.poller and record.status in ("SUBMITTED", "ACKED", "FILLED"):
+            self.poller.hold(record.intent.symbol) # keep quotes fresh while we have exposure
+        if self.journal:
+            # The broker that placed it, not the current one (they differ after a paper/live toggle)
+            self.journal.record_order(record, broker=type(record.broker or self.broker).__name__, ts=event["ts"])
+        if record.status == "FILLED":
+            history.record("fills", event)
+            if self.journal:
+                self.journal.record_fill(record, price=self.last_quotes.get(record.intent.symbol, {}).get('close'))
+        if record.status in ("REJECTED", "CANCELLED"):
+            self.release_exposure(self.registry.add(record.intent.symbol), record.intent.side)
+        if record.status in ("FILLED", "REJECTED", "CANCELLED"):
+            self.log(f"ORDER {record.status}: {record.intent.symbol} {record.intent.side} ({record.client_order_id})")
+
     def toggle_paper_mode(self, enabled: bool):
         with self.lock:
             self.paper_mode = enabled
+            self.positions_stale = True
             if enabled:
                 self.broker = self.mock_broker
                 self.log("MODE: Switched to PAPER TRADING (Mock Execution)")
@@ -122,33 +390,35 @@ class TradingEngine:
                 else:
                     self.paper_mode = True
                     self.log("ERROR: No live broker configured. Staying in PAPER mode.")
-            self.update_dashboard()
+            self.update_dashboard(force=True)
 
     def set_initial_capital(self, amount: float):
         with self.lock:
             self.initial_capital = amount
             # Reset history on capital change
-            self.equity_history = [{"time": datetime.datetime.now().strftime("%H:%M:%S"), "equity": amount}]
+            self.equity_history = [{"time": self.clock.now().strftime("%H:%M:%S"), "equity": amount}]
             PersistenceManager.reset_paper_state()
             self.log(f"CAPITAL: Set to ₹{amount:.2f}")
-            self.update_dashboard()
+            self.update_dashboard(force=True)
 
-    def update_dashboard(self, current_symbol: str = "MULTI"):
+    def update_dashboard(self, current_symbol: str = "MULTI", force: bool = False):
+        """Equity/persistence bookkeeping, then publish the state if it changed since the last publish (or force)."""
         try:
             # Periodic Equity Update (Every 5 seconds for smoother demo, usually 60s)
-            now = time.time()
+            now = self.clock.time()
             if now - self.last_equity_update > 5:
                 # Keep history manageable
                 if len(self.equity_history) > 500: self.equity_history.pop(0)
                 
                 self.equity_history.append({
-                    "time": datetime.datetime.now().strftime("%H:%M:%S"),
+                    "time": self.clock.now().strftime("%H:%M:%S"),
                     "equity": self.initial_capital + self.session_pnl
                 })
                 self.last_equity_update = now
+                self.state_version += 1
 
             # Persistence Save (Every 30s) if Paper Mode
-            if self.paper_mode and now - self.last_persistence_save > 30:
+            if self.paper_mode and self.persist and now - self.last_persistence_save > 30:
                 PersistenceManager.save_paper_state({
                     "capital": self.initial_capital,
                     "pnl": self.session_pnl,
@@ -156,10 +426,33 @@ class TradingEngine:
                 })
                 self.last_persistence_save = now
 
-            self.on_update(current_symbol)
+            history.record_equity(self.initial_capital + self.session_pnl, now)
+            self.positions() # a re-fetch counts as a change
+            if force or current_symbol != "MULTI" or self.state_version != self.published_version:
+                self.published_version = self.state_version
+                self.on_update(current_symbol)
         except Exception as e:
             print(f"Dashboard update error: {e}")
 
+    def dashboard_state(self, current_symbol: str = "MULTI") -> dict:
+        """What the dashboard shows (/status, /ws), in either API mode."""
+        return {
+            "regime": get_regime(self.tsd_count),
+            "tsd_count": self.tsd_count,
+            "risk_consumed": self.risk_manager.daily_pnl,
+            "max_drawdown": config.MAX_SESSION_DRAWDOWN_PCT,
+            "kill_switch": self.kill_switch,
+            "pnl": round(self.session_pnl, 2),
+            "current_symbol": current_symbol,
+            "watchlist": self.watchlist,
+            "positions": self.positions(),
+            "planned_trades": self.planned_trades,
+            "logs": self.logs,
+            "paper_mode": self.paper_mode,
+            "initial_capital": self.initial_capital,
+            "equity_history": self.equity_history
+        }
+
     def get_state(self):
         with self.lock:
             return {
@@ -173,7 +466,7 @@ class TradingEngine:
                 "pnl": round(self.session_pnl, 2),
                 "current_symbol": "MULTI",
                 "watchlist": self.watchlist,
-                "positions": self.broker.get_positions(),
+                "positions": self.positions(),
                 "planned_trades": self.planned_trades,
                 "logs": self.logs,
                 "equity_history": self.equity_history
@@ -190,140 +483,306 @@ class TradingEngine:
             
             if 'close' not in market_data: return
             current_price = market_data['close']
+            sid = self.registry.add(symbol)
 
             # Levels logic
-            if symbol not in self.levels:
-                high_24h = market_data.get('high', current_price * 1.01)
-                low_24h = market_data.get('low', current_price * 0.99)
-                vol_range = max(0.002, (high_24h - low_24h) / current_price * 0.15)
-                self.levels[symbol] = {
-                    "resistance": current_price * (1 + vol_range),
-                    "support": current_price * (1 - vol_range),
-                    "base_range": current_price * (vol_range * 0.5)
-                }
-
-            lvl = self.levels[symbol]
-            resistance, support = lvl['resistance'], lvl['support']
-            base_range = lvl['base_range']
-            
-            # Simplified trend shift for tick-by-tick
-            trend_shift = (current_price - market_data.get('open', current_price)) 
-            regime = get_regime(self.tsd_count)
-            
-            with self.lock:
-                self.planned_trades = [p for p in self.planned_trades if p['symbol'] != symbol]
-                self.planned_trades.append({
-                    "symbol": symbol, "side": "LONG", "current": round(current_price, 2),
-                    "entry": round(support, 2), "target": round(resistance * 0.998, 2), "stop": round(support * 0.995, 2)
-                })
-                self.planned_trades.append({
-                    "symbol": symbol, "side": "SHORT", "current": round(current_price, 2),
-                    "entry": round(resistance, 2), "target": round(support * 1.002, 2), "stop": round(resistance * 1.005, 2)
-                })
+            lvl = self.get_levels(sid, market_data)
+            self.update_planned_trades(sid, symbol, current_price, lvl)
 
-            # Reversion Signal
-            signal = self.strategy.generate_signal(
-                market_data, market_data.get('prior', market_data), 
-                resistance, support, regime, base_range, trend_shift
-            )
-            
-            if signal:
-                if current_price <= support:
-                    self.log(f"⚡ TOUCH: {symbol} hit SUPPORT. Evaluating...")
-                elif current_price >= resistance:
-                    self.log(f"⚡ TOUCH: {symbol} hit RESISTANCE. Evaluating...")
+            # All strategies over one shared indicator context
+            bar_key = self.bars.closed(sid, self.bar_timeframe)
+            for signal in self.runtime.evaluate(sid, symbol, market_data, bar_key):
+                self.handle_signal(symbol, signal, current_price, lvl)
+
+        except Exception as e:
+            print(f"Error in tick for {symbol}: {e}")
+
+    def run_ticks_vectorized(self, symbols: list, all_data: dict, executor: ThreadPoolExecutor, trace=None) -> list:
+        """
+        run_tick for many symbols at once when every strategy compiles to NumPy:
+        one column snapshot, one strategy pass, then only the signals go to the
+        executor for filtering and routing. Returns the handle_signal futures.
+        """
+        if self.kill_switch: return []
+        rows = [(s, all_data[s]) for s in symbols if s in all_data and 'close' in all_data[s]]
+        if not rows: return []
+        sids = self.registry.ids_for(s for s, _ in rows)
+        quotes = [q for _, q in rows]
+        lvls = []
+        for (symbol, q), sid in zip(rows, sids):
+            lvl = self.get_levels(sid, q)
+            self.update_planned_trades(sid, symbol, q['close'], lvl)
+            lvls.append(lvl)
+        start = time.perf_counter_ns()
+        columns = universe_columns(self.runtime.fields(), sids, quotes, lvls, self.regimes,
+                                   bars=self.bars, timeframe=self.bar_timeframe)
+        hits = self.runtime.evaluate_batch(columns)
+        if trace:
+            trace.evaluate = (start, time.perf_counter_ns())
+            tracer.add("evaluate_batch", start, trace.evaluate[1], trace, args={"symbols": len(rows), "signals": len(hits)})
+        handle = tracer.bind(trace, self.handle_signal, "handle_signal")
+        return [executor.submit(handle, rows[i][0], signal, quotes[i]['close'], lvls[i]) for i, signal in hits]
 
-                qty = int(self.initial_capital * 0.1 / current_price) if current_price > 0 else 1
+    def update_planned_trades(self, sid: int, symbol: str, current_price: float, lvl: dict):
+        resistance, support = lvl['resistance'], lvl['support']
+        with self.lock:
+            self.planned_by_id[sid] = [{
+                "symbol": symbol, "side": "LONG", "current": round(current_price, 2),
+                "entry": round(support, 2), "target": round(resistance * 0.998, 2), "stop": round(support * 0.995, 2)
+            }, {
+                "symbol": symbol, "side": "SHORT", "current": round(current_price, 2),
+                "entry": round(resistance, 2), "target": round(support * 1.002, 2), "stop": round(resistance * 1.005, 2)
+            }]
+            self.planned_version += 1
+            self.state_version += 1
+
+    def reserve_exposure(self, sid: int, side: str):
+        """
+        Claim a same-side exposure for a signal. Returns the symbol id of an
+        exposure already open on that side in the signal's correlation cluster
+        (nothing is claimed then), else None.
+        """
+        # Labels are looked up before taking the engine lock (cluster_labels is refreshed per bar in run_cycle)
+        labels = self.correlation.cluster_labels() if self.correlation is not None and config.CORR_DEDUP else None
+        cluster = labels[sid] if labels is not None and sid < len(labels) else -1
+        with self.lock:
+            if cluster >= 0:
+                for s, sd in self.exposures:
+                    if sd == side and s != sid and s < len(labels) and labels[s] == cluster: return s
+            self.exposures[(sid, side)] = self.exposures.get((sid, side), 0) + 1
+            return None
+
+    def release_exposure(self, sid: int, side: str):
+        with self.lock:
+            left = self.exposures.get((sid, side), 0) - 1
+            if left > 0: self.exposures[(sid, side)] = left
+            else: self.exposures.pop((sid, side), None)
+
+    def handle_signal(self, symbol: str, signal: dict, current_price: float, lvl: dict):
+        """Filters (dedup, costs, AI) and order submission for a strategy signal."""
+        resistance, support = lvl['resistance'], lvl['support']
+        # Same level touched on later cycles maps to the same key -> deduped
+        level = support if signal['side'] == "LONG" else resistance
+        order_key = f"{symbol}:{signal['side']}:{level:.2f}:{self.clock.today()}"
+        if self.order_router.seen(order_key): return
+        trace = tracer.signal(symbol)
+
+        if current_price <= support:
+            self.log(f"⚡ TOUCH: {symbol} hit SUPPORT. Evaluating...")
+        elif current_price >= resistance:
+            self.log(f"⚡ TOUCH: {symbol} hit RESISTANCE. Evaluating...")
+
+        qty = int(self.initial_capital * 0.1 / current_price) if current_price > 0 else 1
+        with tracer.span("costs", trace, "signal"):
+            if signal['side'] == "LONG":
                 costs = self.tax_calculator.calculate_costs(signal['entry'], signal['target'], qty)
-                
-                summary = f"Symbol: {symbol}, Side: {signal['side']}, LTP: {current_price}"
+            else:
+                costs = self.tax_calculator.calculate_costs(signal['target'], signal['entry'], qty)
+        
+        # Checked before the AI round trip: a correlated duplicate never costs one
+        sid = self.registry.add(symbol)
+        with tracer.span("cluster_check", trace, "signal"):
+            peer = self.reserve_exposure(sid, signal['side'])
+        ai_confirmed = profitable = False
+        if peer is None:
+            summary = f"Symbol: {symbol}, Side: {signal['side']}, LTP: {current_price}"
+            with metrics.timer(STAGE, stage="ai_confirm"), tracer.span("ai_confirm", trace, "signal"):
                 ai_confirmed = self.ai_analyzer.confirm_trend(summary)
-                
-                if ai_confirmed and (costs['net_profit_pct'] > -0.01 or self.paper_mode):
-                    self.broker.place_order(symbol, signal['side'], "MARKET", qty)
-                    self.log(f"ORDER: {symbol} {signal['side']} at ₹{current_price} (Qty: {qty})")
-                else:
-                    reason = "AI" if not ai_confirmed else "Profitability"
-                    print(f"[ENGINE] {symbol} signal filtered by {reason}.")
+            profitable = costs['net_profit_pct'] > -0.01 or self.paper_mode
+        
+        if ai_confirmed and profitable:
+            with metrics.timer(STAGE, stage="order_submit"), tracer.span("order_submit", trace, "signal"):
+                order_id = self.order_router.submit(OrderIntent(
+                    symbol=symbol, side=signal['side'], quantity=qty, target=signal['target'],
+                    stop_loss=signal['stop_loss'], idempotency_key=order_key, created_at=self.clock.time()
+                ), trace)
+            outcome = "ordered" if order_id else "duplicate"
+            metrics.counter("ag_signals_total", outcome=outcome).inc()
+            if order_id:
+                self.log(f"ORDER: {symbol} {signal['side']} at ₹{current_price} (Qty: {qty}, {order_id})")
+            else:
+                self.release_exposure(sid, signal['side'])
+        else:
+            reason = "Cluster" if peer is not None else "AI" if not ai_confirmed else "Profitability"
+            outcome = f"filtered_{reason.lower()}"
+            metrics.counter("ag_signals_total", outcome=outcome).inc()
+            if peer is None:
+                self.release_exposure(sid, signal['side'])
+                print(f"[ENGINE] {symbol} signal filtered by {reason}.")
+            else:
+                print(f"[ENGINE] {symbol} signal filtered: same cluster as open {self.registry.symbols[peer]} {signal['side']}.")
+        history.record("signals", {
+            "ts": self.clock.time(), "symbol": symbol, "side": signal['side'], "price": current_price, "entry": signal.get('entry'),
+            "target": signal.get('target'), "stop_loss": signal.get('stop_loss'),
+            "strategy": signal.get('strategy'), "reason": signal.get('reason'), "outcome": outcome
+        })
+        if self.journal:
+            now = self.clock.time()
+            signal_id = self.journal.record_signal(symbol, signal, current_price, outcome, order_key=order_key, ts=now)
+            if peer is not None: # detail: correlation with the open exposure
+                self.journal.record_filter(signal_id, "cluster", False, self.correlation.correlation(sid, peer), ts=now)
+                return
+            self.journal.record_filter(signal_id, "ai", ai_confirmed, ts=now)
+            self.journal.record_filter(signal_id, "profitability", profitable, costs['net_profit_pct'], ts=now)
 
-        except Exception as e:
-            print(f"Error in tick for {symbol}: {e}")
+    def changed_quotes(self, all_data: dict) -> dict:
+        """Quotes that differ from the previous cycle's (same object or an equal dict is unchanged)."""
+        last = self.last_quotes
+        dirty = {}
+        for s, q in all_data.items():
+            prev = last.get(s)
+            if prev is not q and prev != q: dirty[s] = q
+        return dirty
+
+    def tick_symbols(self) -> list:
+        """
+        Symbols to evaluate this cycle, out of those whose quote changed since
+        their last evaluation: near-level ones (nearest first) every cycle, the
+        rest on every LEVEL_RECHECK_CYCLES-th cycle. An unchanged quote would
+        produce the same signal and plan as last time, so it is never re-run.
+        """
+        self.cycle_count += 1
+        pending = self.pending_eval
+        recheck = config.LEVEL_RECHECK_CYCLES
+        if recheck <= 1 or self.cycle_count % recheck == 1:
+            self.pending_eval = {}
+            return list(pending)
+        if not pending: return []
+        # A signal needs price at/beyond a level, so far symbols only refresh their planned trades on recheck cycles
+        symbols = self.registry.symbols
+        near = [s for s in (symbols[sid] for sid in self.proximity.within(config.LEVEL_PROXIMITY_BAND).tolist()) if s in pending]
+        for s in near: del pending[s]
+        metrics.counter("ag_ticks_skipped_total").inc(len(pending))
+        return near
+
+    def fetch_market_data(self, symbols=None) -> dict:
+        """Batch fetch the watchlist (or these symbols) from the data feed in rate-limited chunks."""
+        symbols = self.watchlist if symbols is None else symbols
+        trace = self.cycle_trace
+        all_data = {}
+        if hasattr(self.data_feed, "get_market_data_batch"):
+            feed = type(self.data_feed).__name__
+            # Feeds may advertise their own per-call limit and pacing
+            size = getattr(self.data_feed, "batch_size", 50)
+            pause = getattr(self.data_feed, "batch_pause", 0.2)
+            with metrics.timer(STAGE, stage="fetch"):
+                for i in range(0, len(symbols), size):
+                    chunk = symbols[i:i+size]
+                    start = time.perf_counter_ns()
+                    with metrics.timer("ag_broker_request_seconds", broker=feed, endpoint="quote_batch"):
+                        all_data.update(self.data_feed.get_market_data_batch(chunk))
+                    if trace: # kept even unsampled: a signal's trace starts at its chunk
+                        trace.chunks.append((start, time.perf_counter_ns(), chunk))
+                        tracer.add("fetch_chunk", start, trace.chunks[-1][1], trace, "fetch", {"symbols": len(chunk)})
+                    if pause: time.sleep(pause) # Rate limit protection
+        return all_data
+
+    def poll_market_data(self) -> dict:
+        """Fetch what the tiered scheduler says is due, merged over the last snapshot ({} if nothing was due)."""
+        self.poller.retier()
+        symbols = self.poller.next_batch()
+        if not symbols: return {}
+        fresh = self.fetch_market_data(symbols)
+        self.poller.observe(fresh)
+        return {**self.last_quotes, **fresh}
+
+    def run_cycle(self, all_data: dict, executor: ThreadPoolExecutor):
+        """One engine cycle over already-fetched quotes: regime, ticks, dashboard."""
+        trace = self.cycle_trace or tracer.begin_cycle()
+        self.cycle_trace = None
+        with metrics.timer(STAGE, stage="cycle"), tracer.span("cycle", trace, quotes=len(all_data)):
+            if self.session_date != self.clock.today():
+                self.roll_session()
+            # Regime advances on daily bars (roll_session), not per loop
+            now = self.clock.time()
+            if all_data and self.recorder: self.recorder.record_quotes(now, all_data)
+            # Only quotes that changed flow into bars, levels distance, signals, plans and the dashboard
+            dirty = self.changed_quotes(all_data) if all_data else {}
+            if dirty:
+                sids = self.registry.ids_for(dirty)
+                with metrics.timer(STAGE, stage="bars"), tracer.span("bars", trace, changed=len(dirty)):
+                    self.bars.update_quotes(sids, dirty.values(), now)
+                closes = [q.get('close', np.nan) for q in dirty.values()]
+                self.proximity.update(sids, closes)
+                if self.correlation is not None:
+                    self.correlation.update(sids, closes, now)
+                    self.correlation.cluster_labels() # recluster here when a bar closed, not under the engine lock
+                self.pending_eval.update(dict.fromkeys(dirty))
+                if not self.position_symbols.isdisjoint(dirty): self.positions_stale = True
+                metrics.counter("ag_changed_quotes_total").inc(len(dirty))
+
+            # Parallel process ticks
+            with metrics.timer(STAGE, stage="tick_eval"), tracer.span("tick_eval", trace):
+                symbols = self.tick_symbols()
+                if self.runtime.vectorized:
+                    futures = self.run_ticks_vectorized(symbols, all_data, executor, trace)
+                else:
+                    tick = tracer.bind(trace, self.run_tick)
+                    futures = [executor.submit(tick, s, all_data.get(s)) for s in symbols]
+                for f in futures:
+                    try: f.result(timeout=1)
+                    except: pass
+            
+            with metrics.timer(STAGE, stage="dashboard_sync"), tracer.span("dashboard_sync", trace):
+                self.update_dashboard()
+            if all_data: self.last_quotes = all_data
+        metrics.counter("ag_cycles_total").inc()
 
     def start(self):
-        universe = [
-            "ABB","ACC","APLAPOLLO","AUBANK","ADANIENSOL","ADANIENT","ADANIGREEN",
-            "ADANIPORTS","ADANIPOWER","ATGL","ABCAPITAL","ALKEM","AMBUJACEM","APOLLOHOSP",
-            "ASHOKLEY","ASIANPAINT","ASTRAL","AUROPHARMA","DMART","AXISBANK","BSE",
-            "BAJAJ-AUTO","BAJFINANCE","BAJAJFINSV","BAJAJHLDNG","BAJAJHFL","BANKBARODA",
-            "BANKINDIA","BDL","BEL","BHARATFORG","BHEL","BPCL","BHARTIARTL","BHARTIHEXA",
-            "BIOCON","BLUESTARCO","BOSCHLTD","BRITANNIA","CGPOWER","CANBK","CHOLAFIN",
-            "CIPLA","COALINDIA","COCHINSHIP","COFORGE","COLPAL","CONCOR","COROMANDEL",
-            "CUMMINSIND","DLF","DABUR","DIVISLAB","DIXON","DRREDDY",
-            "EICHERMOT","ETERNAL","EXIDEIND","NYKAA","FEDERALBNK","FORTIS","GAIL",
-            "GMRAIRPORT","GLENMARK","GODFRYPHLP","GODREJCP","GODREJPROP","GRASIM","HCLTECH",
-            "HDFCAMC","HDFCBANK","HDFCLIFE","HAVELLS","HEROMOTOCO","HINDALCO","HAL",
-            "HINDPETRO","HINDUNILVR","HINDZINC","POWERINDIA","HUDCO","HYUNDAI","ICICIBANK",
-            "ICICIGI","IDFCFIRSTB","IRB","ITC","INDIANB","INDHOTEL","IOC","IRCTC","IRFC",
-            "IREDA","IGL","INDUSTOWER","INDUSINDBK","NAUKRI","INFY","INDIGO","JSWENERGY",
-            "JSWSTEEL","JINDALSTEL","JIOFIN","JUBLFOOD","KEI","KPITTECH","KALYANKJIL",
-            "KOTAKBANK","LTF","LICHSGFIN","LTIM","LT","LICI","LODHA","LUPIN","MRF",
-            "M&MFIN","M&M","MANKIND","MARICO","MARUTI","MFSL","MAXHEALTH","MAZDOCK",
-            "MOTILALOFS","MPHASIS","MUTHOOTFIN","NHPC","NMDC","NTPC","NATIONALUM",
-            "NESTLEIND","OBEROIRLTY","ONGC","OIL","PAYTM","OFSS","POLICYBZR","PIIND",
-            "PAGEIND","PATANJALI","PERSISTENT","PHOENIXLTD","PIDILITIND","POLYCAB",
-            "PFC","POWERGRID","PREMIERENE","PRESTIGE","PNB","RECLTD","RVNL","RELIANCE",
-            "SBICARD","SBILIFE","SRF","MOTHERSON","SHREECEM","SHRIRAMFIN","ENRIN",
-            "SIEMENS","SOLARINDS","SONACOMS","SBIN","SAIL","SUNPHARMA","SUPREMEIND",
-            "SUZLON","SWIGGY","TVSMOTOR","TATACOMM","TCS","TATACONSUM","TATAELXSI",
-            "TMPV","TATAPOWER","TATASTEEL","TATATECH","TECHM","TITAN","TORNTPHARM",
-            "TORNTPOWER","TRENT","TIINDIA","UPL","ULTRACEMCO","UNIONBANK","UNITDSPR",
-            "VBL","VEDL","VMM","IDEA","VOLTAS","WAAREEENER","WIPRO","YESBANK","ZYDUSLIFE"
-        ]
+        universe = list(self.registry.symbols)
 
         self.log(f"Screening universe of {len(universe)} symbols...")
         # BYPASS SCREENER FOR SPEED (It blocks for too long)
         # screened = self.screener.screen(universe)
         # self.watchlist = [s['symbol'] for s in screened][:250]
         self.watchlist = universe # Load all directly
+        if config.RECORD_SESSION_PATH:
+            from core.replay import SessionRecorder
+            self.recorder = SessionRecorder(config.RECORD_SESSION_PATH, self.watchlist, self.clock.time())
+            self.log(f"[REPLAY] Recording session to {config.RECORD_SESSION_PATH}")
+        self.run_pre_market()
+
+        if config.SHARD_WORKERS > 0:
+            from core.sharding import ShardCoordinator
+            ShardCoordinator(self, config.SHARD_WORKERS, config.SHARD_CYCLE_SEC).run()
+            if self.journal: self.journal.close()
+            return
         
+        if config.POLL_TIERED:
+            self.poller = PollScheduler.from_config(self.watchlist, self.registry.ids_for(self.watchlist),
+                                                    self.proximity, self.data_feed, config, clock=self.clock.time)
+            self.log(f"[POLL] Tiered polling at {self.poller.calls_per_sec:.2f} quote calls/s.")
+        last_scan_log = 0.0
+
         with ThreadPoolExecutor(max_workers=50) as executor:
             while True:
                 try:
-                    now = time.time()
+                    now = self.clock.time()
                     if not self.risk_manager.check_constraints():
                         self.log("Risk limit reached. Halting.")
                         break
                         
-                    # Batch fetch from data feed
-                    all_data = {}
-                    if hasattr(self.data_feed, "get_market_data_batch"):
-                        for i in range(0, len(self.watchlist), 50):
-                            chunk = self.watchlist[i:i+50]
-                            all_data.update(self.data_feed.get_market_data_batch(chunk))
-                            time.sleep(0.2) # Rate limit protection
-                    
-                    # Update Regime (TSD Logic) using Nifty/Index proxy or avg move
-                    if all_data:
-                        avg_move = sum(abs(v['close'] - v.get('open', v['close'])) for v in all_data.values()) / len(all_data)
-                        avg_range = sum(v['high'] - v['low'] for v in all_data.values()) / len(all_data)
-                        self.tsd_count = update_tsd_count(self.tsd_count, avg_move, avg_range)
-
-                    # Parallel process ticks
-                    futures = [executor.submit(self.run_tick, s, all_data.get(s)) for s in self.watchlist]
-                    for f in futures:
-                        try: f.result(timeout=1)
-                        except: pass
-                    
-                    self.update_dashboard()
+                    self.cycle_trace = tracer.begin_cycle()
+                    all_data = self.poll_market_data() if self.poller else self.fetch_market_data()
+                    if all_data or not self.poller:
+                        self.run_cycle(all_data, executor)
                     
-                    if int(time.time()) % 20 == 0:
-                        self.log(f"SCANNING: {len(all_data)}/{len(self.watchlist)} stocks active. Regime: {get_regime(self.tsd_count)}")
+                    if self.clock.time() - last_scan_log >= 20:
+                        tiers = f" Tiers: {self.poller.counts()}" if self.poller else ""
+                        self.log(f"SCANNING: {len(all_data)}/{len(self.watchlist)} stocks active. Regime: {get_regime(self.tsd_count)}.{tiers}")
+                        last_scan_log = self.clock.time()
 
-                    # Enforce minimum 3-second loop duration to prevent rate limits
-                    elapsed = time.time() - now
-                    time.sleep(max(1.0, 3.0 - elapsed))
+                    elapsed = self.clock.time() - now
+                    if self.poller:
+                        # The scheduler's token bucket is the rate limit; wake when the next symbol is due
+                        self.clock.sleep(max(config.POLL_TICK_SEC - elapsed, min(self.poller.seconds_until_due(), 1.0)))
+                    else:
+                        # Enforce minimum 3-second loop duration to prevent rate limits
+                        self.clock.sleep(max(1.0, 3.0 - elapsed))
                 except KeyboardInterrupt: break
                 except Exception as e: self.log(f"ENGINE ERROR: {e}")
+        if self.recorder: self.recorder.close()
+        if self.journal: self.journal.close()
 
 if __name__ == "__main__":
     engine = TradingEngine()
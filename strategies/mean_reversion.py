@@ -1,10 +1,22 @@
-import pandas as pd
 from typing import Optional, Dict
 
 class mean_reversion_strategy:
+    name = "mean_reversion"
+    # Indicators this strategy reads from the shared indicator graph
+    requires = ("levels", "base_range", "trend_shift", "regime", "bar", "prior")
+
     def __init__(self, config):
         self.config = config
 
+    def evaluate(self, ctx) -> Optional[Dict]:
+        """StrategyRuntime entry point: pulls memoized indicators from the context."""
+        lvl = ctx['levels']
+        # Candle checks run on the forming bar against the last closed one
+        return self.generate_signal(
+            ctx['bar'], ctx['prior'], lvl['resistance'], lvl['support'],
+            ctx['regime'], ctx['base_range'], ctx['trend_shift']
+        )
+
     def check_rejection_candle(self, open: float, high: float, low: float, close: float, side: str) -> bool:
         """
         Counter-Trend Short: Rejection candle (upper wick > body)
@@ -84,3 +96,21 @@ class mean_reversion_strategy:
                 }
 
         return None
+
+def mean_reversion_rules(config):
+    """mean_reversion_strategy as compiled rules: same signals, vectorizable, no per-check logging."""
+    from strategies.rules import Rule, RuleStrategy
+    wick_ok = "{wick} - {body_edge} > wick_ratio * abs(close - open)"
+    vol_ok = "volume >= prior_volume * volume_ratio"
+    return RuleStrategy("mean_reversion", [
+        Rule("SHORT",
+             when=f"close >= resistance and {wick_ok.format(wick='high', body_edge='max(open, close)')} and {vol_ok}",
+             target="resistance - (base_range + trend_mult * abs(trend_shift))",
+             stop="high + stop_buffer * close", reason="Resistance Rejection"),
+        Rule("LONG",
+             when=f"close <= support and {wick_ok.format(wick='min(open, close)', body_edge='low')} and {vol_ok}",
+             target="support + (base_range + trend_mult * abs(trend_shift))",
+             stop="low - stop_buffer * close", reason="Support Rejection"),
+    ], gate="regime != 'REGIME_C'", params={
+        "wick_ratio": 0.3, "volume_ratio": 0.7, "stop_buffer": 0.001, "trend_mult": config.TARGET_TREND_MULT
+    })
@@ -0,0 +1,168 @@
+"""
+Declarative signal rules compiled to NumPy.
+
+A RuleStrategy is a list of rules whose entry condition, entry, target and
+stop are expressions over the candle and indicator fields below (plus named
+params), in a small Python-syntax subset:
+
+    Rule("SHORT",
+         when="close >= resistance and high - max(open, close) > wick_ratio * abs(close - open)",
+         entry="close", target="resistance - base_range", stop="high + stop_buffer * close")
+
+Rules are parsed once and compiled twice: one scalar function for the
+per-symbol path (StrategyRuntime.evaluate) and vectorized expressions over
+column arrays for a whole universe snapshot (evaluate_batch). Rules are tried in
+order per symbol; the first whose condition holds (and the gate) emits.
+"""
+import ast
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+CANDLE = ("open", "high", "low", "close", "volume")
+# Field -> indicator graph node it is read from (scalar path)
+FIELDS: Dict[str, str] = {
+    **{f: "bar" for f in CANDLE},
+    **{f"prior_{f}": "prior" for f in CANDLE},
+    "support": "levels", "resistance": "levels", "base_range": "levels",
+    "trend_shift": "trend_shift", "regime": "regime",
+}
+FUNCTIONS = {"abs": ("abs", "np.abs"), "min": ("min", "np.minimum"), "max": ("max", "np.maximum")}
+_COMPARE = {ast.Gt: ">", ast.GtE: ">=", ast.Lt: "<", ast.LtE: "<=", ast.Eq: "==", ast.NotEq: "!="}
+_BINARY = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/"}
+
+class RuleError(ValueError):
+    pass
+
+class _Emitter:
+    """AST (whitelisted nodes only) -> Python source, over column arrays (vector) or local floats (scalar)."""
+    def __init__(self, params: Mapping[str, Any], vector: bool):
+        self.params = params
+        self.vector = vector
+        self.names: set = set()
+
+    def emit(self, node: ast.AST) -> str:
+        if isinstance(node, ast.Expression):
+            return self.emit(node.body)
+        if isinstance(node, ast.BoolOp):
+            parts = [self.emit(v) for v in node.values]
+            if self.vector:
+                return "(" + (" & " if isinstance(node.op, ast.And) else " | ").join(parts) + ")"
+            return "(" + (" and " if isinstance(node.op, ast.And) else " or ").join(parts) + ")"
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return f"(~{self.emit(node.operand)})" if self.vector else f"(not {self.emit(node.operand)})"
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return f"(-{self.emit(node.operand)})"
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            return f"({self.emit(node.left)} {_BINARY[type(node.op)]} {self.emit(node.right)})"
+        if isinstance(node, ast.Compare):
+            terms, left = [], node.left
+            for op, right in zip(node.ops, node.comparators):
+                if type(op) not in _COMPARE: raise RuleError(f"Unsupported comparison {type(op).__name__}")
+                terms.append(f"({self.emit(left)} {_COMPARE[type(op)]} {self.emit(right)})")
+                left = right
+            if len(terms) == 1: return terms[0]
+            return "(" + (" & " if self.vector else " and ").join(terms) + ")"
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS:
+            if node.keywords: raise RuleError(f"{node.func.id}() takes no keyword arguments")
+            fn = FUNCTIONS[node.func.id][1 if self.vector else 0]
+            args = [self.emit(a) for a in node.args]
+            if len(args) != (1 if node.func.id == "abs" else 2):
+                raise RuleError(f"Wrong number of arguments to {node.func.id}()")
+            return f"{fn}({', '.join(args)})"
+        if isinstance(node, ast.Name):
+            if node.id in self.params: return repr(self.params[node.id])
+            if node.id not in FIELDS: raise RuleError(f"Unknown field or param '{node.id}'")
+            self.names.add(node.id)
+            return f"c[{node.id!r}]" if self.vector else f"f_{node.id}"
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)) and not isinstance(node.value, bool):
+            return repr(node.value)
+        raise RuleError(f"Unsupported expression: {ast.dump(node)}")
+
+def parse_expr(source: str) -> ast.Expression:
+    try:
+        return ast.parse(source.strip(), mode="eval")
+    except SyntaxError as e:
+        raise RuleError(f"Bad rule expression '{source}': {e}") from None
+
+def _build(source: str, name: str) -> Callable:
+    scope = {"np": np, "abs": abs, "min": min, "max": max, "__builtins__": {}}
+    exec(compile(source, f"<rules {name}>", "exec"), scope)
+    return scope["_rule_fn"]
+
+def compile_expr(source: str, params: Optional[Mapping[str, Any]] = None) -> Tuple[Callable, frozenset]:
+    """(vector fn over a mapping of field -> array, field names used)."""
+    emitter = _Emitter(params or {}, vector=True)
+    body = emitter.emit(parse_expr(source))
+    return _build(f"def _rule_fn(c):\n    return {body}\n", source), frozenset(emitter.names)
+
+@dataclass
+class Rule:
+    side: str # LONG / SHORT
+    when: str
+    entry: str = "close"
+    target: str = "close"
+    stop: str = "close"
+    reason: str = ""
+
+class RuleStrategy:
+    """A strategy made of compiled rules; usable per symbol (evaluate) or over a snapshot (evaluate_batch)."""
+    def __init__(self, name: str, rules: Sequence[Rule], gate: Optional[str] = None,
+                 params: Optional[Mapping[str, Any]] = None):
+        self.name = name
+        self.rules = list(rules)
+        self.params = dict(params or {})
+        self.gate = compile_expr(gate, self.params)[0] if gate else None
+        self.compiled = [(rule, [compile_expr(getattr(rule, f), self.params)[0] for f in ("when", "entry", "target", "stop")])
+                         for rule in self.rules]
+        self.evaluate = self._compile_scalar(gate)
+        self.requires = tuple(sorted({FIELDS[f] for f in self.fields}))
+
+    def _compile_scalar(self, gate: Optional[str]) -> Callable:
+        """
+        The whole rule set as one straight-line Python function of the indicator
+        context (fields bound to locals, short-circuiting and/or), so the
+        per-symbol path costs about what the hand-written strategy did.
+        """
+        emitter = _Emitter(self.params, vector=False)
+        lines = []
+        if gate: lines.append(f"    if not {emitter.emit(parse_expr(gate))}: return None")
+        for rule in self.rules:
+            when, entry, target, stop = (emitter.emit(parse_expr(getattr(rule, f))) for f in ("when", "entry", "target", "stop"))
+            lines.append(f"    if {when}:")
+            lines.append(f"        return {{'side': {rule.side!r}, 'entry': {entry}, 'target': {target}, "
+                         f"'stop_loss': {stop}, 'reason': {rule.reason!r}}}")
+        self.fields = tuple(sorted(emitter.names))
+        loads = []
+        for node in ("bar", "prior", "levels", "trend_shift", "regime"):
+            used = [f for f in self.fields if FIELDS[f] == node]
+            if not used: continue
+            if node in ("trend_shift", "regime"):
+                loads.append(f"    f_{node} = ctx[{node!r}]")
+                continue
+            loads.append(f"    {node} = ctx[{node!r}]")
+            for f in used:
+                key = f[len("prior_"):] if node == "prior" else f
+                loads.append(f"    f_{f} = {node}[{key!r}]")
+        source = "def _rule_fn(ctx):\n" + "\n".join(loads + lines + ["    return None"]) + "\n"
+        return _build(source, self.name)
+
+    def evaluate_batch(self, columns: Mapping[str, np.ndarray]) -> List[Tuple[int, Dict]]:
+        """(row, signal) for every row of a column snapshot that fires, in row order."""
+        n = len(next(iter(columns.values()))) if columns else 0
+        if not n: return []
+        open_rows = np.ones(n, dtype=bool)
+        if self.gate: open_rows &= np.broadcast_to(self.gate(columns), n)
+        hits = []
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for rule, (when, entry, target, stop) in self.compiled:
+                fire = open_rows & np.broadcast_to(when(columns), n)
+                if not fire.any(): continue
+                open_rows &= ~fire
+                rows = np.flatnonzero(fire)
+                values = [np.broadcast_to(fn(columns), n)[rows].tolist() for fn in (entry, target, stop)]
+                for row, e, t, s in zip(rows.tolist(), *values):
+                    hits.append((row, {"side": rule.side, "entry": e, "target": t, "stop_loss": s, "reason": rule.reason}))
+        hits.sort(key=lambda h: h[0])
+        return hits
@@ -0,0 +1,63 @@
+from typing import Any, Dict, List, Sequence, Tuple
+
+from core.indicator_graph import IndicatorGraph
+from strategies.mean_reversion import mean_reversion_rules, mean_reversion_strategy
+
+# Strategies selectable via Settings.STRATEGIES (comma separated)
+STRATEGY_CLASSES = {
+    "mean_reversion": mean_reversion_strategy,
+    "mean_reversion_rules": mean_reversion_rules, # same signals, compiled rules (strategies/rules.py)
+}
+
+class StrategyRuntime:
+    """
+    Hosts several strategies over one market snapshot. Each strategy declares
+    `requires` (indicator names) and implements `evaluate(ctx)`; indicators come
+    from a shared IndicatorGraph, so an extra strategy only adds its own logic.
+    """
+    def __init__(self, graph: IndicatorGraph, strategies: Sequence[Any]):
+        self.graph = graph
+        self.strategies = list(strategies)
+        for strategy in self.strategies:
+            graph.validate(getattr(strategy, "requires", ()))
+
+    @staticmethod
+    def from_names(graph: IndicatorGraph, names: str, config) -> "StrategyRuntime":
+        strategies = []
+        for name in (n.strip() for n in names.split(",")):
+            if not name: continue
+            if name not in STRATEGY_CLASSES:
+                raise ValueError(f"Unknown strategy '{name}'. Options: {', '.join(STRATEGY_CLASSES)}")
+            strategies.append(STRATEGY_CLASSES[name](config))
+        return StrategyRuntime(graph, strategies)
+
+    def evaluate(self, sid: int, symbol: str, data: Dict, bar_key: Any = None) -> List[Dict]:
+        """Run every strategy for one symbol; returns signals tagged with the strategy name."""
+        ctx = self.graph.context(sid, symbol, data, bar_key)
+        signals = []
+        for strategy in self.strategies:
+            signal = strategy.evaluate(ctx)
+            if signal:
+                signal.setdefault("strategy", getattr(strategy, "name", type(strategy).__name__))
+                signals.append(signal)
+        return signals
+
+    @property
+    def vectorized(self) -> bool:
+        """True when every strategy can evaluate a whole column snapshot at once."""
+        return bool(self.strategies) and all(hasattr(s, "evaluate_batch") for s in self.strategies)
+
+    def fields(self) -> Tuple[str, ...]:
+        """Snapshot columns the vectorized strategies read."""
+        return tuple(sorted({f for s in self.strategies for f in getattr(s, "fields", ())}))
+
+    def evaluate_batch(self, columns: Dict[str, Any]) -> List[Tuple[int, Dict]]:
+        """(row, signal) for every strategy over one column snapshot, grouped by row."""
+        hits = []
+        for order, strategy in enumerate(self.strategies):
+            name = getattr(strategy, "name", type(strategy).__name__)
+            for row, signal in strategy.evaluate_batch(columns):
+                signal.setdefault("strategy", name)
+                hits.append((row, order, signal))
+        hits.sort(key=lambda h: (h[0], h[1]))
+        return [(row, signal) for row, _, signal in hits]
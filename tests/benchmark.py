@@ -0,0 +1,447 @@
+"""
+Offline benchmark suite for the tick pipeline.
+
+Runs against seeded synthetic quotes (no network), appends every run to a
+JSONL history file and compares medians with a stored baseline:
+
+    python tests/benchmark.py                    # run + compare with baseline
+    python tests/benchmark.py --save-baseline    # run + store as new baseline
+    python tests/benchmark.py --quick --only cycle
+
+The baseline is per machine (timings don't carry over) and is not committed:
+the first run on a machine stores it in bench_baseline.json, and benchmarks
+added later are stored the first time they run. Exits with status 1 if any
+benchmark's median is slower than its baseline by more than --threshold
+(default 25%).
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+DEFAULT_BASELINE = os.path.join(ROOT, "bench_baseline.json")
+DEFAULT_HISTORY = os.path.join(ROOT, "bench_history.jsonl")
+
+BENCHMARKS = []
+
+def benchmark(name: str, repeat: int = 7, quick_repeat: int = 3):
+    """Register a setup function that returns the zero-arg callable to time."""
+    def wrap(setup):
+        BENCHMARKS.append((name, setup, repeat, quick_repeat))
+        return setup
+    return wrap
+
+# --- Synthetic data ---
+
+def make_quotes(n: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    quotes = {}
+    for i in range(n):
+        price = rng.uniform(50, 5000)
+        spread = price * rng.uniform(0.005, 0.03)
+        low = price - spread * rng.random()
+        high = low + spread
+        quotes[f"SYN{i:05d}"] = {
+            "open": rng.uniform(low, high), "high": high, "low": low,
+            "close": rng.uniform(low, high), "volume": rng.randint(10_000, 5_000_000)
+        }
+    return quotes
+
+def step_quotes(quotes: dict, rng: random.Random) -> dict:
+    """Advance every quote by one small random move, widening the day range as needed."""
+    stepped = {}
+    for s, q in quotes.items():
+        close = q["close"] * (1 + rng.gauss(0, 0.004))
+        stepped[s] = {
+            "open": q["open"], "high": max(q["high"], close), "low": min(q["low"], close),
+            "close": close, "volume": q["volume"] + rng.randint(0, 50_000)
+        }
+    return stepped
+
+def make_engine(n_symbols: int):
+    from main import TradingEngine
+    engine = TradingEngine()
+    engine.ai_analyzer.api_key = None
+    quotes = make_quotes(n_symbols)
+    engine.watchlist = list(quotes)
+    engine.registry.ids_for(engine.watchlist)
+    return engine, quotes
+
+# --- Benchmarks ---
+
+@benchmark("strategy.generate_signal x10000")
+def bench_generate_signal():
+    from config.settings import config
+    from strategies.mean_reversion import mean_reversion_strategy
+    strategy = mean_reversion_strategy(config)
+    quotes = list(make_quotes(10_000).values())
+
+    def run():
+        for q in quotes:
+            mid = (q["high"] + q["low"]) / 2
+            strategy.generate_signal(q, q, mid * 1.002, mid * 0.998, "REGIME_A", mid * 0.003, 0.5)
+    return run
+
+@benchmark("rules.mean_reversion evaluate_batch x10000")
+def bench_rules_batch():
+    import numpy as np
+    from config.settings import config
+    from strategies.mean_reversion import mean_reversion_rules
+    strategy = mean_reversion_rules(config)
+    quotes = list(make_quotes(10_000).values())
+    columns = {f: np.array([q[f] for q in quotes], dtype=float) for f in ("open", "high", "low", "close", "volume")}
+    columns.update({f"prior_{f}": columns[f] for f in ("open", "high", "low", "close", "volume")})
+    mid = (columns["high"] + columns["low"]) / 2
+    columns.update(support=mid * 0.998, resistance=mid * 1.002, base_range=mid * 0.003,
+                   trend_shift=np.full(len(quotes), 0.5), regime=np.full(len(quotes), "REGIME_A"))
+
+    def run():
+        strategy.evaluate_batch(columns)
+    return run
+
+@benchmark("correlation bar close + clusters 2000 symbols")
+def bench_correlation():
+    import numpy as np
+    from core.correlation import RollingCorrelation
+    rng = np.random.default_rng(29)
+    n = 2000
+    corr = RollingCorrelation(window=120, bar_sec=60, max_symbols=n, min_bars=30, capacity=n)
+    sids = np.arange(n)
+    price = np.full(n, 100.0)
+    state = {"ts": 0.0}
+    for _ in range(150): # full window, wrapped
+        price *= np.exp(rng.normal(0, 0.002, (n // 50, 1)).repeat(50, axis=1).ravel() + rng.normal(0, 0.002, n))
+        corr.update(sids, price, state["ts"])
+        state["ts"] += 60
+
+    def run():
+        # One new bar, then the first cluster query pays for the rank update and the relabel
+        price[:] *= np.exp(rng.normal(0, 0.002, n))
+        corr.update(sids, price, state["ts"])
+        state["ts"] += 60
+        corr.update(sids[:1], price[:1], state["ts"])
+        corr.cluster(0)
+    return run
+
+@benchmark("tracing 10000 ticks, unsampled cycle + 20 signal traces")
+def bench_tracing():
+    from core.tracing import Tracer
+    tracer = Tracer(sample_rate=0.0, signals=True, max_events=200_000)
+    symbols = [f"S{i}" for i in range(10000)]
+
+    def tick(symbol):
+        if symbol[-3:] == "000" or symbol[-3:] == "500":
+            trace = tracer.signal(symbol)
+            with tracer.span("costs", trace, "signal"): pass
+
+    def run():
+        trace = tracer.begin_cycle()
+        for i in range(0, len(symbols), 500):
+            trace.chunks.append((0, 1, symbols[i:i + 500]))
+        fn = tracer.bind(trace, tick)
+        for s in symbols: fn(s)
+        tracer.clear()
+    return run
+
+@benchmark("indicators.base_range+trend_shift 2000 bars")
+def bench_indicators():
+    import numpy as np
+    import pandas as pd
+    from core.indicators import calculate_base_range, calculate_trend_shift_ema, calculate_trend_shift_linreg
+    rng = np.random.default_rng(7)
+    close = pd.Series(1000 + rng.normal(0, 2, 2000).cumsum())
+    high = close + rng.uniform(0, 5, 2000)
+    low = close - rng.uniform(0, 5, 2000)
+
+    def run():
+        calculate_base_range(high, low, 20)
+        calculate_trend_shift_ema(close, 200)
+        calculate_trend_shift_linreg(close, 20)
+    return run
+
+@benchmark("indicators.update_tsd_count+get_regime x100000")
+def bench_regime():
+    from core.indicators import update_tsd_count, get_regime
+    rng = random.Random(3)
+    moves = [(rng.uniform(0, 10), rng.uniform(1, 10)) for _ in range(100_000)]
+
+    def run():
+        tsd = 0
+        for t, r in moves:
+            tsd = update_tsd_count(tsd, t, r)
+            get_regime(tsd)
+    return run
+
+@benchmark("regime.seed 10000 symbols x 60 days")
+def bench_regime_tracker():
+    from brokers.synthetic import SyntheticBroker
+    import numpy as np
+    from core.regime import RegimeTracker
+    symbols = [f"SYN{i:05d}" for i in range(10_000)]
+    history = SyntheticBroker(symbols, seed=2).get_history_batch(symbols, days=60)
+    bars = np.stack([np.column_stack([h[f] for f in ("open", "high", "low", "close")]) for h in history.values()])
+    sids = np.arange(len(bars))
+    tracker = RegimeTracker(capacity=len(sids))
+
+    def run():
+        tracker.seed(sids, bars)
+    return run
+
+@benchmark("tax.calculate_costs x10000")
+def bench_tax():
+    from utils.tax_calculator import TaxCalculator
+    calc = TaxCalculator()
+    rng = random.Random(5)
+    trades = [(p, p * rng.uniform(0.99, 1.01), rng.randint(1, 500)) for p in (rng.uniform(50, 5000) for _ in range(10_000))]
+
+    def run():
+        for buy, sell, qty in trades:
+            calc.calculate_costs(buy, sell, qty)
+    return run
+
+@benchmark("engine.run_tick x2000")
+def bench_run_tick():
+    engine, quotes = make_engine(2000)
+    rng = random.Random(11)
+    for s, q in quotes.items(): engine.run_tick(s, q) # seed levels
+    state = {"quotes": quotes}
+
+    def run():
+        state["quotes"] = step_quotes(state["quotes"], rng)
+        for s, q in state["quotes"].items():
+            engine.run_tick(s, q)
+    return run
+
+def _cycle_setup(n_symbols: int):
+    engine, quotes = make_engine(n_symbols)
+    executor = ThreadPoolExecutor(max_workers=50)
+    rng = random.Random(13)
+    engine.run_cycle(quotes, executor) # seed levels
+    state = {"quotes": quotes}
+
+    def run():
+        state["quotes"] = step_quotes(state["quotes"], rng)
+        engine.run_cycle(state["quotes"], executor)
+    return run
+
+@benchmark("engine.cycle 200 symbols")
+def bench_cycle_200():
+    return _cycle_setup(200)
+
+@benchmark("engine.cycle 2000 symbols", repeat=5)
+def bench_cycle_2000():
+    return _cycle_setup(2000)
+
+@benchmark("engine.cycle 10000 symbols", repeat=3, quick_repeat=1)
+def bench_cycle_10000():
+    return _cycle_setup(10_000)
+
+@benchmark("synthetic.get_market_data_batch 10000 symbols")
+def bench_synthetic_feed():
+    from brokers.synthetic import SyntheticBroker
+    clock = {"t": 0.0}
+    symbols = [f"SYN{i:05d}" for i in range(10_000)]
+    feed = SyntheticBroker(symbols, seed=1, clock=lambda: clock["t"])
+    chunks = [symbols[i:i + feed.batch_size] for i in range(0, len(symbols), feed.batch_size)]
+
+    def run():
+        clock["t"] += 3.0
+        for chunk in chunks:
+            feed.get_market_data_batch(chunk)
+    return run
+
+@benchmark("levels.load_history 2000 symbols x 60 days")
+def bench_level_history():
+    from brokers.synthetic import SyntheticBroker
+    from core.levels import LevelEngine
+    symbols = [f"SYN{i:05d}" for i in range(2000)]
+    history = SyntheticBroker(symbols, seed=1).get_history_batch(symbols, days=60)
+    sids, bars = list(range(len(history))), list(history.values())
+    levels = LevelEngine(lookback=60, capacity=len(sids))
+
+    def run():
+        levels.load_history(sids, bars)
+    return run
+
+@benchmark("levels.add_bars 10000 symbols")
+def bench_level_add_bars():
+    from core.levels import LevelEngine
+    quotes = list(make_quotes(10_000).values())
+    levels = LevelEngine(lookback=60, capacity=len(quotes))
+    sids = list(range(len(quotes)))
+    cols = [[q[f] for q in quotes] for f in ("open", "high", "low", "close")]
+
+    def run():
+        levels.add_bars(sids, *cols)
+    return run
+
+@benchmark("bars.update_quotes 10000 symbols x3 timeframes")
+def bench_bars():
+    from core.bars import BarBuilder
+    quotes = make_quotes(10_000)
+    bars = BarBuilder(timeframes=(60, 300, 900), n_symbols=len(quotes))
+    sids, rng = list(range(len(quotes))), random.Random(17)
+    state = {"quotes": quotes, "ts": 0.0}
+
+    def run():
+        state["quotes"] = step_quotes(state["quotes"], rng)
+        state["ts"] += 20.0 # a 1-minute bar closes every third call
+        bars.update_quotes(sids, state["quotes"].values(), state["ts"])
+    return run
+
+@benchmark("history.equity_query 1 week of 1s points -> 1000")
+def bench_history_query():
+    from core.history import TimeSeries
+    rng = random.Random(19)
+    series = TimeSeries()
+    equity = 100000.0
+    for i in range(7 * 24 * 3600):
+        equity += rng.gauss(0, 5)
+        series.append(1_700_000_000.0 + i, equity)
+
+    def run():
+        json.dumps(series.query(points=1000))
+    return run
+
+@benchmark("journal.record_signal 500 signals + filters, committed")
+def bench_journal():
+    from core.journal import Journal
+    journal = Journal(os.path.join(tempfile.mkdtemp(prefix="ag_journal_"), "journal.db"))
+    signal = {"side": "LONG", "entry": 100.0, "target": 102.0, "stop_loss": 99.0, "strategy": "mean_reversion"}
+
+    def run():
+        for i in range(500):
+            signal_id = journal.record_signal(f"SYN{i:05d}", signal, 100.0, "ordered", order_key=f"k{i}")
+            journal.record_filter(signal_id, "ai", True)
+            journal.record_filter(signal_id, "profitability", True, 0.4)
+        journal.flush()
+    return run
+
+@benchmark("risk_sim 1M sessions", repeat=3, quick_repeat=1)
+def bench_risk_sim():
+    import numpy as np
+    from core.risk_sim import run_simulation
+    outcomes = np.random.default_rng(23).normal(0.2, 1.5, 500)
+
+    def run():
+        run_simulation(outcomes, paths=1_000_000)
+    return run
+
+@benchmark("dashboard.state_serialization 2000 symbols")
+def bench_state_serialization():
+    engine, quotes = make_engine(2000)
+    for s, q in quotes.items(): engine.run_tick(s, q)
+    engine.equity_history = [{"time": f"{i:06d}", "equity": 100000.0 + i} for i in range(500)]
+
+    def run():
+        json.dumps(engine.get_state())
+    return run
+
+# --- Runner ---
+
+def time_callable(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "runs": repeat
+    }
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base is None: continue
+        ratio = res["median_ms"] / base if base > 0 else 1.0
+        status = "REGRESSION" if ratio > 1 + threshold else "ok"
+        print(f"  {name:<50} {res['median_ms']:>10.2f} ms  baseline {base:>10.2f} ms  x{ratio:.2f}  {status}")
+        if status == "REGRESSION": regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="AG_TRADER tick pipeline benchmarks")
+    parser.add_argument("--only", help="Run only benchmarks whose name contains this string")
+    parser.add_argument("--quick", action="store_true", help="Fewer repetitions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--history", default=DEFAULT_HISTORY)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    history_path = os.path.abspath(args.history)
+    baseline_path = os.path.abspath(args.baseline)
+
+    # Engine writes screenshots/ and paper_data.json into the cwd
+    os.chdir(tempfile.mkdtemp(prefix="ag_bench_"))
+
+    random.seed(0)
+    results = {}
+    for name, setup, repeat, quick_repeat in BENCHMARKS:
+        if args.only and args.only not in name: continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn = setup()
+            fn() # warm-up
+            res = time_callable(fn, quick_repeat if args.quick else repeat)
+        results[name] = res
+        print(f"[BENCH] {name:<50} median {res['median_ms']:>10.2f} ms  (min {res['min_ms']:.2f}, max {res['max_ms']:.2f})")
+
+    record = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_rev": git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results
+    }
+    with open(history_path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"[BENCH] History appended to {history_path}")
+
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f: baseline = json.load(f)
+    # --save-baseline replaces every entry; otherwise only benchmarks without one are added
+    fresh = {name: res["median_ms"] for name, res in results.items() if args.save_baseline or name not in baseline}
+    if fresh:
+        compared = {name: res for name, res in results.items() if name not in fresh}
+        baseline.update(fresh)
+        with open(baseline_path, "w") as f:
+            json.dump(baseline, f, indent=4, sort_keys=True)
+        print(f"[BENCH] Baseline for {len(fresh)} benchmark(s) saved to {baseline_path}")
+    else:
+        compared = results
+    if not compared: return 0
+
+    print(f"[BENCH] Comparing against {baseline_path} (threshold {args.threshold:.0%})")
+    regressions = compare(compared, baseline, args.threshold)
+    if regressions:
+        print(f"❌ {len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        return 1
+    print("✅ No regressions.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
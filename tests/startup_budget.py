@@ -0,0 +1,79 @@
+"""
+Cold-start budget check for the engine and the API process.
+
+Each probe runs in a fresh interpreter (so nothing is already imported) and
+reports wall time plus which heavy third-party modules got loaded:
+
+    python tests/startup_budget.py
+    python tests/startup_budget.py --scale 2     # e.g. on a slow CI box
+
+Exits with status 1 if a probe exceeds its time budget or imports a module
+that is supposed to stay deferred until first use.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported just to start the engine in MOCK mode or to serve the API
+DEFERRED_MODULES = ("pandas", "yfinance", "dhanhq", "kiteconnect", "twisted", "requests")
+
+# name -> (code to time, budget in ms)
+PROBES = {
+    "import main": ("import main", 400),
+    "import main + TradingEngine()": ("import main; main.TradingEngine()", 450),
+    "import dashboard.api": ("import dashboard.api", 1000),
+}
+
+PROBE_TEMPLATE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{code}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+def run_probe(code: str, cwd: str) -> dict:
+    env = dict(os.environ, DATA_FEED="MOCK", SHARD_WORKERS="0")
+    script = PROBE_TEMPLATE.format(root=ROOT, code=code, deferred=DEFERRED_MODULES)
+    out = subprocess.run([sys.executable, "-c", script], cwd=cwd, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="AG_TRADER startup budget check")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per probe (median is used)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget by this factor")
+    args = parser.parse_args()
+
+    # Engine writes paper_data.json into the cwd
+    cwd = tempfile.mkdtemp(prefix="ag_startup_")
+    failures = []
+    for name, (code, budget_ms) in PROBES.items():
+        runs = [run_probe(code, cwd) for _ in range(args.repeat)]
+        ms = statistics.median(r["ms"] for r in runs)
+        loaded = sorted(set(m for r in runs for m in r["loaded"]))
+        budget = budget_ms * args.scale
+        status = "ok"
+        if ms > budget:
+            status = "OVER BUDGET"
+            failures.append(f"{name} ({ms:.0f} ms > {budget:.0f} ms)")
+        if loaded:
+            status = "EAGER IMPORT"
+            failures.append(f"{name} imported {', '.join(loaded)}")
+        print(f"[STARTUP] {name:<32} {ms:>8.1f} ms  budget {budget:>7.0f} ms  {status}")
+
+    if failures:
+        print(f"❌ Startup budget exceeded: {'; '.join(failures)}")
+        return 1
+    print("✅ Startup within budget.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from core.bars import FIELDS, BarBuilder
+
+START = 1_714_620_600.0 # aligned to a 15-minute boundary
+
+def random_ticks(n_ticks, n_symbols=4, step=20.0, seed=3):
+    """(ts, sids, prices, cum volumes) per poll; each symbol skips ~20% of polls."""
+    rng = np.random.default_rng(seed)
+    price = np.full(n_symbols, 100.0)
+    volume = np.zeros(n_symbols)
+    for i in range(n_ticks):
+        price *= np.exp(rng.normal(0, 0.002, n_symbols))
+        volume += rng.integers(0, 500, n_symbols)
+        sids = np.flatnonzero(rng.random(n_symbols) > 0.2)
+        if sids.size: yield START + i * step, sids, price[sids].copy(), volume[sids].copy()
+
+def reference_bars(ticks, seconds):
+    """Closed bars per symbol, built one tick at a time."""
+    closed, forming, last_volume = {}, {}, {}
+    for ts, sids, prices, volumes in ticks:
+        bucket = int(ts // seconds)
+        for sid, p, v in zip(sids.tolist(), prices.tolist(), volumes.tolist()):
+            bar = forming.get(sid)
+            if bar is None or bar["bucket"] != bucket:
+                if bar is not None: closed.setdefault(sid, []).append([bar[f] for f in FIELDS])
+                bar = forming[sid] = {"bucket": bucket, "open": p, "high": p, "low": p,
+                                      "start": last_volume.get(sid, v)}
+            bar["high"], bar["low"], bar["close"] = max(bar["high"], p), min(bar["low"], p), p
+            bar["volume"] = v - bar["start"]
+            last_volume[sid] = v
+    return closed, forming
+
+@pytest.mark.parametrize("timeframe", [60, 300, 900])
+def test_ring_matches_reference_after_wraparound(timeframe):
+    capacity = 7
+    ticks = list(random_ticks(1200))
+    builder = BarBuilder(capacity=capacity, n_symbols=2)
+    for ts, sids, prices, volumes in ticks:
+        builder.update(sids, prices, volumes, ts)
+    expected, forming = reference_bars(ticks, timeframe)
+    for sid, bars in expected.items():
+        assert builder.closed(sid, timeframe) == len(bars) > capacity # wrapped at least once
+        view = builder.view(sid, timeframe)
+        np.testing.assert_allclose(view, np.array(bars[-capacity:], dtype=np.float32), rtol=1e-6)
+        np.testing.assert_allclose(builder.view(sid, timeframe, 3), view[-3:])
+        assert builder.prior(sid, timeframe) == pytest.approx(dict(zip(FIELDS, bars[-1])), rel=1e-6)
+        assert builder.current(sid, timeframe) == pytest.approx({f: forming[sid][f] for f in FIELDS})
+
+def test_views_are_read_only_slices_of_the_ring():
+    builder = BarBuilder(timeframes=(60,), capacity=5)
+    for ts, sids, prices, volumes in random_ticks(200, n_symbols=1):
+        builder.update(sids, prices, volumes, ts)
+    series = builder.series[60]
+    view = builder.view(0)
+    assert len(view) == 5 and np.shares_memory(view, series.buf)
+    with pytest.raises(ValueError): view[0, 0] = 1.0
+
+def test_symbols_without_quotes():
+    builder = BarBuilder(capacity=5)
+    assert builder.prior(3) is None and builder.current(3) is None
+    assert builder.closed(10_000) == 0 and len(builder.view(10_000)) == 0
+    builder.update_quotes([3, 4], [{"close": 10.0, "volume": 100}, {"open": 5.0}], START)
+    assert builder.current(3) == {"open": 10.0, "high": 10.0, "low": 10.0, "close": 10.0, "volume": 0.0}
+    assert builder.current(4) is None # no close, no bar
+
+def test_volume_restart_starts_from_zero():
+    builder = BarBuilder(timeframes=(60,), capacity=5)
+    builder.update(np.array([0]), np.array([10.0]), np.array([1_000.0]), START)
+    builder.update(np.array([0]), np.array([10.5]), np.array([1_200.0]), START + 30)
+    builder.update(np.array([0]), np.array([11.0]), np.array([50.0]), START + 60) # new session, counter reset
+    assert builder.prior(0)["volume"] == 200.0
+    assert builder.current(0)["volume"] == 50.0
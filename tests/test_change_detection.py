@@ -0,0 +1,58 @@
+from config.settings import config
+from core.history import EventLog, history
+from tests.test_sharding import DAY, InlineExecutor, load_session, make_engine, outcome
+
+def stale_cycles(cycles):
+    """Symbol j only gets a new quote every (1 + j % 4) cycles; otherwise an equal copy or the same dict."""
+    out, last = [], {}
+    for i, (t, quotes) in enumerate(cycles):
+        snapshot = {}
+        for j, (s, q) in enumerate(quotes.items()):
+            if s not in last or i % (1 + j % 4) == 0: last[s] = q
+            snapshot[s] = dict(last[s]) if j % 2 else last[s]
+        out.append((t, snapshot))
+    return out
+
+def run_session(symbols, daily, cycles, monkeypatch, every_quote=False):
+    """Signals/orders plus the symbols evaluated per cycle; every_quote re-runs unchanged quotes too."""
+    monkeypatch.setitem(history.events, "signals", EventLog())
+    engine, clock = make_engine(symbols, daily)
+    executor, evaluated = InlineExecutor(), []
+    tick_symbols = engine.tick_symbols
+
+    def recorded():
+        picked = tick_symbols()
+        if every_quote: picked += [s for s in quotes if s not in picked]
+        evaluated.append(picked)
+        return picked
+
+    engine.tick_symbols = recorded
+    for t, quotes in cycles:
+        clock.advance_to(t)
+        engine.run_cycle(quotes, executor)
+        engine.order_router.poll()
+    return outcome(engine), evaluated
+
+def test_unchanged_quotes_are_skipped_without_changing_signals(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "LEVEL_RECHECK_CYCLES", 1) # isolate change detection from the proximity band
+    symbols, daily, cycles = load_session(tmp_path)
+    cycles = stale_cycles(cycles)
+    expected, everything = run_session(symbols, daily, cycles, monkeypatch, every_quote=True)
+    assert expected[0], "the session should produce signals"
+    result, changed = run_session(symbols, daily, cycles, monkeypatch)
+    assert result == expected
+    assert sum(map(len, changed)) < 0.6 * sum(map(len, everything))
+
+    # The session roll re-evaluates every symbol once, changed or not
+    second_day = next(i for i, (t, _) in enumerate(cycles) if t >= cycles[0][0] + DAY)
+    assert set(changed[second_day]) == set(symbols)
+
+def test_changed_quotes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    symbols, daily, _ = load_session(tmp_path)
+    engine, _ = make_engine(symbols, daily)
+    a, b, c = {"close": 1.0}, {"close": 2.0}, {"close": 3.0}
+    engine.last_quotes = {"A": a, "B": b, "C": c}
+    dirty = engine.changed_quotes({"A": a, "B": dict(b), "C": {"close": 3.5}, "D": {"close": 4.0}})
+    assert dirty == {"C": {"close": 3.5}, "D": {"close": 4.0}}
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from brokers.composite import CompositeFeed
+
+class FakeFeed:
+    """Answers {symbol: {"close": price}}; can fail, return nothing, or hold until released."""
+    def __init__(self, name, price, mode="ok", delay=0.0):
+        self.name, self.price, self.mode, self.delay = name, price, mode, delay
+        self.release = threading.Event()
+        self.calls = []
+
+    def get_market_data_batch(self, symbols):
+        self.calls.append(time.monotonic())
+        if self.mode == "hold": self.release.wait(5)
+        time.sleep(self.delay)
+        if self.mode == "error": raise ConnectionError(f"{self.name} down")
+        if self.mode == "empty": return {}
+        return {s: {"close": self.price} for s in symbols}
+
+    def get_history_batch(self, symbols, days=60):
+        if self.mode != "ok": raise ConnectionError(f"{self.name} down")
+        return {s: {"close": [self.price] * days} for s in symbols}
+
+def composite(*feeds, **kwargs):
+    kwargs.setdefault("probe_sec", 3600) # keep the background prober out of the way
+    return CompositeFeed([(f.name, f) for f in feeds], **kwargs)
+
+def close_of(result):
+    return result["AAA"]["close"]
+
+def test_preference_order_until_latency_says_otherwise():
+    a, b = FakeFeed("A", 1.0), FakeFeed("B", 2.0)
+    feed = composite(a, b)
+    assert close_of(feed.get_market_data_batch(["AAA"])) == 1.0 and not b.calls
+    feed.sources[0].latencies.extend([0.5] * 20)
+    feed.sources[1].latencies.extend([0.1] * 20)
+    assert [s.name for s in feed.ranked()] == ["B", "A"]
+    assert close_of(feed.get_market_data_batch(["AAA"])) == 2.0
+
+@pytest.mark.parametrize("mode", ["error", "empty"])
+def test_failed_call_falls_over_at_once_and_trips_the_source(mode):
+    a, b, c = FakeFeed("A", 1.0, mode), FakeFeed("B", 2.0), FakeFeed("C", 3.0)
+    feed = composite(a, b, c, timeout=5.0, failure_threshold=2)
+    start = time.monotonic()
+    assert close_of(feed.get_market_data_batch(["AAA"])) == 2.0
+    assert time.monotonic() - start < 1.0 # did not wait for a hedge delay
+    assert len(a.calls) == len(b.calls) == 1 and not c.calls
+    assert not feed.sources[0].down
+    feed.get_market_data_batch(["AAA"])
+    assert feed.sources[0].down and [s.name for s in feed.ranked()] == ["B", "C"]
+    assert feed.hedged == 0
+
+def test_slow_primary_is_hedged_to_the_next_source():
+    a, b = FakeFeed("A", 1.0, "hold"), FakeFeed("B", 2.0)
+    feed = composite(a, b, hedge_min_ms=20, timeout=0.4) # no latency history: hedge after timeout / 4
+    start = time.monotonic()
+    assert close_of(feed.get_market_data_batch(["AAA"])) == 2.0
+    assert 0.09 <= b.calls[0] - start < 0.3
+    assert feed.hedged == 1
+    a.release.set()
+
+def test_hedges_stay_within_the_budget():
+    a, b = FakeFeed("A", 1.0, delay=0.15), FakeFeed("B", 2.0)
+    feed = composite(a, b, hedge_budget=0.0, hedge_min_ms=20, timeout=0.4)
+    assert close_of(feed.get_market_data_batch(["AAA"])) == 2.0 # the one free hedge
+    assert close_of(feed.get_market_data_batch(["AAA"])) == 1.0 # budget spent: wait for the primary
+    assert feed.hedged == 1 and len(b.calls) == 1
+
+def test_everything_down_keeps_trying_in_preference_order():
+    a, b = FakeFeed("A", 1.0, "error"), FakeFeed("B", 2.0, "error")
+    feed = composite(a, b, failure_threshold=1)
+    assert feed.get_market_data_batch(["AAA"]) == {}
+    assert all(s.down for s in feed.sources) and not feed.authenticate()
+    assert [s.name for s in feed.ranked()] == ["A", "B"]
+    b.mode = "ok"
+    assert close_of(feed.get_market_data_batch(["AAA"])) == 2.0
+    assert not feed.sources[1].down
+
+def test_history_falls_back_past_failing_sources():
+    a, b = FakeFeed("A", 1.0, "error"), FakeFeed("B", 2.0)
+    feed = composite(a, b)
+    assert feed.get_history_batch(["AAA"], days=3) == {"AAA": {"close": [2.0] * 3}}
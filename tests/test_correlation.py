@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from core.correlation import RollingCorrelation
+
+def random_prices(n_bars, seed=11):
+    """Two factor groups (sids 0-2 and 3-5) plus two independent symbols (6, 7)."""
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.01, (n_bars, 2))
+    loading = np.zeros((8, 2))
+    loading[:3, 0] = 1.0
+    loading[3:6, 1] = 1.0
+    returns = factors @ loading.T + rng.normal(0, 0.002, (n_bars, 8)) * np.r_[np.ones(6), 5, 5]
+    return 100 * np.exp(np.cumsum(returns, axis=0))
+
+def feed(corr, prices, every=None, first_bar=0):
+    """One update per bar; optionally query in between so the sums are kept incrementally."""
+    sids = list(range(prices.shape[1]))
+    for bar, row in enumerate(prices, first_bar):
+        corr.update(sids, row, bar * 60.0 + 1)
+        if every and bar % every == 0: corr.correlation(0, 1)
+
+@pytest.mark.parametrize("every", [None, 1, 7])
+def test_matches_numpy_over_the_window(every):
+    window, prices = 50, random_prices(137)
+    corr = RollingCorrelation(window=window, bar_sec=60, min_bars=10, threshold=0.8)
+    feed(corr, prices, every)
+    # The last update only opens a bar; the closed ones end at the second to last price
+    returns = np.diff(np.log(prices), axis=0)[-window - 1:-1]
+    expected = np.corrcoef(returns.T)
+    for a, b in [(0, 1), (0, 3), (3, 5), (2, 7), (6, 7)]:
+        assert corr.correlation(a, b) == pytest.approx(expected[a, b], abs=1e-9)
+    weights = np.array([1.0, -2.0, 0.5, 0, 0, 3.0, 0, 1.0])
+    assert corr.portfolio_variance(range(8), weights) == pytest.approx(weights @ np.cov(returns.T) @ weights, rel=1e-9)
+
+def test_clusters_follow_the_factor_groups():
+    corr = RollingCorrelation(window=60, bar_sec=60, min_bars=30, threshold=0.8)
+    prices = random_prices(80)
+    feed(corr, prices[:20])
+    assert corr.cluster(0) == -1 and not corr.ready()
+    feed(corr, prices[20:], first_bar=20)
+    labels = corr.clusters(range(8))
+    assert labels[0] == labels[1] == labels[2] >= 0
+    assert labels[3] == labels[4] == labels[5] >= 0 and labels[3] != labels[0]
+    assert labels[6] == labels[7] == -1
+    assert corr.members(4) == [3, 4, 5]
+    by_sid = corr.cluster_labels()
+    assert by_sid[:8].tolist() == labels.tolist()
+    assert corr.cluster_labels() is by_sid # rebuilt only when a bar closes
+    assert corr.stats() == {"symbols": 8, "bars": 79, "clusters": 2, "clustered_symbols": 6}
+
+def test_untracked_symbols():
+    corr = RollingCorrelation(window=20, bar_sec=60, min_bars=5, max_symbols=4)
+    feed(corr, random_prices(30))
+    assert corr.size == 4
+    assert np.isnan(corr.correlation(0, 6)) and corr.cluster(6) == -1
+    assert corr.cluster_labels()[6] == -1
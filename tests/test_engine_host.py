@@ -0,0 +1,37 @@
+import json
+import os
+import socket
+import stat
+from multiprocessing import AuthenticationError
+
+import pytest
+
+from config.settings import config
+from core.engine_host import SHIPPED_KEY, ControlClient, ControlServer, configured_authkey, handle_command, new_authkey
+
+def test_trace_export_only_writes_the_configured_path(tmp_path, monkeypatch):
+    target, elsewhere = tmp_path / "trace.json", tmp_path / "elsewhere.json"
+    monkeypatch.setattr(config, "TRACE_EXPORT_PATH", str(target))
+    result = handle_command(None, "trace", {"action": "export", "path": str(elsewhere)})
+    assert result["path"] == str(target)
+    assert "traceEvents" in json.loads(target.read_text())
+    assert not elsewhere.exists()
+
+def test_external_mode_refuses_the_shipped_or_an_empty_key(monkeypatch):
+    for key in ("", SHIPPED_KEY):
+        monkeypatch.setattr(config, "ENGINE_CONTROL_KEY", key)
+        with pytest.raises(RuntimeError): configured_authkey()
+    monkeypatch.setattr(config, "ENGINE_CONTROL_KEY", "a-private-key")
+    assert configured_authkey() == b"a-private-key"
+    assert new_authkey() != new_authkey() and len(new_authkey()) == 32
+
+def test_control_socket_is_owner_only_and_needs_the_key(tmp_path):
+    address = str(tmp_path / "control.sock")
+    with socket.socket(socket.AF_UNIX) as stale: # left behind by a crashed engine
+        stale.bind(address)
+    server = ControlServer(None, address, b"right-key")
+    assert stat.S_IMODE(os.stat(address).st_mode) == 0o600
+    server.start()
+    assert "events" in ControlClient(address, b"right-key").call("trace")
+    with pytest.raises(AuthenticationError):
+        ControlClient(address, b"wrong-key").call("trace")
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from core.history import EventLog, TimeSeries, downsample_minmax
+
+def reference_minmax(values, points):
+    """Indices kept: the min and max of each consecutive bucket of ceil(n / (points // 2)) points."""
+    size = -(-len(values) // (points // 2))
+    keep = set()
+    for lo in range(0, len(values), size):
+        bucket = list(values[lo:lo + size])
+        keep.update([lo + bucket.index(min(bucket)), lo + bucket.index(max(bucket))])
+    return sorted(keep)
+
+@pytest.mark.parametrize("n, points", [(10, 4), (11, 4), (1000, 100), (1001, 100), (999, 7), (5, 2), (3, 1000)])
+def test_downsample_keeps_each_buckets_extremes(n, points):
+    rng = np.random.default_rng(n)
+    ts = np.cumsum(rng.uniform(0.5, 1.5, n))
+    values = rng.normal(0, 1, n)
+    out_ts, out_v = downsample_minmax(ts, values, points)
+    picks = reference_minmax(values.tolist(), points)
+    np.testing.assert_array_equal(out_ts, ts[picks])
+    np.testing.assert_array_equal(out_v, values[picks])
+    assert len(out_ts) <= points
+    assert values.min() in out_v and values.max() in out_v
+
+def test_downsample_bucket_edges():
+    # 10 points into 2 buckets of 5: [0..4] and [5..9]; extremes sit on the edges
+    values = np.array([5.0, 1, 2, 3, 9, 0, 4, 4, 4, 8])
+    ts, v = downsample_minmax(np.arange(10.0), values, 4)
+    assert ts.tolist() == [1, 4, 5, 9] and v.tolist() == [1, 9, 0, 8]
+    # 11 points make buckets of 6, so the last one is short: the padding never wins
+    ts, v = downsample_minmax(np.arange(11.0), np.r_[values, -1.0], 4)
+    assert ts.tolist() == [4, 5, 9, 10] and v.tolist() == [9, 0, 8, -1]
+
+def test_timeseries_ranges_are_inclusive_and_clamped():
+    series = TimeSeries()
+    for t in [1.0, 2.0, 3.0, 2.5, 4.0]: # clock stepped back once
+        series.append(t, t * 10)
+    ts, values = series.range(2.0, 3.0)
+    assert ts.tolist() == [2.0, 3.0, 3.0] and values.tolist() == [20.0, 30.0, 25.0]
+    assert series.range(4.5)[0].size == 0
+    result = series.query(points=4)
+    assert result["count"] == 5 and result["downsampled"] and len(result["t"]) == 4
+
+def test_timeseries_drops_the_oldest_half_at_the_cap():
+    series = TimeSeries(max_points=1024)
+    for i in range(1025):
+        series.append(float(i), float(i))
+    assert len(series) == 513
+    ts, _ = series.range()
+    assert ts[0] == 512.0 and ts[-1] == 1024.0
+
+def make_log(n, max_events=200_000):
+    log = EventLog(max_events)
+    for i in range(n):
+        log.append({"ts": 1000.0 + i // 3, "symbol": "ABC" if i % 4 == 0 else "XYZ", "i": i})
+    return log
+
+def pages(log, **kwargs):
+    cursor, seen = None, []
+    while True:
+        page = log.query(cursor=cursor, **kwargs)
+        seen.append([e["i"] for e in page["items"]])
+        cursor = page["next_cursor"]
+        if cursor is None: return seen
+
+@pytest.mark.parametrize("limit", [1, 7, 100])
+def test_cursor_pages_cover_the_range_once(limit):
+    log = make_log(50)
+    seen = pages(log, limit=limit)
+    assert sum(seen, []) == list(range(50))
+    assert all(len(p) == limit for p in seen[:-1])
+
+    by_symbol = pages(log, symbol="ABC", limit=limit)
+    assert sum(by_symbol, []) == list(range(0, 50, 4))
+
+    # start/end are inclusive; equal timestamps (3 per second) stay together
+    window = pages(log, start=1002.0, end=1004.0, limit=limit)
+    assert sum(window, []) == list(range(6, 15))
+    window = pages(log, start=1002.0, end=1004.0, symbol="ABC", limit=limit)
+    assert sum(window, []) == [8, 12]
+
+def test_trim_keeps_sequence_numbers_and_cursors():
+    log = make_log(10, max_events=10)
+    first = log.query(limit=3)
+    assert [e["seq"] for e in first["items"]] == [0, 1, 2]
+    log.append({"ts": 2000.0, "symbol": "ABC", "i": 10}) # 11 > 10: drops the oldest 6
+    assert len(log) == 5 and log.base_seq == 6
+    rest = pages(log, limit=3)
+    assert sum(rest, []) == [6, 7, 8, 9, 10]
+    # A cursor from before the trim resumes at the oldest kept event
+    assert [e["i"] for e in log.query(cursor=first["next_cursor"], limit=10)["items"]] == [6, 7, 8, 9, 10]
+    assert log.by_symbol["ABC"] == [8, 10]
+    assert log.query(symbol="NONE")["items"] == []
@@ -0,0 +1,69 @@
+from core.indicator_graph import IndicatorGraph, register_default_indicators
+from core.levels import LevelEngine, tick_levels
+from core.regime import RegimeTracker
+
+QUOTE = {"open": 100.0, "high": 103.0, "low": 98.0, "close": 101.0, "volume": 1000}
+
+def counting(fn, calls, name):
+    def wrapped(*args):
+        calls[name] = calls.get(name, 0) + 1
+        return fn(*args)
+    return wrapped
+
+def make_graph():
+    levels, regimes, calls = LevelEngine(), RegimeTracker(), {}
+    def get_levels(sid, data):
+        lvl = levels.get(sid)
+        if lvl is None:
+            levels[sid] = lvl = tick_levels(data["close"], data["high"], data["low"])
+        return lvl
+    graph = IndicatorGraph()
+    register_default_indicators(graph, counting(get_levels, calls, "levels"), counting(regimes.regime, calls, "regime"),
+                                levels_key=levels.revision_of, regime_key=lambda sid: regimes.revision)
+    return graph, levels, regimes, calls
+
+def test_node_is_shared_within_an_evaluation():
+    graph, _, _, calls = make_graph()
+    ctx = graph.context(0, "INFY", QUOTE)
+    assert ctx.require(["support", "resistance", "base_range", "levels"])[3]["support"] == ctx["support"]
+    assert calls["levels"] == 1
+
+def test_levels_and_regime_are_kept_across_ticks_until_they_change():
+    graph, levels, regimes, calls = make_graph()
+    first = graph.context(3, "TCS", QUOTE)["support"]
+    for close in (101.5, 102.0, 102.5, 103.0):
+        ctx = graph.context(3, "TCS", dict(QUOTE, close=close))
+        assert ctx["support"] == first
+        ctx["regime"]
+    # once to create the fallback levels, once to read them back under the new revision
+    assert calls["levels"] == 2 and calls["regime"] == 1
+
+    levels[3] = {"support": 90.0, "resistance": 110.0, "base_range": 5.0}
+    assert graph.context(3, "TCS", QUOTE)["support"] == 90.0
+    assert calls["levels"] == 3
+
+    regimes.revision += 1 # a day closed
+    graph.context(3, "TCS", QUOTE)["regime"]
+    assert calls["regime"] == 2
+
+def test_keys_are_per_symbol():
+    graph, levels, _, calls = make_graph()
+    for _ in range(2): # fallback levels are created, then read back under their revision
+        graph.context(1, "A", QUOTE)["levels"]
+        graph.context(2, "B", QUOTE)["levels"]
+    levels[1] = {"support": 1.0, "resistance": 2.0, "base_range": 0.5}
+    assert graph.context(1, "A", QUOTE)["support"] == 1.0
+    before = calls["levels"]
+    graph.context(2, "B", QUOTE)["levels"]
+    assert calls["levels"] == before
+
+def test_bar_scope_follows_the_closed_bar():
+    graph, calls = IndicatorGraph(), {}
+    graph.register("slow", counting(lambda ctx: ctx.bar_key * 10, calls, "slow"), scope="bar")
+    graph.register("fast", counting(lambda ctx: ctx.data["close"], calls, "fast"))
+    assert graph.context(0, "X", QUOTE, bar_key=1)["slow"] == 10
+    assert graph.context(0, "X", QUOTE, bar_key=1)["slow"] == 10
+    assert graph.context(0, "X", QUOTE, bar_key=2)["slow"] == 20
+    graph.context(0, "X", QUOTE)["fast"]
+    graph.context(0, "X", QUOTE)["fast"]
+    assert calls["slow"] == 2 and calls["fast"] == 2
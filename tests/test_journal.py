@@ -0,0 +1,47 @@
+from core.journal import Journal
+from core.order_router import OrderIntent, OrderRecord
+
+def make_record(status, broker_order_id=None, error=None):
+    intent = OrderIntent("INFY", "LONG", 10, idempotency_key="INFY:LONG:1500", created_at=1000.0)
+    return OrderRecord("AG00000001", intent, status=status, broker_order_id=broker_order_id, error=error)
+
+def test_order_status_updates_upsert_one_row(tmp_path):
+    journal = Journal(str(tmp_path / "j.db"), flush_interval=0.01)
+    journal.record_order(make_record("SUBMITTED", "B1"), broker="MockBroker", ts=1001.0)
+    journal.record_order(make_record("ACKED"), broker="MockBroker", ts=1002.0) # no id on this update
+    journal.record_order(make_record("FILLED", "B1"), broker="MockBroker", ts=1003.0)
+    journal.flush()
+    rows = journal.orders_since(0)
+    assert len(rows) == 1
+    row = rows[0]
+    assert (row["status"], row["broker_order_id"], row["updated_at"], row["created_at"]) == ("FILLED", "B1", 1003.0, 1000.0)
+    assert row["idempotency_key"] == "INFY:LONG:1500" and row["broker"] == "MockBroker"
+    journal.close()
+
+def test_same_order_id_in_a_new_session_is_a_new_row(tmp_path):
+    path = str(tmp_path / "j.db")
+    first = Journal(path, flush_interval=0.01)
+    first.record_order(make_record("FILLED", "B1"), ts=1001.0)
+    first.close()
+    second = Journal(path, flush_interval=0.01)
+    second.record_order(make_record("REJECTED", error="margin"), ts=2001.0)
+    second.flush()
+    rows = second.query("SELECT session_id, status, error FROM orders ORDER BY session_id")
+    assert [(r["status"], r["error"]) for r in rows] == [("FILLED", None), ("REJECTED", "margin")]
+    assert rows[0]["session_id"] != rows[1]["session_id"]
+    second.close()
+
+def test_signal_ids_link_filters_and_continue_across_sessions(tmp_path):
+    path = str(tmp_path / "j.db")
+    journal = Journal(path, flush_interval=0.01)
+    signal = {"side": "SHORT", "entry": 101.0, "target": 95.0, "stop_loss": 104.0, "strategy": "mean_reversion"}
+    sid = journal.record_signal("TCS", signal, 101.0, "filtered_ai", order_key="TCS:SHORT:101.00", ts=5.0)
+    journal.record_filter(sid, "ai", False, ts=5.0)
+    journal.close()
+    reopened = Journal(path, flush_interval=0.01)
+    assert reopened.record_signal("TCS", signal, 101.0, "ordered", ts=6.0) == sid + 1
+    reopened.flush()
+    filters = reopened.query("SELECT s.symbol, f.filter, f.passed FROM filter_outcomes f JOIN signals s ON s.id = f.signal_id")
+    assert filters == [{"symbol": "TCS", "filter": "ai", "passed": 0}]
+    assert [s["outcome"] for s in reopened.signals(symbol="TCS")] == ["filtered_ai", "ordered"]
+    reopened.close()
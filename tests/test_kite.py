@@ -0,0 +1,59 @@
+import datetime
+import json
+
+import pytest
+
+import brokers.kite as kite_module
+from brokers.kite import KiteBroker
+
+SYMBOLS = [f"SYM{i}" for i in range(600)]
+
+class FakeKite:
+    """Instrument master and /quote for SYM0..SYM599 (token 1000 + i)."""
+    def __init__(self):
+        self.instrument_calls = 0
+        self.quote_calls = []
+
+    def instruments(self, exchange):
+        self.instrument_calls += 1
+        rows = [{"tradingsymbol": s, "instrument_token": 1000 + i, "instrument_type": "EQ"} for i, s in enumerate(SYMBOLS)]
+        return rows + [{"tradingsymbol": "NIFTYFUT", "instrument_token": 1, "instrument_type": "FUT"}]
+
+    def quote(self, tokens):
+        self.quote_calls.append(list(tokens))
+        return {str(t): {"last_price": float(t), "volume": 10, "ohlc": {"open": 1.0, "high": 2.0, "low": 0.5}}
+                for t in tokens}
+
+@pytest.fixture
+def broker(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path) # instrument cache file
+    b = KiteBroker("key", "token")
+    b.kite = FakeKite()
+    return b
+
+def test_batch_quotes_are_chunked_and_mapped_back(broker, capsys):
+    quotes = broker.get_market_data_batch(SYMBOLS + ["NIFTYFUT", "MISSING.NS"])
+    assert [len(c) for c in broker.kite.quote_calls] == [500, 100]
+    assert len(quotes) == 600
+    assert quotes["SYM7"] == {"open": 1.0, "high": 2.0, "low": 0.5, "close": 1007.0, "volume": 10}
+    broker.get_market_data_batch(["MISSING.NS"])
+    assert capsys.readouterr().out.count("No instrument token for MISSING.NS") == 1 # warned once
+
+def test_instrument_master_is_cached_for_the_day(broker, tmp_path):
+    broker.get_market_data_batch(["SYM1"])
+    broker.get_market_data_batch(["SYM2"])
+    assert broker.kite.instrument_calls == 1
+    cached = json.loads((tmp_path / kite_module.INSTRUMENTS_CACHE_FILE).read_text())
+    assert cached["date"] == datetime.date.today().isoformat() and cached["tokens"]["SYM1"] == 1001
+
+    restarted = KiteBroker("key", "token")
+    restarted.kite = FakeKite()
+    assert restarted.get_instrument_token("SYM3.NS") == 1003
+    assert restarted.kite.instrument_calls == 0 # read from the file
+
+    cached["date"] = "2000-01-01"
+    (tmp_path / kite_module.INSTRUMENTS_CACHE_FILE).write_text(json.dumps(cached))
+    stale = KiteBroker("key", "token")
+    stale.kite = FakeKite()
+    stale.load_instruments()
+    assert stale.kite.instrument_calls == 1
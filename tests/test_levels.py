@@ -0,0 +1,114 @@
+import threading
+
+import numpy as np
+import pytest
+
+from core.levels import LevelEngine, ProximityIndex, tick_levels
+
+def random_history(n_bars, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n_bars)))
+    open_ = close * (1 + rng.normal(0, 0.004, n_bars))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n_bars))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n_bars))
+    return {"open": open_.tolist(), "high": high.tolist(), "low": low.tolist(), "close": close.tolist()}
+
+def reference_levels(h, lookback=60, k=2, cluster_tol=0.25, min_touches=2, range_period=20):
+    """The same candidates, one symbol at a time with plain loops."""
+    high, low, close = (np.asarray(h[f][-lookback:]) for f in ("high", "low", "close"))
+    ph, pl, pc = high[-1], low[-1], close[-1]
+    pivot = (ph + pl + pc) / 3
+    base_range = float(np.mean((high - low)[-range_period:]))
+    tol = cluster_tol * base_range
+
+    def clusters(swings):
+        out = []
+        for s in swings:
+            near = [x for x in swings if abs(x - s) <= tol]
+            if len(near) >= min_touches: out.append(sum(near) / len(near))
+        return out
+
+    swing_h = [high[i] for i in range(k, len(high) - k) if high[i] == high[i - k:i + k + 1].max()]
+    swing_l = [low[i] for i in range(k, len(low) - k) if low[i] == low[i - k:i + k + 1].min()]
+    above = [x for x in [2 * pivot - pl, ph] + clusters(swing_h) if x > pc]
+    below = [x for x in [2 * pivot - ph, pl] + clusters(swing_l) if x < pc]
+    return {"resistance": min(above), "support": max(below), "base_range": base_range, "pivot": pivot}
+
+def test_matches_reference_per_symbol():
+    histories = [random_history(n, seed) for seed, n in enumerate([80, 60, 45, 200, 61])]
+    engine = LevelEngine(capacity=2)
+    sids = [3, 0, 7, 1, 20]
+    assert engine.load_history(sids, histories) == len(sids)
+    for sid, h in zip(sids, histories):
+        assert engine[sid] == pytest.approx(reference_levels(h), rel=1e-12)
+    assert len(engine) == len(sids) and engine.capacity > 20
+    assert 5 not in engine and engine.get(5) is None
+    with pytest.raises(KeyError): engine[5]
+
+def test_add_bars_shifts_the_ring():
+    h = random_history(90, seed=5)
+    rolled = LevelEngine()
+    rolled.load_history([0], [{f: v[:70] for f, v in h.items()}])
+    for i in range(70, 90):
+        before = rolled.revision_of(0)
+        rolled.add_bars([0], [h["open"][i]], [h["high"][i]], [h["low"][i]], [h["close"][i]])
+        assert rolled.revision_of(0) == before + 1
+    fresh = LevelEngine()
+    fresh.load_history([0], [h])
+    np.testing.assert_array_equal(rolled.bars[0], fresh.bars[0])
+    assert rolled[0] == pytest.approx(reference_levels(h), rel=1e-12)
+
+def test_flat_history_has_no_levels():
+    flat = {f: [100.0] * 30 for f in ("open", "high", "low", "close")}
+    engine = LevelEngine()
+    engine.load_history([0], [flat])
+    assert 0 not in engine and len(engine) == 0
+
+def test_direct_writes_bump_the_revision_and_clear_drops_rows():
+    engine = LevelEngine()
+    engine[4] = tick_levels(100.0, 102.0, 98.0)
+    assert engine.revision_of(4) == 1 and not engine.from_history[4]
+    engine[4] = tick_levels(101.0, 102.0, 98.0)
+    assert engine.revision_of(4) == 2
+    assert dict(engine.items()).keys() == {4}
+    engine.clear()
+    assert 4 not in engine and engine.revision_of(4) == 3
+    assert engine.revision_of(10_000) == 0
+
+def test_readers_never_see_a_torn_row_while_arrays_grow():
+    engine = LevelEngine(capacity=1)
+    engine[0] = {"resistance": 1.0, "support": -1.0, "base_range": 0.0}
+    stop, errors = threading.Event(), []
+
+    def read():
+        while not stop.is_set():
+            try:
+                for sid, lvl in [(0, engine[0])] + list(engine.items())[-3:]:
+                    assert lvl["resistance"] - lvl["support"] == 2.0 and lvl["base_range"] == lvl["resistance"] - 1.0
+            except Exception as exc:
+                errors.append(exc)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for t in readers: t.start()
+    for i in range(1, 20_000):
+        engine[i] = {"resistance": i + 1.0, "support": i - 1.0, "base_range": float(i)}
+        engine[0] = {"resistance": i + 1.0, "support": i - 1.0, "base_range": float(i)}
+    stop.set()
+    for t in readers: t.join()
+    assert not errors and len(engine) == 20_000
+
+def test_proximity_orders_by_distance_and_follows_levels():
+    engine = LevelEngine()
+    for sid in range(3):
+        engine[sid] = {"resistance": 110.0, "support": 90.0, "base_range": 5.0}
+    prox = ProximityIndex(engine)
+    prox.update([0, 1, 2, 5], [100.0, 108.0, 111.0, 50.0])
+    np.testing.assert_allclose(prox.distances(np.array([0, 1, 2, 5, 6])), [2.0, 0.4, -0.2, -np.inf, np.nan])
+    assert prox.within(1.0).tolist() == [5, 2, 1]
+    assert len(prox) == 4
+
+    engine[0] = {"resistance": 101.0, "support": 90.0, "base_range": 5.0}
+    assert prox.within(1.0).tolist() == [5, 2, 1] # stale until refreshed
+    prox.refresh([0])
+    assert prox.within(1.0).tolist() == [5, 2, 0, 1]
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from brokers.mock import MockBroker
+from core.memory import TTLCache, deep_sizeof
+from core.metrics import metrics
+
+def test_entries_expire_after_ttl():
+    now = [0.0]
+    cache = TTLCache("test_expiry", ttl=10, clock=lambda: now[0])
+    cache["a"] = 1
+    now[0] = 5.0
+    cache["b"] = 2
+    assert cache["a"] == 1 and "a" in cache
+    now[0] = 10.0 # "a" expires at exactly 10
+    assert "a" not in cache and cache.get("a", "gone") == "gone"
+    with pytest.raises(KeyError):
+        cache["a"]
+    assert cache.get("b") == 2
+    cache.sweep()
+    assert len(cache) == 1
+
+def test_rewrite_moves_expiry_forward():
+    now = [0.0]
+    cache = TTLCache("test_rewrite", ttl=10, clock=lambda: now[0])
+    cache["a"] = 1
+    cache["b"] = 2
+    now[0] = 8.0
+    cache["a"] = 3 # now expires after "b"
+    now[0] = 12.0
+    cache.sweep()
+    assert list(cache.data) == ["a"] and cache["a"] == 3
+
+def test_size_cap_drops_oldest_and_counts_evictions():
+    now = [0.0]
+    cache = TTLCache("test_cap", ttl=100, max_items=3, clock=lambda: now[0])
+    evictions = metrics.counter("ag_cache_evictions_total", cache="test_cap")
+    before = evictions.value
+    for i in range(5):
+        cache[i] = i
+    assert list(cache.data) == [2, 3, 4]
+    now[0] = 200.0
+    cache["x"] = 0 # the write sweeps everything that expired
+    assert list(cache.data) == ["x"]
+    assert evictions.value - before == 5
+
+def test_deep_sizeof_counts_array_buffers_once():
+    array = np.zeros(100_000)
+    alone = deep_sizeof(array)
+    assert alone >= array.nbytes
+    assert deep_sizeof([array, array, array[:10]]) < 2 * alone
+
+def test_mock_orders_are_capped_oldest_finished_first():
+    broker = MockBroker(max_orders=10)
+    oco = broker.place_oco_order("INFY", "LONG", 1, 100.0, 101.0, 99.0)
+    assert broker.get_order_status(oco) == "COMPLETE" # the entry fills at once, so the OCO is finished
+    ids = [oco] + [broker.place_oco_order("INFY", "LONG", 1, 100.0, 101.0, 99.0) if i % 2 else
+                   broker.place_order("INFY", "LONG", "MARKET", 1) for i in range(10)]
+    # 11 > 10: down to 5, newest kept
+    assert len(broker.orders) == 5
+    assert [broker.get_order_status(oid) for oid in ids] == ["NOT_FOUND"] * 6 + ["COMPLETE"] * 5
@@ -0,0 +1,23 @@
+from core.metrics import EXPORT_BOUNDS, LatencyHistogram, MetricsRegistry
+
+def test_le_buckets_are_inclusive():
+    hist = LatencyHistogram()
+    for us in (99, 100, 101, 250, 251, 60_000_000, 61_000_000):
+        hist.record_us(us)
+    buckets = dict(hist.export_buckets())
+    assert buckets[0.0001] == 2 # 99 and exactly 100us
+    assert buckets[0.00025] == 4
+    assert buckets[0.0005] == 5
+    assert buckets[60.0] == 6 # 61s is only in +Inf
+    assert [b for b, _ in hist.export_buckets()] == list(EXPORT_BOUNDS)
+
+def test_render_is_cumulative_with_inf():
+    registry = MetricsRegistry()
+    hist = registry.histogram("ag_test_seconds", stage="x")
+    hist.record(0.0001)
+    hist.record(0.003)
+    text = registry.render()
+    assert 'ag_test_seconds_bucket{stage="x",le="0.0001"} 1' in text
+    assert 'ag_test_seconds_bucket{stage="x",le="0.005"} 2' in text
+    assert 'ag_test_seconds_bucket{stage="x",le="+Inf"} 2' in text
+    assert 'ag_test_seconds_count{stage="x"} 2' in text
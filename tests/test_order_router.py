@@ -0,0 +1,101 @@
+from core.order_router import OrderIntent, OrderRouter
+
+class FakeBroker:
+    """Records calls; order statuses are set by the test."""
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.placed = []
+        self.oco = []
+        self.statuses = {}
+        self.asked = []
+
+    def place_order(self, symbol, side, order_type, quantity, price=None):
+        if self.fail: raise ConnectionError("broker down")
+        oid = f"O{len(self.placed) + len(self.oco) + 1}"
+        self.placed.append((oid, symbol, side, quantity))
+        self.statuses[oid] = "OPEN"
+        return oid
+
+    def place_oco_order(self, symbol, side, quantity, entry_price, target, stop_loss):
+        oid = f"O{len(self.placed) + len(self.oco) + 1}"
+        self.oco.append((oid, symbol, side, quantity, target, stop_loss))
+        self.statuses[oid] = "OPEN"
+        return oid
+
+    def get_order_statuses(self, order_ids):
+        self.asked.extend(order_ids)
+        return {oid: self.statuses.get(oid, "NOT_FOUND") for oid in order_ids}
+
+def make_router(broker):
+    holder = {"broker": broker}
+    router = OrderRouter(lambda: holder["broker"], workers=0)
+    changes = []
+    router.add_listener(lambda r: changes.append((r.client_order_id, r.status)))
+    return router, holder, changes
+
+def test_duplicate_key_is_dropped():
+    router, _, _ = make_router(FakeBroker())
+    first = router.submit(OrderIntent("INFY", "LONG", 10, idempotency_key="INFY:LONG:1500"))
+    assert first is not None
+    assert router.submit(OrderIntent("INFY", "LONG", 10, idempotency_key="INFY:LONG:1500")) is None
+    assert router.seen("INFY:LONG:1500")
+    assert router.submit(OrderIntent("INFY", "LONG", 10, idempotency_key="INFY:LONG:1490")) is not None
+
+def test_ack_then_fill():
+    broker = FakeBroker()
+    router, _, changes = make_router(broker)
+    cid = router.submit(OrderIntent("TCS", "SHORT", 5))
+    record = router.get(cid)
+    assert record.status == "SUBMITTED" and record.broker_order_id == "O1"
+    router.poll()
+    assert record.status == "ACKED"
+    broker.statuses["O1"] = "COMPLETE"
+    router.poll()
+    assert record.status == "FILLED"
+    assert [s for c, s in changes if c == cid] == ["SUBMITTED", "ACKED", "FILLED"]
+    assert router.open_orders() == []
+
+def test_fill_before_first_poll_passes_through_acked():
+    broker = FakeBroker()
+    router, _, changes = make_router(broker)
+    cid = router.submit(OrderIntent("TCS", "LONG", 5))
+    broker.statuses["O1"] = "TRADED"
+    router.poll()
+    assert [s for c, s in changes if c == cid] == ["SUBMITTED", "ACKED", "FILLED"]
+
+def test_dead_status_rejects_and_cancel_cancels():
+    broker = FakeBroker()
+    router, _, _ = make_router(broker)
+    a = router.submit(OrderIntent("SBIN", "LONG", 1))
+    b = router.submit(OrderIntent("PNB", "LONG", 1))
+    broker.statuses.update({"O1": "REJECTED", "O2": "CANCELLED"})
+    router.poll()
+    assert router.get(a).status == "REJECTED" and router.get(a).error == "REJECTED"
+    assert router.get(b).status == "CANCELLED"
+
+def test_target_and_stop_go_out_as_oco():
+    broker = FakeBroker()
+    router, _, _ = make_router(broker)
+    router.submit(OrderIntent("HDFCBANK", "LONG", 3, target=1650.0, stop_loss=1580.0))
+    router.submit(OrderIntent("HDFCBANK", "LONG", 3))
+    assert broker.oco == [("O1", "HDFCBANK", "LONG", 3, 1650.0, 1580.0)]
+    assert [p[0] for p in broker.placed] == ["O2"]
+
+def test_orders_are_polled_on_the_broker_that_placed_them():
+    live, paper = FakeBroker(), FakeBroker()
+    router, holder, _ = make_router(live)
+    cid = router.submit(OrderIntent("RELIANCE", "LONG", 2))
+    holder["broker"] = paper # paper/live toggle
+    router.poll()
+    assert live.asked == ["O1"] and paper.asked == []
+    assert router.get(cid).status == "ACKED"
+
+def test_placement_failure_frees_the_key():
+    broker = FakeBroker(fail=True)
+    router, _, _ = make_router(broker)
+    cid = router.submit(OrderIntent("ITC", "SHORT", 4, idempotency_key="ITC:SHORT:450"))
+    assert router.get(cid).status == "REJECTED" and "broker down" in router.get(cid).error
+    assert not router.seen("ITC:SHORT:450")
+    broker.fail = False
+    retry = router.submit(OrderIntent("ITC", "SHORT", 4, idempotency_key="ITC:SHORT:450"))
+    assert retry is not None and router.get(retry).status == "SUBMITTED"
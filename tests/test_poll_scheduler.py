@@ -0,0 +1,70 @@
+from collections import Counter
+from types import SimpleNamespace
+
+import numpy as np
+
+from core.poll_scheduler import COLD, HOT, WARM, PollScheduler
+
+class FakeProximity:
+    """Fixed distances (in base ranges) per sid, and a base range of 1.0 for every sid."""
+    def __init__(self, dist):
+        self.dist = np.asarray(dist, dtype=float)
+        self.levels = SimpleNamespace(capacity=len(dist), base_range=np.ones(len(dist)))
+
+    def distances(self, sids):
+        return self.dist[sids]
+
+def make_scheduler(dist, now, **kwargs):
+    symbols = [f"S{i}" for i in range(len(dist))]
+    kwargs.setdefault("batch_size", 2)
+    kwargs.setdefault("calls_per_sec", 100.0)
+    return PollScheduler(symbols, range(len(dist)), FakeProximity(dist), clock=lambda: now[0], **kwargs)
+
+def test_tiers_follow_distance_moves_and_holds():
+    now = [0.0]
+    poller = make_scheduler([0.01, 0.05, 0.5, np.nan, 0.5, 0.5], now)
+    poller.hold("S4")
+    poller.observe({"S5": {"close": 10.0}})
+    poller.observe({"S5": {"close": 10.5}}) # 0.3 * 0.5 base ranges >= volatile_move
+    poller.retier()
+    assert poller.tier.tolist() == [HOT, WARM, COLD, WARM, HOT, WARM]
+    assert poller.counts() == {"hot": 2, "warm": 3, "cold": 1}
+    poller.hold("S4", False)
+    poller.retier()
+    assert poller.tier[4] == COLD
+
+def test_hot_symbols_are_fetched_more_often():
+    now = [0.0]
+    poller = make_scheduler([0.0, 0.0, 0.05, 0.05, 1.0, 1.0], now, intervals=(1.0, 5.0, 20.0))
+    poller.retier()
+    fetched = Counter()
+    for _ in range(600): # 60 seconds in 0.1s ticks
+        batch = poller.next_batch()
+        assert len(batch) % 2 == 0 # batches always go out full
+        fetched.update(batch)
+        now[0] += 0.1
+    assert fetched["S0"] > fetched["S2"] > fetched["S4"]
+    assert 50 <= fetched["S0"] <= 65 and fetched["S4"] <= 5
+
+def test_token_bucket_caps_requests():
+    now = [0.0]
+    poller = make_scheduler([0.0] * 8, now, intervals=(0.1, 1.0, 1.0), calls_per_sec=1.0)
+    poller.retier()
+    assert len(poller.next_batch()) == 8 # the burst covers one full pass
+    calls = 0
+    for _ in range(100): # 10 seconds
+        now[0] += 0.1
+        calls += len(poller.next_batch()) // 2
+    assert 9 <= calls <= 11
+
+def test_promotion_pulls_next_fetch_forward():
+    now = [0.0]
+    dist = [1.0, 1.0]
+    poller = make_scheduler(dist, now, intervals=(1.0, 5.0, 30.0))
+    poller.retier()
+    poller.next_batch()
+    assert poller.next_due.tolist() == [30.0, 30.0]
+    now[0] = 2.0
+    poller.proximity.dist[0] = 0.0
+    poller.retier()
+    assert poller.next_due.tolist() == [2.5, 30.0]
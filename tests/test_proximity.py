@@ -0,0 +1,59 @@
+import numpy as np
+
+from config.settings import config
+from core.history import EventLog, history
+from tests.test_sharding import InlineExecutor, load_session, make_engine, outcome
+
+def run_session(symbols, daily, cycles, monkeypatch):
+    """Signals/orders plus (cycle, evaluated symbols, their distances at the time) per cycle."""
+    monkeypatch.setitem(history.events, "signals", EventLog())
+    engine, clock = make_engine(symbols, daily)
+    executor, evaluated = InlineExecutor(), []
+    tick_symbols = engine.tick_symbols
+
+    def recorded():
+        picked = tick_symbols()
+        sids = np.asarray(engine.registry.ids_for(picked), dtype=np.intp)
+        evaluated.append((engine.cycle_count, picked, engine.proximity.distances(sids)))
+        return picked
+
+    engine.tick_symbols = recorded
+    for t, quotes in cycles:
+        clock.advance_to(t)
+        engine.run_cycle(quotes, executor)
+        engine.order_router.poll()
+    return outcome(engine), evaluated
+
+def test_band_skips_far_symbols_without_changing_signals(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    session = load_session(tmp_path)
+    monkeypatch.setattr(config, "LEVEL_RECHECK_CYCLES", 1) # every changed symbol, every cycle
+    expected, everything = run_session(*session, monkeypatch)
+    assert expected[0], "the session should produce signals"
+
+    monkeypatch.setattr(config, "LEVEL_RECHECK_CYCLES", 10)
+    result, banded = run_session(*session, monkeypatch)
+    assert result == expected
+    assert sum(len(e[1]) for e in banded) < sum(len(e[1]) for e in everything) # the band did skip work
+
+    # Off recheck cycles only near symbols run, nearest first
+    for cycle, picked, distances in banded:
+        if cycle % 10 == 1: continue
+        assert (distances <= config.LEVEL_PROXIMITY_BAND).all()
+        assert (np.diff(distances) >= 0).all()
+
+def test_far_symbols_wait_for_the_recheck_cycle(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    symbols, daily, cycles = load_session(tmp_path)
+    monkeypatch.setattr(config, "LEVEL_RECHECK_CYCLES", 3)
+    engine, _ = make_engine(symbols, daily)
+    engine.cycle_count = 1 # next cycle is not a recheck
+    near_sid, far_sid = engine.registry.ids_for(symbols[:2])
+    engine.proximity.update([near_sid, far_sid], [0.0, 0.0])
+    engine.proximity.distance[near_sid], engine.proximity.distance[far_sid] = 0.1, 5.0
+    engine.pending_eval = dict.fromkeys(symbols[:2])
+    assert engine.tick_symbols() == [symbols[0]]
+    assert list(engine.pending_eval) == [symbols[1]] # kept for the recheck
+    assert engine.tick_symbols() == []
+    assert engine.tick_symbols() == [symbols[1]] # cycle 4: recheck
+    assert engine.pending_eval == {}
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.indicators import calculate_base_range, calculate_trend_shift_linreg, get_regime, update_tsd_count
+from core.regime import REGIMES, RegimeTracker, regime_codes
+
+def daily_bars(n_symbols, n_days, seed=8):
+    """[symbols x days x OHLC]; half the symbols trend in spells, the rest drift sideways."""
+    rng = np.random.default_rng(seed)
+    drift = np.where(rng.random((n_symbols, n_days)) < 0.5, rng.normal(0, 0.02, (n_symbols, 1)), 0.0)
+    drift[n_symbols // 2:] = 0.0
+    close = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.01, (n_symbols, n_days)), axis=1))
+    open_ = close * (1 + rng.normal(0, 0.003, close.shape))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, close.shape))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, close.shape))
+    return np.stack([open_, high, low, close], axis=2)
+
+def reference(bars, period=20, mult=0.7, breadth=0.5):
+    """Per-symbol counts with the pandas indicators, plus the market aggregate."""
+    counts, flags = [], []
+    for row in bars:
+        trend = calculate_trend_shift_linreg(pd.Series(row[:, 3]), period)
+        base = calculate_base_range(pd.Series(row[:, 1]), pd.Series(row[:, 2]), period)
+        count, days = 0, []
+        for t, r in zip(trend, base):
+            if np.isnan(t) or np.isnan(r):
+                days.append(np.nan)
+                continue
+            days.append(float(abs(t) > mult * r))
+            count = update_tsd_count(count, t, r, mult)
+        counts.append(count)
+        flags.append(days)
+    market = 0
+    for day in np.array(flags).T:
+        if np.isnan(day).all(): continue
+        market = market + 1 if np.nanmean(day) >= breadth else max(0, market - 1)
+    return counts, market
+
+def test_seed_matches_the_scalar_indicators():
+    bars = daily_bars(12, 90)
+    sids = list(range(5, 17))
+    tracker = RegimeTracker(capacity=4)
+    tracker.seed(sids, bars)
+    counts, market = reference(bars)
+    assert [tracker.count(sid) for sid in sids] == counts
+    assert max(counts) >= 4 # the trending half reaches regime C somewhere
+    assert tracker.market_count == market
+    assert [tracker.regime(sid) for sid in sids] == [get_regime(c) for c in counts]
+    assert REGIMES[tracker.regimes(sids)].tolist() == [get_regime(c) for c in counts]
+
+def test_day_close_continues_the_seeded_counts():
+    bars = daily_bars(6, 70, seed=2)
+    tracker = RegimeTracker()
+    tracker.seed(range(6), bars[:, :50])
+    for day in range(50, 70):
+        revision = tracker.revision
+        tracker.on_day_close(range(6), bars[:, :day + 1])
+        assert tracker.revision == revision + 1
+    counts, market = reference(bars)
+    assert [tracker.count(sid) for sid in range(6)] == counts
+    assert tracker.market_count == market
+
+def test_unknown_symbols_and_market_mode_use_the_aggregate():
+    bars = daily_bars(4, 60, seed=4)
+    tracker = RegimeTracker()
+    tracker.seed(range(4), bars)
+    assert tracker.count(100) == tracker.market_count
+    assert tracker.regimes([100, 5_000]).tolist() == [int(regime_codes(np.int32(tracker.market_count)))] * 2
+
+    market = RegimeTracker(mode="market")
+    market.seed(range(4), bars)
+    assert market.market_count == tracker.market_count
+    assert {market.count(sid) for sid in range(4)} == {tracker.market_count}
+    assert len(set(market.regimes(range(4)).tolist())) == 1
+
+@pytest.mark.parametrize("period", [5, 20])
+def test_short_history_leaves_counts_untouched(period):
+    tracker = RegimeTracker(period=period)
+    tracker.seed([0], daily_bars(1, period - 1))
+    assert tracker.count(0) == 0 and tracker.market_count == 0
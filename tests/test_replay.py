@@ -0,0 +1,55 @@
+import numpy as np
+
+from brokers.synthetic import SyntheticBroker
+from core.clock import SimClock
+from core.history import EventLog, history
+from core.replay import SessionRecorder, replay_session
+from core.symbols import get_registry
+
+START = 1_714_620_600.0 # a weekday, 09:00 IST
+
+def record_session(path, n_symbols=60, cycles=240):
+    symbols = get_registry().symbols[:n_symbols]
+    clock = {"t": START}
+    feed = SyntheticBroker(symbols, seed=7, annual_vol=1.5, clock=lambda: clock["t"])
+    rng = np.random.default_rng(7)
+    daily = {}
+    for s in symbols:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 60)))
+        spread = close * rng.uniform(0.005, 0.03, 60)
+        daily[s] = {"open": close.tolist(), "high": (close + spread).tolist(), "low": (close - spread).tolist(),
+                      "close": close.tolist(), "volume": rng.integers(10_000, 100_000, 60).astype(float).tolist()}
+    # Start the live prices where the daily history ends, so levels are in reach
+    feed.price = np.array([daily[s]["close"][-1] for s in symbols])
+    feed.new_day()
+    recorder = SessionRecorder(path, symbols, START)
+    recorder.record_history(daily)
+    for _ in range(cycles):
+        clock["t"] += 5
+        recorder.record_quotes(clock["t"], feed.get_market_data_batch(symbols))
+    recorder.close()
+
+def test_sim_clock_only_moves_forward():
+    clock = SimClock(100.0)
+    clock.advance_to(150.0)
+    clock.advance_to(120.0)
+    assert clock.time() == 150.0
+    clock.sleep(5)
+    assert clock.time() == 155.0 and clock.today() == clock.now().date()
+
+def test_replay_is_deterministic(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path) # the engine writes screenshots/ into the cwd
+    path = str(tmp_path / "session.jsonl.gz")
+    record_session(path)
+    runs = []
+    for _ in range(2):
+        # A fresh log per run: the shared one clamps timestamps to its newest event
+        monkeypatch.setitem(history.events, "signals", EventLog())
+        runs.append(replay_session(path))
+    first, second = runs
+    assert first["cycles"] == second["cycles"] == 240
+    assert first["sim_seconds"] == 240 * 5
+    assert first["signals"], "the recording should produce signals"
+    assert first["signals"] == second["signals"]
+    assert all(START < s["ts"] <= START + 240 * 5 for s in first["signals"])
+    assert first["orders"] == second["orders"] and first["pnl"] == second["pnl"]
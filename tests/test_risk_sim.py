@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from core.risk_manager import RiskManager
+from core.risk_sim import load_outcomes, run_simulation, simulate_sessions
+
+# Per-trade moves in % of position; -7.5 at 10% sizing twice lands exactly on the 1.5% drawdown limit
+OUTCOMES = [-7.5, -5.0, 0.0, 5.0, 10.0, 20.0]
+
+def replay(pnl_row, max_drawdown, max_trades, max_losses):
+    """One session through RiskManager: (session PnL, trades taken, kill reason 0/1/2)."""
+    rm = RiskManager(max_drawdown=max_drawdown, max_trades=max_trades, max_losses=max_losses)
+    for p in pnl_row:
+        if not rm.check_constraints(): break
+        rm.record_trade(float(p))
+    if rm.current_drawdown >= max_drawdown and rm.daily_pnl < 0: reason = 1
+    elif rm.consecutive_losses >= max_losses: reason = 2
+    else: reason = 0
+    return rm.daily_pnl, len(rm.session_trades), reason
+
+@pytest.mark.parametrize("max_trades, max_drawdown, max_losses", [(3, 1.5, 2), (6, 1.0, 3), (1, 1.5, 2)])
+def test_sessions_match_the_risk_manager(max_trades, max_drawdown, max_losses):
+    rng = np.random.default_rng(7)
+    pnl = np.asarray(OUTCOMES)[rng.integers(0, len(OUTCOMES), size=(3000, max_trades))] * 0.1
+    out = simulate_sessions(pnl, max_drawdown, max_losses)
+    expected = np.array([replay(row, max_drawdown, max_trades, max_losses) for row in pnl])
+    np.testing.assert_array_equal(out["pnl"], expected[:, 0])
+    np.testing.assert_array_equal(out["trades"], expected[:, 1])
+    np.testing.assert_array_equal(out["reason"], expected[:, 2])
+    if max_trades > 1: # every stop reason shows up
+        assert set(out["reason"].tolist()) == {0, 1, 2}
+
+def test_seeded_run_matches_the_risk_manager():
+    paths, sizing = 4000, 10.0
+    res = run_simulation(OUTCOMES, paths=paths, position_pct=sizing, seed=42)
+    # Same draws as the simulator (one chunk of paths x max_trades)
+    rng = np.random.default_rng(42)
+    pnl = np.asarray(OUTCOMES)[rng.integers(0, len(OUTCOMES), size=(paths, 3))] * sizing / 100
+    expected = np.array([replay(row, 1.5, 3, 2) for row in pnl])
+    assert res["trades_per_session"] == round(expected[:, 1].mean(), 3)
+    assert res["session_pnl_pct"]["mean"] == round(expected[:, 0].mean(), 4)
+    assert res["kill_switch"]["drawdown"] == round((expected[:, 2] == 1).mean(), 5)
+    assert res["kill_switch"]["consecutive_losses"] == round((expected[:, 2] == 2).mean(), 5)
+    assert res == run_simulation(OUTCOMES, paths=paths, position_pct=sizing, seed=42)
+
+def test_peak_to_trough_drawdown():
+    pnl = np.array([[1.0, -0.5, -0.4], [-0.2, 0.5, -0.3], [0.4, 0.4, 0.4]])
+    out = simulate_sessions(pnl, max_drawdown=5.0, max_losses=5)
+    np.testing.assert_allclose(out["drawdown"], [0.9, 0.3, 0.0])
+
+def test_load_outcomes_formats(tmp_path):
+    (tmp_path / "t.csv").write_text("symbol,pnl_pct\nA,1.5\nB,\nC,-2\n")
+    (tmp_path / "t.json").write_text('[1.5, {"pnl_pct": -2}]')
+    (tmp_path / "t.jsonl").write_text('{"pnl_pct": 1.5}\n\n{"pnl_pct": -2}\n')
+    for name in ("t.csv", "t.json", "t.jsonl"):
+        assert load_outcomes(str(tmp_path / name)).tolist() == [1.5, -2.0]
+    with pytest.raises(ValueError): run_simulation([])
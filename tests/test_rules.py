@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from config.settings import config
+from strategies.mean_reversion import mean_reversion_rules, mean_reversion_strategy
+from strategies.rules import Rule, RuleError, RuleStrategy, compile_expr
+
+def random_columns(n, seed=3):
+    """Candles around a support/resistance band, so every rule and rejection path gets hit."""
+    rng = np.random.default_rng(seed)
+    support = rng.uniform(90, 110, n)
+    resistance = support + rng.uniform(2, 10, n)
+    close = rng.uniform(support - 3, resistance + 3)
+    open_ = close + rng.normal(0, 1, n)
+    high = np.maximum(open_, close) + rng.exponential(1, n)
+    low = np.minimum(open_, close) - rng.exponential(1, n)
+    return {
+        "open": open_, "high": high, "low": low, "close": close, "volume": rng.uniform(500, 1500, n),
+        "prior_open": close, "prior_high": high, "prior_low": low, "prior_close": close,
+        "prior_volume": rng.uniform(500, 1500, n),
+        "support": support, "resistance": resistance, "base_range": rng.uniform(1, 5, n),
+        "trend_shift": rng.normal(0, 2, n),
+        "regime": rng.choice(np.array(["REGIME_A", "REGIME_B", "REGIME_C"]), n),
+    }
+
+def context(columns, row):
+    """What IndicatorGraph.context would hand a strategy for one row."""
+    value = lambda f: columns[f][row].item()
+    bar = {f: value(f) for f in ("open", "high", "low", "close", "volume")}
+    prior = {f: value(f"prior_{f}") for f in bar}
+    levels = {f: value(f) for f in ("support", "resistance", "base_range")}
+    return {"bar": bar, "prior": prior, "levels": levels, "base_range": levels["base_range"],
+            "trend_shift": value("trend_shift"), "regime": value("regime")}
+
+def test_compiled_rules_match_the_hand_written_strategy(capsys):
+    columns = random_columns(2000)
+    rules, original = mean_reversion_rules(config), mean_reversion_strategy(config)
+    expected = [original.evaluate(context(columns, row)) for row in range(2000)]
+    capsys.readouterr() # the original logs every rejected check
+    scalar = [rules.evaluate(context(columns, row)) for row in range(2000)]
+    batch = dict(rules.evaluate_batch(columns))
+    assert sum(s is not None for s in expected) > 100
+    assert {s["side"] for s in expected if s} == {"LONG", "SHORT"}
+    assert scalar == expected
+    assert [batch.get(row) for row in range(2000)] == scalar
+
+def test_first_matching_rule_wins_per_row():
+    strategy = RuleStrategy("t", [Rule("LONG", when="close > 1", reason="a"),
+                                  Rule("SHORT", when="close > 0", target="close * k", reason="b")],
+                            gate="volume >= 10", params={"k": 2})
+    columns = {"close": np.array([2.0, 0.5, 2.0, -1.0]), "volume": np.array([10.0, 10.0, 5.0, 10.0])}
+    hits = strategy.evaluate_batch(columns)
+    assert [(row, s["reason"]) for row, s in hits] == [(0, "a"), (1, "b")]
+    assert hits[1][1]["target"] == 1.0
+    assert strategy.fields == ("close", "volume") and strategy.requires == ("bar",)
+
+def test_compile_expr_reports_fields():
+    fn, names = compile_expr("max(close, prior_close) - low > ratio * base_range", {"ratio": 0.5})
+    assert names == {"close", "prior_close", "low", "base_range"}
+    columns = {"close": np.array([3.0, 1.0]), "prior_close": np.array([1.0, 1.0]),
+               "low": np.array([0.0, 0.0]), "base_range": np.array([4.0, 4.0])}
+    assert fn(columns).tolist() == [True, False]
+
+@pytest.mark.parametrize("source", [
+    "close >", "close.real > 1", "unknown_field > 1", "__import__('os')", "abs(close, open)",
+    "max(close, open, high)", "close in support", "close if open else high", "True",
+])
+def test_bad_expressions_are_rejected(source):
+    with pytest.raises(RuleError):
+        compile_expr(source)
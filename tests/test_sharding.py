@@ -0,0 +1,82 @@
+from concurrent.futures import Future
+
+import numpy as np
+
+from core.clock import SimClock
+from core.history import EventLog, history
+from core.replay import ReplayFeed, read_recording
+from core.sharding import FIELDS, ShardCoordinator
+from tests.test_replay import record_session
+
+START = 1_714_620_600.0 # a weekday, 09:00 IST
+DAY = 86_400.0
+
+class InlineExecutor:
+    """Runs submitted calls immediately, so both engines handle signals in a fixed order."""
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+def load_session(tmp_path):
+    """Daily history plus two days of quote cycles (the second day replays the first shifted by a day)."""
+    path = str(tmp_path / "session.jsonl.gz")
+    record_session(path, n_symbols=40, cycles=120)
+    records = list(read_recording(path))
+    symbols = records[0]["symbols"]
+    daily = next(r["data"] for r in records if r["kind"] == "history")
+    cycles, quotes = [], {}
+    for r in records:
+        if r["kind"] != "quotes": continue
+        quotes.update(r["data"])
+        cycles.append((r["t"], dict(quotes)))
+    return symbols, daily, cycles + [(t + DAY, q) for t, q in cycles]
+
+def make_engine(symbols, daily):
+    from main import TradingEngine
+    clock = SimClock(START)
+    engine = TradingEngine(clock=clock, data_feed=ReplayFeed(daily), persist=False)
+    engine.ai_analyzer.api_key = None
+    engine.order_router.workers = 0 # synchronous routing
+    engine.watchlist = list(symbols)
+    engine.run_pre_market()
+    return engine, clock
+
+def outcome(engine):
+    signals = sorted((s["symbol"], s["side"], s["entry"], s["target"], s["stop_loss"], s["outcome"])
+                     for s in history.events["signals"].query(limit=5000)["items"])
+    orders = sorted((r.intent.symbol, r.intent.side, r.intent.quantity, r.status)
+                    for r in engine.order_router.records.values())
+    return signals, orders
+
+def test_two_shards_match_the_single_process_engine(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    symbols, daily, cycles = load_session(tmp_path)
+    executor = InlineExecutor()
+
+    monkeypatch.setitem(history.events, "signals", EventLog())
+    engine, clock = make_engine(symbols, daily)
+    for t, quotes in cycles:
+        clock.advance_to(t)
+        engine.run_cycle(quotes, executor)
+        engine.order_router.poll()
+    expected = outcome(engine)
+    assert expected[0], "the session should produce signals"
+    assert any(s[-1] == "ordered" for s in expected[0])
+
+    monkeypatch.setitem(history.events, "signals", EventLog())
+    engine, clock = make_engine(symbols, daily)
+    coordinator = ShardCoordinator(engine, n_workers=2, cycle_sec=5.0)
+    coordinator.start(fetcher=False)
+    try:
+        for t, quotes in cycles:
+            clock.advance_to(t)
+            coordinator.snapshot.publish(np.array([[quotes[s].get(f, np.nan) for f in FIELDS] for s in symbols]))
+            assert coordinator.step(executor)
+            engine.order_router.poll()
+    finally:
+        coordinator.close()
+    assert coordinator.day == 2 # the second day was rolled and sent to the workers
+    assert outcome(engine) == expected
+    assert engine.last_quotes == cycles[-1][1]
+    assert len(engine.planned_trades) == 2 * len(symbols)
@@ -0,0 +1,14 @@
+import pytest
+
+from tests.startup_budget import PROBES, run_probe
+
+@pytest.mark.parametrize("name", list(PROBES))
+def test_startup_leaves_heavy_modules_deferred(name, tmp_path):
+    # Only what gets imported is asserted here; the time budgets are machine-specific (tests/startup_budget.py)
+    assert run_probe(PROBES[name][0], str(tmp_path))["loaded"] == []
+
+def test_broker_clients_are_built_on_first_use(tmp_path):
+    code = "import main; e = main.TradingEngine(persist=False); assert e._dhan_broker is None and e._kite_broker is None"
+    assert run_probe(code, str(tmp_path))["loaded"] == []
+    # ... and the SDK comes in with the first client
+    assert "kiteconnect" in run_probe("from brokers.kite import KiteBroker; KiteBroker('k', 't')", str(tmp_path))["loaded"]
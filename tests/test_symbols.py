@@ -0,0 +1,64 @@
+import pytest
+
+import core.symbols as symbols_module
+from brokers.dhan import DhanBroker
+from core.symbols import SymbolRegistry, normalize_symbol
+
+SCRIP_MASTER = """SEM_EXM_EXCH_ID,SEM_SERIES,SEM_TRADING_SYMBOL,SEM_SMST_SECURITY_ID
+NSE,EQ,TCS,11536
+NSE,EQ,INFY,1594
+BSE,EQ,TCS,532540
+NSE,BE,SBIN,3045
+"""
+
+class FakeDhan:
+    def __init__(self):
+        self.requests = []
+
+    def quote_data(self, securities):
+        self.requests.append(securities)
+        quotes = {str(sec): {"last_price": sec / 10, "volume": 5, "ohlc": {"open": 1, "high": 2, "low": 0.5}}
+                  for sec in securities["NSE_EQ"]}
+        return {"status": "success", "data": {"data": {"NSE_EQ": quotes}, "status": "success"}}
+
+@pytest.fixture
+def fake_sdk(monkeypatch):
+    monkeypatch.setattr("dhanhq.dhanhq", lambda client_id, access_token: FakeDhan())
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = SymbolRegistry(["TCS", "INFY", "SBIN"], sectors={"TCS": "IT"})
+    monkeypatch.setattr(symbols_module, "_registry", registry)
+    return registry
+
+def test_ids_are_dense_and_spellings_resolve(registry):
+    assert normalize_symbol(" tcs.ns ") == "TCS"
+    assert registry.ids_for(["TCS", "infy", "SBIN.NS"]) == [0, 1, 2]
+    assert registry.add("HDFCBANK.NS") == 3 and registry.add("HDFCBANK") == 3
+    assert len(registry) == 4 and "hdfcbank" in registry and "WIPRO" not in registry
+    assert registry.yahoo_ticker("INFY") == "INFY.NS" and registry.yahoo_ticker("WIPRO") == "WIPRO.NS"
+    assert registry.sectors == ["IT", "UNKNOWN", "UNKNOWN", "UNKNOWN"]
+
+def test_scrip_master_keeps_nse_equities_only(registry, tmp_path):
+    path = tmp_path / "api-scrip-master.csv"
+    path.write_text(SCRIP_MASTER)
+    registry.load_dhan_scrip_master(str(path))
+    assert registry.dhan_security_ids == ["11536", "1594", None]
+
+def test_dhan_quotes_by_security_id(registry, fake_sdk, tmp_path):
+    path = tmp_path / "api-scrip-master.csv"
+    path.write_text(SCRIP_MASTER)
+    broker = DhanBroker("client", "token", scrip_master_path=str(path)) # loads the ids itself
+    assert broker.quotable
+    quotes = broker.get_market_data_batch(["TCS", "INFY", "SBIN"])
+    assert broker.dhan.requests == [{"NSE_EQ": [11536, 1594]}]
+    assert quotes == {"TCS": {"open": 1, "high": 2, "low": 0.5, "close": 1153.6, "volume": 5},
+                      "INFY": {"open": 1, "high": 2, "low": 0.5, "close": 159.4, "volume": 5}}
+    broker.get_market_data_batch(["TCS", "INFY", "SBIN"])
+    assert len(broker.chunk_requests) == 1 # the payload is built once per chunk
+
+def test_dhan_without_security_ids_warns_and_skips(registry, fake_sdk, capsys):
+    broker = DhanBroker("client", "token")
+    assert "DHAN_SCRIP_MASTER_PATH" in capsys.readouterr().out
+    assert not broker.quotable and broker.get_market_data_batch(["TCS"]) == {}
+    assert broker.dhan.requests == []
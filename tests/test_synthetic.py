@@ -0,0 +1,69 @@
+import threading
+
+import numpy as np
+
+from brokers.synthetic import SyntheticBroker
+from core.clock import SimClock
+
+SYMBOLS = [f"SYN{i}" for i in range(50)]
+
+def make_feed(now, **kwargs):
+    return SyntheticBroker(SYMBOLS, seed=5, clock=lambda: now[0], **kwargs)
+
+def test_seeded_feeds_agree():
+    now_a, now_b = [0.0], [0.0]
+    a, b = make_feed(now_a, error_rate=0.2), make_feed(now_b, error_rate=0.2)
+    for t in range(1, 200):
+        now_a[0] = now_b[0] = t * 1.5
+        assert a.get_market_data_batch(SYMBOLS[:20]) == b.get_market_data_batch(SYMBOLS[:20])
+
+def test_injected_errors_follow_the_rates():
+    now = [0.0]
+    feed = make_feed(now, error_rate=0.3)
+    failed = sum(not feed.get_market_data_batch(SYMBOLS) for _ in range(2000))
+    assert 500 <= failed <= 700 and feed.last_error == "805"
+    assert feed.authenticate()
+
+    dark = make_feed(now, auth_error_rate=1.0)
+    assert dark.get_market_data_batch(SYMBOLS) == {} and not dark.authenticate()
+    dark.auth_error_rate = 0.0
+    assert dark.get_market_data_batch(SYMBOLS) == {} # stays dark until reset
+    dark.reset_auth()
+    assert len(dark.get_market_data_batch(SYMBOLS)) == 50
+
+def test_concurrent_calls_keep_the_generator_consistent():
+    now = [0.0]
+    feed = make_feed(now, error_rate=0.5, latency_jitter_ms=0.01)
+    serial = make_feed([0.0], error_rate=0.5, latency_jitter_ms=0.01)
+
+    def call(n):
+        for _ in range(n): feed.get_market_data_batch(SYMBOLS[:5])
+
+    threads = [threading.Thread(target=call, args=(250,)) for _ in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    for _ in range(1000): serial.get_market_data_batch(SYMBOLS[:5])
+    # A fixed number of draws per call in any interleaving: both generators end in the same state
+    assert feed.rng.random() == serial.rng.random()
+
+def test_new_day_resets_the_range():
+    now = [0.0]
+    feed = make_feed(now)
+    now[0] = 600.0
+    before = feed.get_market_data_batch(SYMBOLS)
+    assert any(q["high"] > q["low"] for q in before.values())
+    feed.new_day()
+    for s, q in feed.get_market_data_batch(SYMBOLS).items():
+        assert q["open"] == q["high"] == q["low"] == q["close"] == before[s]["close"] and q["volume"] == 0
+
+def test_engine_session_roll_starts_a_new_synthetic_day(tmp_path, monkeypatch):
+    from main import TradingEngine
+    monkeypatch.chdir(tmp_path)
+    clock = SimClock(1_714_620_600.0)
+    feed = SyntheticBroker(SYMBOLS, seed=5, clock=clock.time)
+    engine = TradingEngine(clock=clock, data_feed=feed, persist=False)
+    clock.sleep(600)
+    feed.get_market_data_batch(SYMBOLS)
+    assert (feed.day_high > feed.day_low).any()
+    engine.roll_session()
+    assert np.array_equal(feed.day_high, feed.day_low) and np.array_equal(feed.day_open, feed.price)
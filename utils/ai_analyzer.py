@@ -1,6 +1,5 @@
 import os
 import json
-import requests
 
 class AITrendAnalyzer:
     """
@@ -32,6 +31,7 @@ class AITrendAnalyzer:
         }
         
         try:
+            import requests # deferred: only needed once a key is configured
             response = requests.post(self.api_url, json=payload, timeout=10)
             result = response.json()
             if 'candidates' not in result:
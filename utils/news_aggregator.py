@@ -1,5 +1,4 @@
 import os
-import requests
 import json
 
 class NewsSentimentAnalyzer:
@@ -46,6 +45,7 @@ class NewsSentimentAnalyzer:
         }
 
         try:
+            import requests # deferred: only needed once a key is configured
             response = requests.post(self.api_url, json=payload, timeout=10)
             result = response.json()
             if 'candidates' not in result:
@@ -1,3 +1,4 @@
+import os
 import time
 # Note: In a real environment, this might use selenium or playwright.
 # For this implementation, we simulate a screenshot capture.
@@ -5,15 +6,14 @@ import time
 class ChartScreenshotter:
     def __init__(self, output_dir: str = "screenshots"):
         self.output_dir = output_dir
-        import os
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
 
     def capture_chart(self, symbol: str, interval: str) -> str:
         """
         Simulates capturing a chart screenshot.
         In a real app, this would use a headless browser to visit a TradingView widget or Broker chart.
         """
+        # Directory is created on first capture, not at engine startup
+        os.makedirs(self.output_dir, exist_ok=True)
         timestamp = int(time.time())
         filename = f"{self.output_dir}/{symbol}_{interval}_{timestamp}.png"
         
@@ -40,12 +40,15 @@ class TaxCalculator:
         
         net_pnl = (sell_price - buy_price) * quantity - total_charges
         breakeven = total_charges / quantity if quantity > 0 else 0
+        buy_value = buy_price * quantity
+        net_profit_pct = net_pnl / buy_value * 100 if buy_value > 0 else 0
         
         return {
             "total_brokerage": total_brokerage,
             "total_tax": total_tax,
             "total_charges": total_charges,
             "net_pnl": net_pnl,
+            "net_profit_pct": net_profit_pct,
             "points_to_breakeven": breakeven
         }
 